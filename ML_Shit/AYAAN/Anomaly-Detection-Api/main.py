@@ -1,14 +1,21 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import os
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 from sklearn.preprocessing import MinMaxScaler
 import joblib
 
+from utils.executor import DeadlineExceeded, InferenceExecutor, Overloaded
+from utils.lifecycle import ModelLifecycle
+
 # ---- Load artifacts ----
-model = tf.keras.models.load_model("autoencoder_model.keras")
-scaler: MinMaxScaler = joblib.load("scaler.pkl")  # Must match training-time feature order
+# Loaded in a background thread once the server is up (see lifespan); /predict
+# answers 503 until the model is loaded and warmed up
+model = None
+scaler: MinMaxScaler = None  # Must match training-time feature order
 feature_order = ["throttle_pos", "rpm", "coolant_temp", "pressure", "vibration"]
 threshold = 0.008  # Update this if you have a better percentile value
 
@@ -20,8 +27,43 @@ schema = {
     "vibration": (0.12, 0.42)
 }
 
+# ---- Inference executor ----
+# Predictions (preprocessing included) run on INFERENCE_WORKERS dedicated threads
+# instead of the event loop or Starlette's shared threadpool. At most
+# INFERENCE_MAX_QUEUE requests wait for one; more are shed with a 503, as are
+# requests still waiting after PREDICT_TIMEOUT_MS.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 1))
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", 64))
+PREDICT_TIMEOUT_MS = float(os.environ.get("PREDICT_TIMEOUT_MS", 2000))
+executor = InferenceExecutor(workers=INFERENCE_WORKERS, max_queue=INFERENCE_MAX_QUEUE,
+                             timeout=PREDICT_TIMEOUT_MS / 1000)
+
+def load_artifacts():
+    global model, scaler
+    import tensorflow as tf
+    model = tf.keras.models.load_model("autoencoder_model.keras")
+    scaler = joblib.load("scaler.pkl")
+
+def warm_up():
+    # One prediction at the request shape (1, 24, features) traces predict()
+    sample = {key: (low + high) / 2 for key, (low, high) in schema.items()}
+    repeated = np.repeat(normalize_input(sample)[np.newaxis, :], 24, axis=0)[np.newaxis, :, :]
+    model.predict(repeated, verbose=0)
+
+lifecycle = ModelLifecycle(load_artifacts, warm_up)
+
+@asynccontextmanager
+async def lifespan(app):
+    await lifecycle.run_in_background()
+    yield
+
 # ---- FastAPI Setup ----
-app = FastAPI(title="Engine Health Autoencoder API")
+app = FastAPI(title="Engine Health Autoencoder API", lifespan=lifespan)
+
+@app.exception_handler(Overloaded)
+@app.exception_handler(DeadlineExceeded)
+async def shed(request: Request, exc: Exception):
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
 
 class SensorInput(BaseModel):
     throttle_pos: float
@@ -46,9 +88,7 @@ def classify_severity(error, threshold):
     else:
         return "high"
 
-@app.post("/predict")
-def predict(input_data: SensorInput):
-    input_dict = input_data.dict()
+def reconstruction_error(input_dict):
     norm_input = normalize_input(input_dict)
 
     # Create dummy sequence (24x features) with same normalized input
@@ -57,7 +97,14 @@ def predict(input_data: SensorInput):
 
     # Predict reconstruction
     recon = model.predict(repeated, verbose=0)[0]
-    error = np.mean((repeated[0] - recon) ** 2)
+    return np.mean((repeated[0] - recon) ** 2)
+
+@app.post("/predict", dependencies=[Depends(lifecycle.require_ready)])
+async def predict(input_data: SensorInput, response: Response):
+    input_dict = input_data.dict()
+    error, timing = await executor.run(reconstruction_error, input_dict)
+    response.headers["Server-Timing"] = (f"queue;dur={timing.queue_wait * 1000:.3f}, "
+                                         f"compute;dur={timing.compute * 1000:.3f}")
     severity = classify_severity(error, threshold)
 
     return {
@@ -80,4 +127,20 @@ def diagnostics(input_data: SensorInput):
             result[key] = "OK ✅"
     return {"diagnostics": result}
 
-print("✅ Engine Health API is ready.")
+@app.get("/predict/stats")
+def predict_stats():
+    return executor.stats()
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up; only a failed model load makes it unhealthy
+    status = lifecycle.status()
+    if status["state"] == "failed":
+        return JSONResponse(status, status_code=500)
+    return status
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: the model is loaded and warmed up
+    status = lifecycle.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
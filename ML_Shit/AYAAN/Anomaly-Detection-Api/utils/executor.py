@@ -0,0 +1,123 @@
+# utils/executor.py
+# Vendored from Engine-sim-api/utils/executor.py; keep the two copies in sync
+import asyncio
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Seconds a call waited before a model thread picked it up (counted from when its
+# request arrived) and seconds it ran there
+Timing = namedtuple("Timing", ["queue_wait", "compute"])
+
+
+class Overloaded(Exception):
+    """The admission queue is full"""
+
+
+class DeadlineExceeded(Exception):
+    """No result before the request's deadline"""
+
+
+class InferenceExecutor:
+    """
+    Dedicated model threads behind a bounded admission queue.
+
+    Model calls run on `workers` threads of their own instead of the default
+    executor that asyncio.to_thread and Starlette's sync endpoints share. At most
+    `max_queue` calls wait for a thread; beyond that run() raises Overloaded at
+    once, so the API sheds load with a 503 instead of letting latency grow without
+    bound. A call still queued when its deadline passes is dropped without running,
+    and the caller stops waiting at the deadline either way (DeadlineExceeded).
+    """
+
+    def __init__(self, workers=1, max_queue=64, timeout=None, history=1024):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+
+        # Statistics
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self._timings = deque(maxlen=history)
+
+    async def run(self, fn, *args, timeout=None, queued_at=None):
+        """
+        Run fn(*args) on a model thread and return (result, Timing). The deadline is
+        `timeout` seconds (default: the executor's; None or 0 for none) after
+        `queued_at`, a time.monotonic() value that defaults to now.
+        """
+        queued_at = time.monotonic() if queued_at is None else queued_at
+        timeout = self.timeout if timeout is None else timeout
+        deadline = queued_at + timeout if timeout else None
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(f"Inference queue full ({self.max_queue} calls waiting)")
+            self.waiting += 1
+
+        def job():
+            started = time.monotonic()
+            with self._lock:
+                self.waiting -= 1
+                if deadline is not None and started > deadline:
+                    self.expired += 1
+                    raise DeadlineExceeded(f"Deadline of {timeout:g} s passed while queued")
+                self.running += 1
+            try:
+                result = fn(*args)
+            finally:
+                finished = time.monotonic()
+                with self._lock:
+                    self.running -= 1
+            return result, Timing(started - queued_at, finished - started)
+
+        future = self._pool.submit(job)
+        future.add_done_callback(self._release_cancelled)
+        try:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            result, timing = await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+        except asyncio.TimeoutError:
+            # Cancels the call if it hasn't started; a running call finishes unobserved
+            with self._lock:
+                self.expired += 1
+            raise DeadlineExceeded(f"No result within {timeout:g} s")
+
+        with self._lock:
+            self.completed += 1
+            self._timings.append(timing)
+        return result, timing
+
+    def _release_cancelled(self, future):
+        if future.cancelled():
+            with self._lock:
+                self.waiting -= 1
+
+    def stats(self):
+        timings = np.array(self._timings, dtype=np.float64).reshape(-1, 2) * 1000
+
+        def summary(ms):
+            if not len(ms):
+                return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+            return {"mean": round(float(ms.mean()), 3), "p50": round(float(np.percentile(ms, 50)), 3),
+                    "p95": round(float(np.percentile(ms, 95)), 3), "max": round(float(ms.max()), 3)}
+
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "timeout_seconds": self.timeout,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "queue_wait_ms": summary(timings[:, 0]),
+            "compute_ms": summary(timings[:, 1])
+        }
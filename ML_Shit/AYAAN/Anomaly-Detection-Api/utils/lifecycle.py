@@ -0,0 +1,64 @@
+# utils/lifecycle.py
+# Vendored from Engine-sim-api/utils/lifecycle.py; keep the two copies in sync
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+
+class ModelLifecycle:
+    """
+    Loads and warms up the model after the server has bound its port.
+
+    `load` and then `warmup` run in a worker thread (run_in_background from the app's
+    lifespan, or run() directly in scripts). Until both have finished, model endpoints
+    answer 503 through require_ready and /readyz reports not ready, so orchestrators
+    only route traffic to warm workers. `warmup` may return a dict of timings, which
+    is reported with the load time.
+    """
+
+    def __init__(self, load, warmup):
+        self.load = load
+        self.warmup = warmup
+        self.state = "starting"  # starting -> loading -> warming_up -> ready, or failed
+        self.error = None
+        self.timings = {}
+        self._created = time.monotonic()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def run(self):
+        try:
+            self.state = "loading"
+            start = time.perf_counter()
+            self.load()
+            self.timings["load_seconds"] = round(time.perf_counter() - start, 3)
+
+            self.state = "warming_up"
+            start = time.perf_counter()
+            self.timings["warmup"] = self.warmup() or {}
+            self.timings["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+            self.timings["ready_after_seconds"] = round(time.monotonic() - self._created, 3)
+            self.state = "ready"
+            print("✅ Model ready:", self.timings)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+            print("❌ Model failed to load:", self.error)
+
+    async def run_in_background(self):
+        if self.state != "starting":  # already loaded, e.g. by a pre-fork parent
+            return
+        self._task = asyncio.get_running_loop().run_in_executor(None, self.run)
+
+    def require_ready(self):
+        """FastAPI dependency: 503 until the model is warm"""
+        if not self.ready:
+            raise HTTPException(status_code=503, detail=f"Model {self.state}" + (f": {self.error}" if self.error else ""),
+                                headers={"Retry-After": "1"})
+
+    def status(self):
+        return {"state": self.state, "ready": self.ready, "error": self.error, "timings": self.timings}
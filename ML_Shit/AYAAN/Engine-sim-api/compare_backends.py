@@ -0,0 +1,75 @@
+"""
+Parity and latency check of the NumPy engine against the Keras model.
+
+    python compare_backends.py [--tolerance 1e-4] [--samples 2000]
+
+Parity runs both backends on random scaled windows, inside and somewhat outside the
+training range, and fails (exit code 1) when any output differs by more than the
+tolerance. Latency is the median wall time per call for several batch sizes.
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+
+from utils.numpy_lstm import NumpyLSTM
+
+
+def median_ms(fn, X, repeats):
+    fn(X)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the NumPy and Keras Engine-sim backends")
+    parser.add_argument("--h5", default="model/lstm_model.h5")
+    parser.add_argument("--npz", default="model/lstm_model.npz")
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="Max abs difference in scaled outputs")
+    parser.add_argument("--samples", type=int, default=2000, help="Windows per parity check")
+    parser.add_argument("--batch-sizes", default="1,8,32,256")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    keras_model = tf.keras.models.load_model(args.h5, compile=False)
+    numpy_model = NumpyLSTM.load(args.npz)
+    target_scaler = joblib.load("model/target_scaler.pkl")
+    _, window_size, n_features = numpy_model.input_shape
+
+    rng = np.random.default_rng(0)
+    failed = False
+    print("Parity (max abs difference)")
+    for name, low, high in [("in range", 0.0, 1.0), ("out of range", -0.5, 1.5)]:
+        X = rng.uniform(low, high, (args.samples, window_size, n_features)).astype(np.float32)
+        expected = np.asarray(keras_model.predict_on_batch(X))
+        actual = numpy_model.predict_on_batch(X)
+        scaled_error = float(np.abs(expected - actual).max())
+        real_error = np.abs(target_scaler.inverse_transform(expected)
+                            - target_scaler.inverse_transform(actual)).max(axis=0)
+        ok = scaled_error <= args.tolerance
+        failed |= not ok
+        print(f"  {name:12s} scaled {scaled_error:.2e}  real units {np.array2string(real_error, precision=6)}  "
+              f"{'ok' if ok else 'FAIL'}")
+
+    print("Latency (median ms per call)")
+    print(f"  {'batch':>6s} {'keras predict':>14s} {'predict_on_batch':>17s} {'numpy':>8s} {'speedup':>8s}")
+    for batch in (int(b) for b in args.batch_sizes.split(",")):
+        X = rng.uniform(0, 1, (batch, window_size, n_features)).astype(np.float32)
+        keras_predict = median_ms(lambda x: keras_model.predict(x, verbose=0), X, max(5, args.repeats // 10))
+        keras_batch = median_ms(keras_model.predict_on_batch, X, args.repeats)
+        numpy_batch = median_ms(numpy_model.predict_on_batch, X, args.repeats)
+        print(f"  {batch:6d} {keras_predict:14.3f} {keras_batch:17.3f} {numpy_batch:8.3f} "
+              f"{keras_batch / numpy_batch:7.1f}x")
+
+    if failed:
+        raise SystemExit(f"Parity check failed (tolerance {args.tolerance})")
+
+
+if __name__ == "__main__":
+    main()
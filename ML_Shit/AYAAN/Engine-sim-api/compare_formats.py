@@ -0,0 +1,105 @@
+"""
+Request cost of JSON bodies against binary (raw float32 and .npy) bodies.
+
+    MODEL_BACKEND=numpy python compare_formats.py [--batch 1000] [--repeats 50]
+
+Runs the app in-process (no sockets), so the times are the server's own work per
+request: parsing, validation, scaling, the forward pass and formatting. "decode"
+is the body-to-array step alone.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+
+import httpx
+import joblib
+import numpy as np
+
+import main
+from utils.binary import NPY_TYPE, RAW_TYPE, decode_array
+
+
+
+def feature_ranges():
+    """(low, high) per input feature: the range the input scaler was fitted on"""
+    scaler = joblib.load("model/input_scaler.pkl")
+    return scaler.data_min_, scaler.data_max_
+
+
+def bodies(array):
+    """(name, content, headers) for each format of `array`"""
+    npy = io.BytesIO()
+    np.save(npy, array.astype(np.float32))
+    return [
+        ("json", json.dumps({"windows" if array.ndim == 3 else "window": array.tolist()}).encode(),
+         {"content-type": "application/json"}),
+        ("float32", array.astype(np.float32).tobytes(),
+         {"content-type": RAW_TYPE, "x-shape": ",".join(map(str, array.shape))}),
+        ("npy", npy.getvalue(), {"content-type": NPY_TYPE})
+    ]
+
+
+def decode(name, content, headers, model):
+    if name == "json":
+        return np.asarray(getattr(model.model_validate_json(content), "windows" if model is main.SensorBatch
+                                  else "window"), dtype=np.float64)
+    return decode_array(content, headers["content-type"], headers.get("x-shape"))
+
+
+def median_ms(fn, repeats):
+    fn()  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+async def median_request_ms(client, path, content, headers, repeats):
+    await client.post(path, content=content, headers=headers)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = await client.post(path, content=content, headers=headers)
+        times.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return float(np.median(times)) * 1000
+
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    low, high = feature_ranges()
+    cases = [
+        ("/predict", main.SensorWindow, low + rng.random((args.rows, len(low))) * (high - low)),
+        ("/predict/batch", main.SensorBatch, low + rng.random((args.batch, args.rows, len(low))) * (high - low))
+    ]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        print(f"  {'endpoint':15s} {'format':8s} {'bytes':>10s} {'decode ms':>10s} {'request ms':>11s}")
+        for path, model, array in cases:
+            for name, content, headers in bodies(array):
+                decode_ms = median_ms(lambda: decode(name, content, headers, model), args.repeats)
+                # /predict logs every prediction
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    request_ms = await median_request_ms(client, path, content, headers, args.repeats)
+                print(f"  {path:15s} {name:8s} {len(content):10d} {decode_ms:10.3f} {request_ms:11.3f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Compare JSON and binary request cost of the Engine-sim API")
+    parser.add_argument("--rows", type=int, default=24, help="Rows per window")
+    parser.add_argument("--batch", type=int, default=1000, help="Windows per /predict/batch request")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    main.lifecycle.run()  # the ASGI transport doesn't run the app's lifespan
+    print(f"Median per request, {main.MODEL_BACKEND} backend")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,17 @@
+"""
+Export the Keras Engine-sim model to a NumPy weights file.
+
+    python export_weights.py [model/lstm_model.h5] [model/lstm_model.npz]
+
+main.py serves the exported weights without TensorFlow when started with
+MODEL_BACKEND=numpy. Run compare_backends.py afterwards to check parity.
+"""
+import sys
+
+from utils.numpy_lstm import export_h5
+
+if __name__ == "__main__":
+    h5_path = sys.argv[1] if len(sys.argv) > 1 else "model/lstm_model.h5"
+    npz_path = sys.argv[2] if len(sys.argv) > 2 else "model/lstm_model.npz"
+    export_h5(h5_path, npz_path)
+    print(f"Exported {h5_path} -> {npz_path}")
@@ -1,37 +1,231 @@
 print(">>> main.py is loading")
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, Union
 import numpy as np
-import tensorflow as tf
 # import pickle
+import os
+import time
+from contextlib import asynccontextmanager
 import joblib
-from utils.preprocessing import prepare_input
+from utils.batching import MicroBatcher
+from utils.binary import BINARY_TYPES, decode_array, encode_array, is_binary, wants_binary
+from utils.executor import DeadlineExceeded, InferenceExecutor, Overloaded
+from utils.lifecycle import ModelLifecycle
+from utils.predict import rollout, sweep_throttle
+from utils.preprocessing import AffineScaler, prepare_batch
+from utils.sessions import SessionStore
+
+# --- Config ---
+# MODEL_BACKEND=numpy serves the weights exported by export_weights.py without
+# importing TensorFlow (see compare_backends.py for parity and latency)
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "keras")
+if MODEL_BACKEND not in ("keras", "numpy"):
+    raise ValueError(f"Unknown MODEL_BACKEND '{MODEL_BACKEND}', choose 'keras' or 'numpy'")
+# MODEL_MMAP=1 maps the NumPy weights read-only instead of copying them, so
+# workers share one copy (see serve.py)
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "0") == "1"
+
+INPUT_FEATURES = ["throttle_pos", "rpm", "coolant_temp", "pressure", "vibration"]
+TARGET_FEATURES = ["rpm", "coolant_temp", "pressure", "vibration"]
+
+# Request coalescing: concurrent /predict calls share one forward pass.
+# PREDICT_MAX_BATCH=1 turns batching off; PREDICT_MAX_WAIT_MS=0 only batches the
+# requests that queued up while the previous pass was running.
+MAX_BATCH = int(os.environ.get("PREDICT_MAX_BATCH", 32))
+MAX_WAIT_MS = float(os.environ.get("PREDICT_MAX_WAIT_MS", 2.0))
+
+# /predict/batch limits: windows per request (larger requests get 413) and
+# windows per forward pass
+BATCH_MAX_WINDOWS = int(os.environ.get("BATCH_MAX_WINDOWS", 10000))
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", 256))
+
+# /simulate limits: steps per rollout and scenarios per request
+SIMULATE_MAX_HORIZON = int(os.environ.get("SIMULATE_MAX_HORIZON", 3600))
+SIMULATE_MAX_SCENARIOS = int(os.environ.get("SIMULATE_MAX_SCENARIOS", 1000))
+
+# /predict/sweep limit: throttle values per request
+SWEEP_MAX_POINTS = int(os.environ.get("SWEEP_MAX_POINTS", 1000))
+
+# Streaming sessions: per-engine windows kept server-side, evicted LRU when
+# SESSION_MAX engines are live or after SESSION_TTL_SECONDS idle
+SESSION_MAX = int(os.environ.get("SESSION_MAX", 50000))
+SESSION_TTL_SECONDS = float(os.environ.get("SESSION_TTL_SECONDS", 900))
+
+# Inference executor: INFERENCE_WORKERS dedicated model threads, at most
+# INFERENCE_MAX_QUEUE calls waiting for one (more are shed with 503s), and a
+# deadline per request: PREDICT_TIMEOUT_MS for single windows (/predict and
+# sessions), INFERENCE_TIMEOUT_SECONDS for batch, sweep and simulate requests.
+# TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS size TensorFlow's own pools (0: its default).
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 1))
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", 64))
+PREDICT_TIMEOUT_MS = float(os.environ.get("PREDICT_TIMEOUT_MS", 1000))
+INFERENCE_TIMEOUT_SECONDS = float(os.environ.get("INFERENCE_TIMEOUT_SECONDS", 60))
+TF_INTRA_OP_THREADS = int(os.environ.get("TF_INTRA_OP_THREADS", 0))
+TF_INTER_OP_THREADS = int(os.environ.get("TF_INTER_OP_THREADS", 0))
+
+# Batch sizes run once before the server reports ready, so the first requests
+# don't pay for tracing. Defaults to the micro-batch sizes and the chunk size.
+WARMUP_BATCH_SIZES = sorted({int(b) for b in os.environ.get("WARMUP_BATCH_SIZES", "").split(",") if b} or
+                            {*(2 ** i for i in range(MAX_BATCH.bit_length())), MAX_BATCH, BATCH_CHUNK_SIZE})
+
 
 # --- Load model and scalers ---
-model = tf.keras.models.load_model("model/lstm_model.h5",compile=False)
+# Loading runs in the background once the server is up (see lifespan), and the
+# model endpoints answer 503 until it and the warm-up have finished
+model = None
+input_scaler = None
+target_scaler = None
+sessions = None
+WINDOW_SIZE = None
 
-input_scaler = joblib.load("model/input_scaler.pkl")
-target_scaler = joblib.load("model/target_scaler.pkl")
+def load_model():
+    global model, input_scaler, target_scaler, sessions, WINDOW_SIZE
+    if MODEL_BACKEND == "numpy":
+        from utils.numpy_lstm import NumpyLSTM
+        model = NumpyLSTM.load(os.environ.get("MODEL_NPZ", "model/lstm_model.npz"), mmap=MODEL_MMAP)
+    else:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+        tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+        model = tf.keras.models.load_model("model/lstm_model.h5",compile=False)
 
+    # Scalers are compiled into NumPy scale/offset vectors (bit-identical to the
+    # pickled sklearn scalers), so requests never go through sklearn
+    input_scaler = AffineScaler.from_sklearn(joblib.load("model/input_scaler.pkl"))
+    target_scaler = AffineScaler.from_sklearn(joblib.load("model/target_scaler.pkl"))
 
-# --- Config ---
-WINDOW_SIZE = model.input_shape[1]
-INPUT_FEATURES = ["throttle_pos", "rpm", "coolant_temp", "pressure", "vibration"]
-TARGET_FEATURES = ["rpm", "coolant_temp", "pressure", "vibration"]
+    WINDOW_SIZE = model.input_shape[1]
+    sessions = SessionStore(WINDOW_SIZE, len(INPUT_FEATURES), max_sessions=SESSION_MAX, ttl=SESSION_TTL_SECONDS)
+
+def warm_up():
+    # First call per batch size (tracing included), in ms
+    timings = {}
+    window = input_scaler.inverse_transform(np.full((WINDOW_SIZE, len(INPUT_FEATURES)), 0.5))
+    for batch in WARMUP_BATCH_SIZES:
+        X, _, _ = prepare_batch(np.repeat(window[None], batch, axis=0), input_scaler, WINDOW_SIZE,
+                                len(INPUT_FEATURES))
+        start = time.perf_counter()
+        target_scaler.inverse_transform(run_model(X).astype(np.float64))
+        timings[f"batch_{batch}_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return timings
+
+
+def run_model(X):
+    # predict_on_batch skips Keras predict()'s dataset and callback setup for a ready batch
+    return np.asarray(model.predict_on_batch(X))
+
+
+executor = InferenceExecutor(workers=INFERENCE_WORKERS, max_queue=INFERENCE_MAX_QUEUE,
+                             timeout=INFERENCE_TIMEOUT_SECONDS)
+batcher = MicroBatcher(run_model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, executor=executor)
+lifecycle = ModelLifecycle(load_model, warm_up)
+READY = [Depends(lifecycle.require_ready)]
+
+@asynccontextmanager
+async def lifespan(app):
+    await lifecycle.run_in_background()
+    yield
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(Overloaded)
+@app.exception_handler(DeadlineExceeded)
+async def shed(request: Request, exc: Exception):
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+def server_timing(*timings):
+    # Queue wait vs compute of the request's model calls, summed
+    queue_wait = sum(t.queue_wait for t in timings) * 1000
+    compute = sum(t.compute for t in timings) * 1000
+    return {"Server-Timing": f"queue;dur={queue_wait:.3f}, compute;dur={compute:.3f}"}
 
 class SensorWindow(BaseModel):
     window: list  # list of lists: shape = (window_size, num_features)
 
-@app.post("/predict")
-def predict(sensor: SensorWindow):
+class SensorBatch(BaseModel):
+    windows: list  # list of windows, or a 3-D array: shape = (n, window_size, num_features)
+
+class SensorReading(BaseModel):
+    throttle_pos: float
+    rpm: float
+    coolant_temp: float
+    pressure: float
+    vibration: float
+
+class ThrottleGrid(BaseModel):
+    start: float
+    stop: float
+    num: int = Field(ge=1, le=SWEEP_MAX_POINTS)  # evenly spaced values, both ends included
+
+class ThrottleSweep(BaseModel):
+    window: list  # list of lists: shape = (window_size, num_features)
+    throttle: Optional[list] = None  # throttle_pos values to try, or
+    grid: Optional[ThrottleGrid] = None
+
+class SimulationRequest(BaseModel):
+    horizon: int  # steps to simulate
+    window: Optional[list] = None  # one starting window, or
+    windows: Optional[list] = None  # one starting window per scenario
+    # throttle_pos per step: a number, a list of `horizon` values, or one such list
+    # per scenario. Defaults to holding each window's last throttle.
+    throttle: Optional[Union[float, list]] = None
+
+# Binary bodies (see utils/binary.py): /predict and /predict/batch also accept
+# application/octet-stream (raw float32/float64 values, shape in an X-Shape header)
+# or application/x-npy, and answer in the same formats when the Accept header names
+# one. Responses are float64 with the target columns listed in X-Columns.
+def request_body(model):
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": model.model_json_schema()},
+        **{media_type: binary for media_type in BINARY_TYPES}
+    }}}
+
+async def read_body(request: Request, model):
+    """The JSON body validated as `model`, or the array decoded from a binary body"""
+    body = await request.body()
+    content_type = request.headers.get("content-type")
+    if is_binary(content_type):
+        try:
+            array = decode_array(body, content_type, request.headers.get("x-shape"), request.headers.get("x-dtype"))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if array.ndim < 2 or array.shape[-1] != len(INPUT_FEATURES):
+            raise HTTPException(status_code=422, detail=f"Array rows must have {len(INPUT_FEATURES)} values, "
+                                                        f"got shape {array.shape}")
+        return array
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])}
+                                      for error in e.errors(include_url=False)])
+
+def binary_response(array, kind, **headers):
+    body, array_headers = encode_array(array, kind)
+    return Response(body, media_type=kind, headers={**array_headers, "X-Columns": ",".join(TARGET_FEATURES),
+                                                    **headers})
+
+@app.post("/predict", openapi_extra=request_body(SensorWindow), dependencies=READY)
+async def predict(request: Request, response: Response):
     # Step 1: prepare input
-    X = prepare_input(sensor.window, input_scaler, WINDOW_SIZE)
+    sensor = await read_body(request, SensorWindow)
+    if isinstance(sensor, np.ndarray):
+        if sensor.ndim > 3 or (sensor.ndim == 3 and len(sensor) != 1):
+            raise HTTPException(status_code=422, detail="Binary /predict bodies hold one window, "
+                                                        "shape (rows, features)")
+        windows = sensor.reshape(1, -1, len(INPUT_FEATURES))
+    else:
+        windows = [sensor.window]
+    X, _, errors = prepare_batch(windows, input_scaler, WINDOW_SIZE, len(INPUT_FEATURES))
+    if errors:
+        raise HTTPException(status_code=422, detail=errors[0])
 
-    # Step 2: predict
-    pred_scaled = model.predict(X)[0]
+    # Step 2: predict (batched with concurrent requests)
+    pred_scaled, timing = await batcher.submit(X, timeout=PREDICT_TIMEOUT_MS / 1000)
 
     # Step 3: inverse transform
     pred_real = target_scaler.inverse_transform([pred_scaled])[0]
@@ -39,5 +233,209 @@ def predict(sensor: SensorWindow):
 
 
     # Step 4: format
+    kind = wants_binary(request.headers.get("accept"))
+    if kind:
+        return binary_response(pred_real, kind, **server_timing(timing))
+    response.headers.update(server_timing(timing))
     return dict(zip(TARGET_FEATURES, map(float, pred_real)))
+
+@app.post("/predict/batch", openapi_extra=request_body(SensorBatch), dependencies=READY)
+async def predict_batch(request: Request, response: Response):
+    deadline = time.monotonic() + INFERENCE_TIMEOUT_SECONDS
+    batch = await read_body(request, SensorBatch)
+    if isinstance(batch, np.ndarray):
+        if batch.ndim != 3:
+            raise HTTPException(status_code=422, detail="Binary /predict/batch bodies need shape "
+                                                        "(windows, rows, features)")
+        windows = batch
+    else:
+        windows = batch.windows
+    if len(windows) > BATCH_MAX_WINDOWS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_WINDOWS} windows per request")
+
+    # Step 1: validate and scale every window in one call
+    X, indices, errors = prepare_batch(windows, input_scaler, WINDOW_SIZE, len(INPUT_FEATURES))
+
+    # Step 2: predict in chunks, all within the request's deadline; a failed chunk
+    # only fails its own windows, but shedding fails the request
+    predictions, predicted, timings = [], [], []
+    for start in range(0, len(X), BATCH_CHUNK_SIZE):
+        chunk = slice(start, start + BATCH_CHUNK_SIZE)
+        try:
+            prediction, timing = await executor.run(run_model, X[chunk],
+                                                    timeout=max(deadline - time.monotonic(), 1e-6))
+            predictions.append(prediction)
+            predicted.append(indices[chunk])
+            timings.append(timing)
+        except (Overloaded, DeadlineExceeded):
+            raise
+        except Exception as e:
+            for i in indices[chunk]:
+                errors[int(i)] = f"prediction failed: {e}"
+
+    # Step 3: inverse transform all successful predictions at once
+    pred_real = np.empty((0, len(TARGET_FEATURES)))
+    predicted = np.concatenate(predicted) if predicted else np.empty(0, dtype=np.int64)
+    if predictions:
+        pred_real = target_scaler.inverse_transform(np.concatenate(predictions).astype(np.float64))
+
+    # Step 4: format, in request order. Binary responses mark failed windows with
+    # NaN rows; their reasons are only in the JSON response.
+    kind = wants_binary(request.headers.get("accept"))
+    if kind:
+        array = np.full((len(windows), len(TARGET_FEATURES)), np.nan)
+        array[predicted] = pred_real
+        return binary_response(array, kind, **{"X-Errors": str(len(errors))}, **server_timing(*timings))
+    response.headers.update(server_timing(*timings))
+    results = [None] * len(windows)
+    for i, row in zip(predicted.tolist(), pred_real.tolist()):
+        results[i] = dict(zip(TARGET_FEATURES, row))
+    for i, error in errors.items():
+        results[i] = {"error": error}
+    return {"results": results, "count": len(results), "errors": len(errors)}
+
+@app.post("/predict/sweep", dependencies=READY)
+async def predict_sweep(sweep: ThrottleSweep, response: Response):
+    # Step 1: the throttle values to try
+    if sweep.throttle is not None:
+        # Bounded before any array is built
+        if not 1 <= len(sweep.throttle) <= SWEEP_MAX_POINTS:
+            raise HTTPException(status_code=413,
+                                detail=f"Sweep needs between 1 and {SWEEP_MAX_POINTS} throttle values")
+        try:
+            values = np.asarray(sweep.throttle, dtype=np.float64)
+        except (ValueError, TypeError):
+            values = None
+        if values is None or values.ndim != 1 or not np.isfinite(values).all():
+            raise HTTPException(status_code=422, detail="throttle must be a list of numbers")
+    elif sweep.grid is not None:
+        values = np.linspace(sweep.grid.start, sweep.grid.stop, sweep.grid.num)
+    else:
+        raise HTTPException(status_code=422, detail="Provide throttle or grid")
+    if not 1 <= len(values) <= SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=413, detail=f"Sweep needs between 1 and {SWEEP_MAX_POINTS} throttle values")
+
+    # Step 2: prepare the window once
+    X, _, errors = prepare_batch([sweep.window], input_scaler, WINDOW_SIZE, len(INPUT_FEATURES))
+    if errors:
+        raise HTTPException(status_code=422, detail=errors[0])
+
+    # Step 3: predict every variant in batched passes
+    states, timing = await executor.run(sweep_throttle, X, values, run_model, input_scaler, target_scaler,
+                                        INPUT_FEATURES, BATCH_CHUNK_SIZE)
+    response.headers.update(server_timing(timing))
+
+    # Step 4: format, one response curve per target feature
+    curves = {"throttle_pos": values.tolist()}
+    curves.update(zip(TARGET_FEATURES, states.T.tolist()))
+    return curves
+
+@app.post("/simulate", dependencies=READY)
+async def simulate(request: SimulationRequest, response: Response):
+    windows = request.windows if request.windows is not None else [request.window]
+    if request.window is None and request.windows is None:
+        raise HTTPException(status_code=422, detail="Provide window or windows")
+    if not 1 <= request.horizon <= SIMULATE_MAX_HORIZON:
+        raise HTTPException(status_code=422, detail=f"horizon must be between 1 and {SIMULATE_MAX_HORIZON}")
+    if len(windows) > SIMULATE_MAX_SCENARIOS:
+        raise HTTPException(status_code=413, detail=f"At most {SIMULATE_MAX_SCENARIOS} scenarios per request")
+
+    # Step 1: prepare the starting windows
+    X, _, errors = prepare_batch(windows, input_scaler, WINDOW_SIZE, len(INPUT_FEATURES))
+    if errors:
+        raise HTTPException(status_code=422, detail={"windows": {str(i): e for i, e in errors.items()}})
+
+    # Step 2: expand the throttle schedule to (scenarios, horizon)
+    if request.throttle is None:
+        last = np.array([window[-1][INPUT_FEATURES.index("throttle_pos")] for window in windows], dtype=np.float64)
+        throttle = np.repeat(last[:, None], request.horizon, axis=1)
+    else:
+        try:
+            throttle = np.broadcast_to(np.asarray(request.throttle, dtype=np.float64),
+                                       (len(windows), request.horizon))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=422, detail="throttle must be a number, a list of horizon values, "
+                                                        "or one such list per scenario")
+
+    # Step 3: roll out all scenarios together
+    states, timing = await executor.run(rollout, X, throttle, run_model, input_scaler, target_scaler,
+                                        INPUT_FEATURES, TARGET_FEATURES)
+    response.headers.update(server_timing(timing))
+
+    # Step 4: format, one trajectory per scenario
+    scenarios = []
+    for scenario_throttle, scenario_states in zip(throttle.tolist(), states):
+        trajectory = {"throttle_pos": scenario_throttle}
+        trajectory.update(zip(TARGET_FEATURES, scenario_states.T.tolist()))
+        scenarios.append(trajectory)
+    return {"horizon": request.horizon, "scenarios": scenarios}
+
+async def session_step(engine_id: str, reading: SensorReading, response: Optional[Response] = None):
+    # Step 1: scale only the new row and append it to the engine's window
+    row = input_scaler.transform(np.array([[getattr(reading, f) for f in INPUT_FEATURES]]))
+    rows = sessions.push(engine_id, row[0])
+    if rows < WINDOW_SIZE:
+        return {"engine_id": engine_id, "ready": False, "rows": rows}
+
+    # Step 2: predict (batched with concurrent requests)
+    pred_scaled, timing = await batcher.submit(sessions.window(engine_id), timeout=PREDICT_TIMEOUT_MS / 1000)
+    if response is not None:
+        response.headers.update(server_timing(timing))
+
+    # Step 3: inverse transform and format
+    pred_real = target_scaler.inverse_transform([pred_scaled])[0]
+    return {"engine_id": engine_id, "ready": True, "prediction": dict(zip(TARGET_FEATURES, map(float, pred_real)))}
+
+@app.post("/sessions/{engine_id}/readings", dependencies=READY)
+async def session_reading(engine_id: str, reading: SensorReading, response: Response):
+    return await session_step(engine_id, reading, response)
+
+@app.delete("/sessions/{engine_id}", dependencies=READY)
+async def session_close(engine_id: str):
+    if not sessions.drop(engine_id):
+        raise HTTPException(status_code=404, detail=f"No session for engine '{engine_id}'")
+    return {"engine_id": engine_id, "closed": True}
+
+@app.get("/sessions/stats", dependencies=READY)
+async def session_stats():
+    return sessions.stats()
+
+@app.websocket("/sessions/ws")
+async def session_stream(websocket: WebSocket):
+    # One JSON message per reading: {"engine_id": ..., "throttle_pos": ..., ...};
+    # each gets one reply, in order
+    if not lifecycle.ready:
+        await websocket.close(code=1013)  # try again later
+        return
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            try:
+                reply = await session_step(str(message["engine_id"]), SensorReading(**message))
+            except (KeyError, TypeError, ValueError) as e:
+                reply = {"error": f"invalid reading: {e}"}
+            except (Overloaded, DeadlineExceeded) as e:
+                reply = {"error": str(e)}
+            await websocket.send_json(reply)
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/predict/stats")
+def predict_stats():
+    return {**batcher.stats(), "executor": executor.stats()}
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up; only a failed model load makes it unhealthy
+    status = lifecycle.status()
+    if status["state"] == "failed":
+        return JSONResponse(status, status_code=500)
+    return status
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: the model is loaded and warmed up
+    status = lifecycle.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 print("✅ FastAPI app object:", app)
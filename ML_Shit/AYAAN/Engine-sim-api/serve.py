@@ -0,0 +1,85 @@
+"""
+Pre-fork server: load and warm up the model once, then fork workers that share it.
+
+    python serve.py [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+The parent freezes the NumPy weights into model/lstm_model.frozen.npz (the layout
+NumpyLSTM computes with, stored uncompressed), maps them read-only with MODEL_MMAP=1,
+runs the warm-up, binds the socket and forks the workers. Workers inherit the
+mapped weights, the scalers and the warmed-up state instead of loading their own,
+so adding a worker costs little more than its Python heap. TensorFlow isn't
+fork-safe, so this mode always serves the NumPy backend.
+
+Plain `MODEL_BACKEND=numpy MODEL_MMAP=1 uvicorn main:app --workers N` with the
+frozen file also shares the weights through the page cache, but each worker still
+imports and warms up on its own.
+
+Streaming sessions (/sessions/...) live in each worker's memory: with several
+workers, route a given engine's readings to one worker or use --workers 1.
+"""
+import argparse
+import os
+import signal
+import socket
+
+FROZEN_NPZ = "model/lstm_model.frozen.npz"
+
+
+def freeze(npz_path, frozen_path):
+    """Write the frozen weights unless they are newer than the exported ones"""
+    if os.path.exists(frozen_path) and os.path.getmtime(frozen_path) >= os.path.getmtime(npz_path):
+        return
+    from utils.numpy_lstm import NumpyLSTM
+    NumpyLSTM.load(npz_path).save(frozen_path)
+    print(f"Froze {npz_path} -> {frozen_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork Engine-sim API server sharing one model")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--npz", default=os.environ.get("MODEL_NPZ", "model/lstm_model.npz"))
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    freeze(args.npz, FROZEN_NPZ)
+    os.environ.update(MODEL_BACKEND="numpy", MODEL_NPZ=FROZEN_NPZ, MODEL_MMAP="1")
+    import uvicorn
+    import main as api
+
+    # Load and warm up before forking; the workers' lifespans then skip it
+    api.lifecycle.run()
+    if not api.lifecycle.ready:
+        raise SystemExit(f"Model failed to load: {api.lifecycle.error}")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            server = uvicorn.Server(uvicorn.Config(api.app, log_level=args.log_level))
+            server.run(sockets=[sock])
+            os._exit(0)
+        workers.append(pid)
+    print(f"✅ Serving on {args.host}:{args.port} with {len(workers)} workers: {workers}")
+
+    def stop(signum, frame):
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in workers:
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app's modules (utils.*) the way main.py does, from the API root
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_ROOT)
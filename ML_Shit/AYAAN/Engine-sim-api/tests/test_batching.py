@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from utils.batching import MicroBatcher
+from utils.executor import DeadlineExceeded, InferenceExecutor, Overloaded
+
+
+class Recorder:
+    """run_batch stand-in: returns each window's first value and records batch sizes"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sizes = []
+
+    def __call__(self, X):
+        self.sizes.append(len(X))
+        time.sleep(self.delay)
+        return X[:, 0, 0].copy()
+
+
+def window(value):
+    return np.full((1, 3, 2), value, dtype=np.float32)
+
+
+def submit_all(batcher, values, **kwargs):
+    async def run():
+        return await asyncio.gather(*[batcher.submit(window(v), **kwargs) for v in values])
+    return asyncio.run(run())
+
+
+def test_coalesces_concurrent_requests():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_batch=8, max_wait_ms=50)
+    results = submit_all(batcher, range(8))
+    assert run_batch.sizes == [8]
+    assert [float(output) for output, _ in results] == list(range(8))
+    assert batcher.stats()["mean_batch"] == 8
+
+
+def test_splits_at_max_batch():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_batch=4, max_wait_ms=50)
+    results = submit_all(batcher, range(10))
+    assert run_batch.sizes == [4, 4, 2]
+    assert [float(output) for output, _ in results] == list(range(10))
+
+
+def test_lone_request_waits_at_most_max_wait():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_batch=32, max_wait_ms=20)
+    start = time.monotonic()
+    [(output, timing)] = submit_all(batcher, [7])
+    assert float(output) == 7
+    assert run_batch.sizes == [1]
+    assert 0.015 <= time.monotonic() - start < 0.5
+    assert timing.queue_wait >= 0.015
+
+
+def test_rejects_when_pending_is_full():
+    batcher = MicroBatcher(Recorder(delay=0.05), max_batch=1, max_wait_ms=0, max_pending=2)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(window(v)) for v in range(5)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert sum(isinstance(r, Overloaded) for r in results) == 3
+    assert batcher.stats()["rejected"] == 3
+
+
+def test_expires_requests_past_their_deadline():
+    batcher = MicroBatcher(Recorder(delay=0.1), max_batch=1, max_wait_ms=0)
+    with pytest.raises(DeadlineExceeded):
+        submit_all(batcher, [1], timeout=0.02)
+    assert batcher.stats()["expired"] == 1
+
+
+def test_batch_errors_reach_every_request():
+    def fail(X):
+        raise RuntimeError("model broke")
+
+    batcher = MicroBatcher(fail, max_batch=4, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(window(v)) for v in range(3)], return_exceptions=True)
+
+    assert [str(r) for r in asyncio.run(run())] == ["model broke"] * 3
+
+
+def test_runs_one_batch_per_worker_at_once():
+    run_batch = Recorder(delay=0.2)
+    batcher = MicroBatcher(run_batch, max_batch=1, max_wait_ms=0, executor=InferenceExecutor(workers=2))
+    start = time.monotonic()
+    results = submit_all(batcher, range(4))
+    # Four 0.2 s batches on two workers take two rounds, not four
+    assert time.monotonic() - start < 0.6
+    assert [float(output) for output, _ in results] == list(range(4))
+    assert batcher.stats()["in_flight"] == 0
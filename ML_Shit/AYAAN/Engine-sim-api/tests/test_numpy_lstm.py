@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.numpy_lstm import NumpyLSTM, export_h5
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model")
+H5_PATH = os.path.join(MODEL_DIR, "lstm_model.h5")
+NPZ_PATH = os.path.join(MODEL_DIR, "lstm_model.npz")
+
+# Max abs difference in scaled outputs (measured: ~5e-7)
+TOLERANCE = 1e-4
+
+
+@pytest.fixture(scope="module")
+def numpy_model():
+    return NumpyLSTM.load(NPZ_PATH)
+
+
+def windows(model, low, high, n=512):
+    _, window_size, n_features = model.input_shape
+    return np.random.default_rng(0).uniform(low, high, (n, window_size, n_features)).astype(np.float32)
+
+
+@pytest.mark.parametrize("low, high", [(0.0, 1.0), (-0.5, 1.5)], ids=["in_range", "out_of_range"])
+def test_matches_keras(numpy_model, low, high):
+    tf = pytest.importorskip("tensorflow")
+    keras_model = tf.keras.models.load_model(H5_PATH, compile=False)
+    X = windows(numpy_model, low, high)
+    expected = np.asarray(keras_model.predict_on_batch(X))
+    np.testing.assert_allclose(numpy_model.predict_on_batch(X), expected, rtol=0, atol=TOLERANCE)
+
+
+def test_export_matches_committed_weights(numpy_model, tmp_path):
+    pytest.importorskip("h5py")
+    npz_path = tmp_path / "lstm_model.npz"
+    export_h5(H5_PATH, npz_path)
+    X = windows(numpy_model, 0.0, 1.0, n=64)
+    np.testing.assert_array_equal(NumpyLSTM.load(npz_path).predict_on_batch(X), numpy_model.predict_on_batch(X))
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_frozen_weights_round_trip(numpy_model, tmp_path, mmap):
+    frozen_path = tmp_path / "lstm_model.frozen.npz"
+    numpy_model.save(frozen_path)
+    X = windows(numpy_model, 0.0, 1.0, n=64)
+    np.testing.assert_array_equal(NumpyLSTM.load(frozen_path, mmap=mmap).predict_on_batch(X),
+                                  numpy_model.predict_on_batch(X))
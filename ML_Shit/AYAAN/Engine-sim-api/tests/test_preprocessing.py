@@ -0,0 +1,91 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import MaxAbsScaler, MinMaxScaler, StandardScaler
+
+from utils.preprocessing import AffineScaler, prepare_batch
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model")
+
+WINDOW_SIZE = 4
+N_FEATURES = 3
+
+
+def fitted(scaler):
+    return scaler.fit(np.random.default_rng(1).normal(50, 20, (100, N_FEATURES)))
+
+
+@pytest.mark.parametrize("name", ["input_scaler.pkl", "target_scaler.pkl"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_bit_identical_to_pickled_scalers(name, dtype):
+    scaler = joblib.load(os.path.join(MODEL_DIR, name))
+    affine = AffineScaler.from_sklearn(scaler)
+    X = np.random.default_rng(0).normal(0, 1000, (64, affine.n_features_in_)).astype(dtype)
+    for ours, theirs in [(affine.transform(X), scaler.transform(X)),
+                         (affine.inverse_transform(X), scaler.inverse_transform(X))]:
+        assert ours.dtype == theirs.dtype
+        np.testing.assert_array_equal(ours, theirs)
+
+
+@pytest.mark.parametrize("scaler", [MinMaxScaler(), MinMaxScaler(feature_range=(-1, 1), clip=True),
+                                    StandardScaler(), StandardScaler(with_mean=False)],
+                         ids=["minmax", "minmax_clip", "standard", "standard_no_mean"])
+def test_bit_identical_to_sklearn(scaler):
+    scaler = fitted(scaler)
+    affine = AffineScaler.from_sklearn(scaler)
+    X = np.random.default_rng(2).normal(50, 40, (32, N_FEATURES))
+    np.testing.assert_array_equal(affine.transform(X), scaler.transform(X))
+    np.testing.assert_array_equal(affine.inverse_transform(X), scaler.inverse_transform(X))
+
+
+def test_unsupported_scaler():
+    with pytest.raises(TypeError):
+        AffineScaler.from_sklearn(fitted(MaxAbsScaler()))
+
+
+def test_transform_in_place():
+    affine = AffineScaler.from_sklearn(fitted(MinMaxScaler()))
+    X = np.random.default_rng(3).normal(50, 20, (8, N_FEATURES))
+    expected = affine.transform(X)
+    assert affine.transform(X, copy=False) is X
+    np.testing.assert_array_equal(X, expected)
+
+
+@pytest.fixture
+def scaler():
+    return AffineScaler.from_sklearn(fitted(MinMaxScaler()))
+
+
+def test_prepare_batch_keeps_last_rows(scaler):
+    windows = np.random.default_rng(4).normal(50, 20, (5, WINDOW_SIZE + 2, N_FEATURES))
+    X, indices, errors = prepare_batch(windows, scaler, WINDOW_SIZE, N_FEATURES)
+    assert errors == {}
+    np.testing.assert_array_equal(indices, np.arange(5))
+    expected = scaler.transform(windows[:, -WINDOW_SIZE:].reshape(-1, N_FEATURES)).reshape(5, WINDOW_SIZE, N_FEATURES)
+    np.testing.assert_array_equal(X, expected)
+
+
+def test_prepare_batch_leaves_read_only_input_alone(scaler):
+    windows = np.random.default_rng(5).normal(50, 20, (2, WINDOW_SIZE, N_FEATURES))
+    original = windows.copy()
+    windows.flags.writeable = False
+    X, _, _ = prepare_batch(windows, scaler, WINDOW_SIZE, N_FEATURES)
+    np.testing.assert_array_equal(windows, original)
+    np.testing.assert_array_equal(X, scaler.transform(original.reshape(-1, N_FEATURES)).reshape(X.shape))
+
+
+def test_prepare_batch_reports_invalid_windows(scaler):
+    good = [[1.0, 2.0, 3.0]] * WINDOW_SIZE
+    windows = [good, "x", [[1.0, 2.0]] * WINDOW_SIZE, good[:2], [[1.0, None, 3.0]] * WINDOW_SIZE, [], good]
+    X, indices, errors = prepare_batch(windows, scaler, WINDOW_SIZE, N_FEATURES)
+    np.testing.assert_array_equal(indices, [0, 6])
+    assert X.shape == (2, WINDOW_SIZE, N_FEATURES)
+    assert errors == {
+        1: "window must be a list of numeric rows",
+        2: f"window rows must have {N_FEATURES} values",
+        3: f"window needs at least {WINDOW_SIZE} rows, got 2",
+        4: "window contains non-finite values",
+        5: f"window rows must have {N_FEATURES} values",
+    }
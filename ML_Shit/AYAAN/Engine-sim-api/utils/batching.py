@@ -0,0 +1,146 @@
+# utils/batching.py
+import asyncio
+import time
+
+import numpy as np
+
+from utils.executor import DeadlineExceeded, InferenceExecutor, Overloaded, Timing
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-window requests into one forward pass.
+
+    The first request to arrive opens a batch; the batch is run once it holds
+    `max_batch` windows or `max_wait_ms` milliseconds have passed, whichever comes
+    first. `run_batch` receives the stacked (batch, window, features) array and is
+    called on the executor's model threads, so requests keep queueing while it runs.
+    Up to one batch per executor worker runs at once; while every worker is busy,
+    arriving windows keep filling the next batch.
+
+    At most `max_pending` windows wait for a batch; further submissions raise
+    Overloaded. Windows whose deadline passes while they wait are dropped from the
+    batch.
+    """
+
+    def __init__(self, run_batch, max_batch=32, max_wait_ms=2.0, executor=None, max_pending=None):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor or InferenceExecutor()
+        self.max_pending = max_pending or max_batch * self.executor.max_queue
+        self._pending = []  # (input, future, arrival, deadline) in arrival order
+        self._wakeup = None
+        self._task = None
+        self._loop = None
+        self._slots = None  # one per executor worker, held by each batch in flight
+        self._in_flight = set()
+
+        # Statistics
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.rejected = 0
+        self.expired = 0
+
+    async def submit(self, x, timeout=None):
+        """
+        Queue one (1, window, features) input and wait for its output row. Returns
+        (output, Timing); `timeout` defaults to the executor's.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First call, or the app moved to a new event loop (e.g. a test client
+            # without a lifespan): the worker must run on the current loop
+            self._loop = loop
+            self._pending = []
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.executor.workers)
+            self._in_flight = set()
+            self._task = loop.create_task(self._run())
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"Prediction queue full ({self.max_pending} windows waiting)")
+        timeout = self.executor.timeout if timeout is None else timeout
+        arrival = time.monotonic()
+        deadline = arrival + timeout if timeout else None
+        future = loop.create_future()
+        self._pending.append((x, future, arrival, deadline))
+        self._wakeup.set()
+        try:
+            return await asyncio.wait_for(future, None if deadline is None else timeout)
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise DeadlineExceeded(f"No result within {timeout:g} s")
+
+    async def _next_batch(self):
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        deadline = time.monotonic() + self.max_wait
+        while len(self._pending) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        # Requests cancelled while queued (client went away or deadline passed) are skipped
+        return [item for item in batch if not item[1].done()]
+
+    async def _run(self):
+        while True:
+            # Wait for a free worker first, so the batch grows while all are busy
+            await self._slots.acquire()
+            batch = await self._next_batch()
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task):
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _run_batch(self, batch):
+        # The batch is due when its oldest window is
+        deadlines = [deadline for _, _, _, deadline in batch if deadline is not None]
+        oldest = batch[0][2]
+        try:
+            outputs, timing = await self.executor.run(
+                self.run_batch, np.concatenate([x for x, _, _, _ in batch]),
+                timeout=min(deadlines) - oldest if deadlines else 0, queued_at=oldest)
+        except Exception as e:
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.max_seen = max(self.max_seen, len(batch))
+        started = oldest + timing.queue_wait
+        for (_, future, arrival, _), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result((output, Timing(started - arrival, timing.compute)))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_seen,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "expired": self.expired
+        }
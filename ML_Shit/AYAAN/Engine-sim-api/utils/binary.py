@@ -0,0 +1,80 @@
+# utils/binary.py
+import io
+
+import numpy as np
+
+# Binary bodies: raw little-endian values with the shape in an X-Shape header
+# ("10,5" or "n,10,5") and an optional X-Dtype header (float32 by default), or a
+# .npy file. Both decode with np.frombuffer, without touching individual elements.
+RAW_TYPE = "application/octet-stream"
+NPY_TYPE = "application/x-npy"
+BINARY_TYPES = (RAW_TYPE, NPY_TYPE)
+RAW_DTYPES = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def media_type(header):
+    return (header or "").split(";")[0].strip().lower()
+
+
+def is_binary(content_type):
+    return media_type(content_type) in BINARY_TYPES
+
+
+def decode_array(body, content_type, shape=None, dtype=None):
+    """Decode a binary request body into a read-only float array. Raises ValueError."""
+    if media_type(content_type) == NPY_TYPE or body[:len(NPY_MAGIC)] == NPY_MAGIC:
+        return _decode_npy(body)
+
+    if dtype is None:
+        dtype = "float32"
+    if dtype not in RAW_DTYPES:
+        raise ValueError(f"X-Dtype must be one of {', '.join(RAW_DTYPES)}")
+    if not shape:
+        raise ValueError("Raw binary bodies need an X-Shape header, e.g. '10,5'")
+    try:
+        dims = tuple(int(d) for d in shape.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid X-Shape '{shape}'")
+    dtype = RAW_DTYPES[dtype]
+    if any(d < 0 for d in dims) or int(np.prod(dims)) * dtype.itemsize != len(body):
+        raise ValueError(f"Body has {len(body)} bytes, X-Shape {shape} of {dtype.name} needs "
+                         f"{int(np.prod(dims)) * dtype.itemsize}")
+    return np.frombuffer(body, dtype=dtype).reshape(dims)
+
+
+def _decode_npy(body):
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) \
+            else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(stream)
+    except ValueError as e:
+        raise ValueError(f"Invalid .npy body: {e}")
+    if dtype.kind != "f":
+        raise ValueError(f".npy bodies must hold floats, got {dtype}")
+    data = body[stream.tell():]
+    if len(data) != int(np.prod(shape)) * dtype.itemsize:
+        raise ValueError(".npy body is truncated")
+    array = np.frombuffer(data, dtype=dtype)
+    return array.reshape(shape[::-1]).T if fortran_order else array.reshape(shape)
+
+
+def wants_binary(accept):
+    """Binary media type named in an Accept header, or None for JSON"""
+    for part in (accept or "").split(","):
+        if media_type(part) in BINARY_TYPES:
+            return media_type(part)
+    return None
+
+
+def encode_array(array, kind):
+    """Response body and headers for `array` as raw float64 or .npy"""
+    array = np.ascontiguousarray(array, dtype="<f8")
+    headers = {"X-Shape": ",".join(map(str, array.shape)), "X-Dtype": "float64"}
+    if kind == NPY_TYPE:
+        stream = io.BytesIO()
+        np.save(stream, array, allow_pickle=False)
+        return stream.getvalue(), headers
+    return array.tobytes(), headers
@@ -0,0 +1,193 @@
+# utils/numpy_lstm.py
+import json
+import struct
+import zipfile
+
+import numpy as np
+
+# Layer stack this engine implements (the Engine-sim model):
+# Bidirectional(LSTM, merge_mode="concat") -> Dense(relu) -> Dense(linear)
+SUPPORTED_LAYERS = ["Bidirectional", "Dense", "Dense"]
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0, out=x)
+}
+
+
+def export_h5(h5_path, npz_path):
+    """
+    Extract the weights of a Keras .h5 Engine-sim model into an .npz readable by
+    NumpyLSTM. Only needs h5py, not TensorFlow.
+    """
+    import h5py
+
+    with h5py.File(h5_path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        layers = config["config"]["layers"]
+        inputs = [layer["config"] for layer in layers if layer["class_name"] == "InputLayer"]
+        layers = [layer for layer in layers if layer["class_name"] != "InputLayer"]
+        if [layer["class_name"] for layer in layers] != SUPPORTED_LAYERS:
+            raise ValueError(f"Unsupported model layers {[layer['class_name'] for layer in layers]}, "
+                             f"expected {SUPPORTED_LAYERS}")
+        bidirectional, dense, output = (layer["config"] for layer in layers)
+        lstm = bidirectional["layer"]["config"]
+        if bidirectional["merge_mode"] != "concat" or lstm["activation"] != "tanh" \
+                or lstm["recurrent_activation"] != "sigmoid":
+            raise ValueError("Only concat-merged LSTMs with tanh/sigmoid activations are supported")
+        if inputs:
+            # Keras 3 saves batch_shape, Keras 2 batch_input_shape
+            input_shape = inputs[0].get("batch_shape") or inputs[0]["batch_input_shape"]
+        else:
+            input_shape = layers[0]["build_config"]["input_shape"]
+        window_size, n_features = input_shape[1:]
+
+        def weights(layer):
+            group = f["model_weights"][layer["name"]]
+            return [np.asarray(group[name], dtype=np.float32) for name in group.attrs["weight_names"]]
+
+        fw_kernel, fw_recurrent, fw_bias, bw_kernel, bw_recurrent, bw_bias = weights(bidirectional)
+        dense_kernel, dense_bias = weights(dense)
+        out_kernel, out_bias = weights(output)
+
+    np.savez(
+        npz_path,
+        fw_kernel=fw_kernel, fw_recurrent=fw_recurrent, fw_bias=fw_bias,
+        bw_kernel=bw_kernel, bw_recurrent=bw_recurrent, bw_bias=bw_bias,
+        dense_kernel=dense_kernel, dense_bias=dense_bias,
+        out_kernel=out_kernel, out_bias=out_bias,
+        activations=np.array([dense["activation"], output["activation"]]),
+        window_size=np.int64(window_size), n_features=np.int64(n_features)
+    )
+
+
+def load_npz(npz_path, mmap=False):
+    """
+    Arrays of an .npz by name. With mmap=True the float arrays are read-only memory
+    maps into the file instead of copies, so every process loading the same file
+    shares its pages. np.load ignores mmap_mode for .npz files, so the members are
+    located in the zip directly; they must be stored uncompressed, as np.savez does.
+    """
+    if not mmap:
+        with np.load(npz_path) as weights:
+            return {name: weights[name] for name in weights.files}
+
+    arrays = {}
+    with zipfile.ZipFile(npz_path) as archive, open(npz_path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{npz_path}: {info.filename} is compressed and can't be memory-mapped")
+            # The member's .npy data follows its 30-byte local header, name and extra field
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) \
+                else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+            name = info.filename[:-len(".npy")]
+            if dtype.kind == "f" and np.prod(shape) > 0:
+                arrays[name] = np.memmap(f, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran_order else "C").view(np.ndarray)
+            else:
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(
+                    shape, order="F" if fortran_order else "C")
+    return arrays
+
+
+class NumpyLSTM:
+    """
+    NumPy forward pass of the Engine-sim model, a drop-in for the Keras model's
+    predict_on_batch. Both LSTM directions run in the same recurrent loop as one
+    stacked matmul per timestep, with their input projections computed for all
+    timesteps up front.
+    """
+
+    def __init__(self, weights):
+        self.window_size = int(weights["window_size"])
+        self.n_features = int(weights["n_features"])
+        self.input_shape = (None, self.window_size, self.n_features)
+        self.activations = [str(a) for a in weights["activations"]]
+        self.dense_activation, self.out_activation = (ACTIVATIONS[a] for a in self.activations)
+        self.dense_kernel = weights["dense_kernel"]
+        self.dense_bias = weights["dense_bias"]
+        self.out_kernel = weights["out_kernel"]
+        self.out_bias = weights["out_bias"]
+
+        if "kernel" in weights:
+            # Frozen by save(): already in the layout below, used as is
+            self.kernel = weights["kernel"]
+            self.bias = weights["bias"]
+            self.units = self.kernel.shape[2] // 4
+            return
+        self.units = units = weights["fw_recurrent"].shape[0]
+
+        # Keras gate order is input, forget, cell, output; reorder to i, f, o, c so
+        # the sigmoid gates are contiguous, and halve their pre-activations so one
+        # tanh covers all four gates: sigmoid(x) = 0.5 * (1 + tanh(x / 2)).
+        # Halving is exact in floating point.
+        order = np.r_[0:2 * units, 3 * units:4 * units, 2 * units:3 * units]
+        scale = np.ones(4 * units, dtype=np.float32)
+        scale[:3 * units] = 0.5
+
+        def gates(w):
+            return (w[..., order] * scale).astype(np.float32)
+
+        # Input and recurrent kernels stacked per direction, (2, features + units, gates),
+        # so each step is one matmul of [x_t, h] for both directions
+        self.kernel = np.stack([
+            np.concatenate([gates(weights["fw_kernel"]), gates(weights["fw_recurrent"])]),
+            np.concatenate([gates(weights["bw_kernel"]), gates(weights["bw_recurrent"])])
+        ])
+        self.bias = np.stack([gates(weights["fw_bias"]), gates(weights["bw_bias"])])[:, None, :]
+
+    @classmethod
+    def load(cls, npz_path, mmap=False):
+        return cls(load_npz(npz_path, mmap=mmap))
+
+    def save(self, npz_path):
+        """
+        Freeze the weights in the layout predict_on_batch uses, so loading them (with
+        mmap=True) needs no copies
+        """
+        np.savez(
+            npz_path,
+            kernel=self.kernel, bias=self.bias,
+            dense_kernel=self.dense_kernel, dense_bias=self.dense_bias,
+            out_kernel=self.out_kernel, out_bias=self.out_bias,
+            activations=np.array(self.activations),
+            window_size=np.int64(self.window_size), n_features=np.int64(self.n_features)
+        )
+
+    def predict_on_batch(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        batch, steps, features = X.shape
+        units = self.units
+        gates = 4 * units
+
+        # xh holds [x_t, h] per direction; the forward direction reads step t and
+        # the backward one step steps-1-t
+        xh = np.zeros((2, batch, features + units), dtype=np.float32)
+        h = xh[:, :, features:]
+        c = np.zeros((2, batch, units), dtype=np.float32)
+        z = np.empty((2, batch, gates), dtype=np.float32)
+        sig = z[:, :, :3 * units]
+        for t in range(steps):
+            xh[0, :, :features] = X[:, t]
+            xh[1, :, :features] = X[:, steps - 1 - t]
+            np.matmul(xh, self.kernel, out=z)
+            z += self.bias
+            np.tanh(z, out=z)
+            sig += 1.0
+            sig *= 0.5
+            c *= z[:, :, units:2 * units]
+            c += z[:, :, :units] * z[:, :, 3 * units:]
+            np.multiply(z[:, :, 2 * units:3 * units], np.tanh(c), out=h)
+
+        # Merge directions: [forward | backward] per row
+        merged = np.concatenate([h[0], h[1]], axis=1)
+        hidden = self.dense_activation(merged @ self.dense_kernel + self.dense_bias)
+        return self.out_activation(hidden @ self.out_kernel + self.out_bias)
+
+    def predict(self, X, **kwargs):
+        return self.predict_on_batch(X)
+
@@ -16,3 +16,68 @@ def predict_next_state_lstm(history_window, model, input_scaler, target_scaler,
     y_pred = target_scaler.inverse_transform(y_scaled)[0]
 
     return dict(zip(target_features, y_pred.round(3)))
+
+def rollout(X_scaled, throttle, run_model, input_scaler, target_scaler, input_features, target_features):
+    """
+    Autoregressive multi-step simulation of many scenarios at once.
+
+    X_scaled: (n, window_size, n_features) scaled starting windows.
+    throttle: (n, horizon) throttle_pos schedule in real units. Like override_throttle,
+    throttle[:, t] replaces the throttle of the latest row before step t is predicted.
+    Each step runs one batched forward pass over all scenarios and appends the
+    predicted state as the next input row. Windows live in one preallocated
+    (n, window_size + horizon, n_features) buffer, so the window at step t is a view
+    and nothing is shifted.
+
+    Returns the (n, horizon, len(target_features)) predicted states in real units.
+    """
+    n, window_size, n_features = X_scaled.shape
+    horizon = throttle.shape[1]
+    throttle_col = input_features.index("throttle_pos")
+    target_cols = [input_features.index(feature) for feature in target_features]
+
+    # Scale the whole schedule up front (the scaler works per column)
+    schedule = np.zeros((n * horizon, n_features), dtype=np.float64)
+    schedule[:, throttle_col] = throttle.reshape(-1)
+    throttle_scaled = input_scaler.transform(schedule)[:, throttle_col].reshape(n, horizon)
+
+    history = np.empty((n, window_size + horizon, n_features), dtype=np.float32)
+    history[:, :window_size] = X_scaled
+    states = np.empty((n, horizon, len(target_features)), dtype=np.float64)
+    rows = np.zeros((n, n_features), dtype=np.float64)
+    for t in range(horizon):
+        history[:, window_size + t - 1, throttle_col] = throttle_scaled[:, t]
+        y_scaled = np.asarray(run_model(history[:, t:t + window_size]), dtype=np.float64)
+        states[:, t] = target_scaler.inverse_transform(y_scaled)
+        # Feed the prediction back; its throttle is set by the next step
+        rows[:, target_cols] = states[:, t]
+        history[:, window_size + t] = input_scaler.transform(rows)
+
+    return states
+
+def sweep_throttle(X_scaled, throttle_values, run_model, input_scaler, target_scaler, input_features, chunk_size=256):
+    """
+    Next-state predictions for one window under many throttle overrides.
+
+    X_scaled: (1, window_size, n_features) scaled window. The N variants share every
+    row but the last, so they are built by broadcasting the window and writing only
+    the scaled throttle into each variant's last row; all variants are then
+    evaluated in batched passes of up to `chunk_size`.
+
+    Returns the (N, n_targets) predicted states in real units.
+    """
+    _, window_size, n_features = X_scaled.shape
+    throttle_col = input_features.index("throttle_pos")
+    throttle_values = np.asarray(throttle_values, dtype=np.float64)
+
+    overrides = np.zeros((len(throttle_values), n_features), dtype=np.float64)
+    overrides[:, throttle_col] = throttle_values
+    throttle_scaled = input_scaler.transform(overrides)[:, throttle_col]
+
+    X = np.empty((len(throttle_values), window_size, n_features), dtype=np.float32)
+    X[:] = X_scaled
+    X[:, -1, throttle_col] = throttle_scaled
+
+    y_scaled = np.concatenate([np.asarray(run_model(X[start:start + chunk_size]), dtype=np.float64)
+                               for start in range(0, len(X), chunk_size)])
+    return target_scaler.inverse_transform(y_scaled)
@@ -1,6 +1,129 @@
 import numpy as np
 
+
+class AffineScaler:
+    """
+    A fitted sklearn MinMaxScaler or StandardScaler compiled into plain NumPy
+    vectors. transform/inverse_transform apply the same in-place operations, in the
+    same order and dtype, as the sklearn methods, so results are bit-identical
+    without sklearn's per-call validation. from_sklearn checks this on probe rows.
+    """
+
+    def __init__(self, kind, scale, offset, clip=None):
+        self.kind = kind  # "minmax": x * scale + offset, "standard": (x - offset) / scale
+        self.scale = scale
+        self.offset = offset
+        self.clip = clip
+        self.n_features_in_ = len(scale)
+
+    @classmethod
+    def from_sklearn(cls, scaler, check=True):
+        name = type(scaler).__name__
+        if name == "MinMaxScaler":
+            affine = cls("minmax", np.array(scaler.scale_, dtype=np.float64), np.array(scaler.min_, dtype=np.float64),
+                         scaler.feature_range if scaler.clip else None)
+        elif name == "StandardScaler":
+            n_features = scaler.n_features_in_
+            mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+            scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+            affine = cls("standard", np.array(scale, dtype=np.float64), np.array(mean, dtype=np.float64))
+        else:
+            raise TypeError(f"Cannot compile {name}, only MinMaxScaler and StandardScaler are supported")
+
+        if check:
+            probe_scaled = np.random.default_rng(0).uniform(-0.5, 1.5, (256, affine.n_features_in_))
+            probe = np.asarray(scaler.inverse_transform(probe_scaled))
+            if not (np.array_equal(affine.transform(probe), scaler.transform(probe))
+                    and np.array_equal(affine.inverse_transform(probe_scaled), scaler.inverse_transform(probe_scaled))):
+                raise ValueError(f"Compiled {name} does not reproduce the sklearn scaler")
+        return affine
+
+    @staticmethod
+    def _prepare(X, copy):
+        # Like sklearn: float32/float64 arrays keep their dtype, lists and other
+        # dtypes become float64
+        if not isinstance(X, np.ndarray) or (X.dtype != np.float32 and X.dtype != np.float64):
+            return np.array(X, dtype=np.float64)
+        return X.copy() if copy else X
+
+    def transform(self, X, copy=True):
+        X = self._prepare(X, copy)
+        if self.kind == "minmax":
+            X *= self.scale
+            X += self.offset
+            if self.clip is not None:
+                np.clip(X, self.clip[0], self.clip[1], out=X)
+        else:
+            X -= self.offset
+            X /= self.scale
+        return X
+
+    def inverse_transform(self, X, copy=True):
+        X = self._prepare(X, copy)
+        if self.kind == "minmax":
+            X -= self.offset
+            X /= self.scale
+        else:
+            X *= self.scale
+            X += self.offset
+        return X
+
+
 def prepare_input(window, input_scaler, window_size):
-    window = np.array(window).reshape(-1, len(window[0]))
-    scaled = input_scaler.transform(window)
-    return scaled[-window_size:].reshape(1, window_size, -1)
+    # Only the rows the model sees are converted and scaled, in place
+    window = np.array(window[-window_size:], dtype=np.float64)
+    scaled = input_scaler.transform(window, copy=False)
+    return scaled.reshape(1, window_size, -1)
+
+def prepare_batch(windows, input_scaler, window_size, n_features):
+    """
+    Scale many windows in one vectorized call. Each window keeps its last
+    `window_size` rows, like prepare_input.
+
+    Returns (X, indices, errors): X is the (n_valid, window_size, n_features)
+    scaled batch, indices[k] the position of X[k] in `windows`, and errors maps the
+    position of every rejected window to the reason.
+    """
+    errors = {}
+    try:
+        # Fast path: a regular 3-D array
+        stacked = np.asarray(windows, dtype=np.float64)
+    except (ValueError, TypeError):
+        stacked = None
+    if stacked is not None and stacked.ndim == 3 and stacked.shape[1] >= window_size \
+            and stacked.shape[2] == n_features:
+        X = stacked[:, -window_size:]
+        indices = np.arange(len(X))
+    else:
+        rows, indices = [], []
+        for i, window in enumerate(windows):
+            try:
+                array = np.asarray(window, dtype=np.float64)
+            except (ValueError, TypeError):
+                errors[i] = "window must be a list of numeric rows"
+                continue
+            if array.ndim != 2 or array.shape[1] != n_features:
+                errors[i] = f"window rows must have {n_features} values"
+            elif array.shape[0] < window_size:
+                errors[i] = f"window needs at least {window_size} rows, got {array.shape[0]}"
+            else:
+                rows.append(array[-window_size:])
+                indices.append(i)
+        X = np.array(rows).reshape(-1, window_size, n_features)
+        indices = np.array(indices, dtype=np.int64)
+
+    finite = np.isfinite(X).all(axis=(1, 2))
+    if not finite.all():
+        for i in indices[~finite]:
+            errors[int(i)] = "window contains non-finite values"
+        X, indices = X[finite], indices[finite]
+
+    if not len(X):
+        return X, indices, errors
+    # Scale in place, on a copy when X still views the caller's (possibly read-only) array
+    if isinstance(windows, np.ndarray) and np.may_share_memory(X, windows):
+        X = np.array(X)
+    else:
+        X = np.ascontiguousarray(X)
+    input_scaler.transform(X.reshape(-1, n_features), copy=False)
+    return X, indices, errors
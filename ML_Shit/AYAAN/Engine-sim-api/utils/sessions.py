@@ -0,0 +1,103 @@
+# utils/sessions.py
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SessionStore:
+    """
+    Per-engine ring buffers of already-scaled input rows.
+
+    All buffers live in one preallocated (max_sessions, window_size, n_features)
+    array, so memory is fixed up front (50,000 sessions of 10 x 5 float32 rows is
+    10 MB). Sessions are kept in least-recently-used order: a new engine takes a free
+    slot or evicts the least recently used session, and sessions idle for longer than
+    `ttl` seconds are evicted on the next access to the store.
+    """
+
+    def __init__(self, window_size, n_features, max_sessions=50000, ttl=900.0):
+        self.window_size = window_size
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.rows = np.zeros((max_sessions, window_size, n_features), dtype=np.float32)
+        self.head = np.zeros(max_sessions, dtype=np.int64)  # next row to overwrite
+        self.filled = np.zeros(max_sessions, dtype=np.int64)
+        self._sessions = OrderedDict()  # engine id -> (slot, last seen), LRU first
+        self._free = list(range(max_sessions - 1, -1, -1))
+        self._order = np.arange(window_size)
+
+        # Statistics
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, engine_id):
+        return engine_id in self._sessions
+
+    def _expire(self, now):
+        sessions = self._sessions
+        while sessions:
+            engine_id, (slot, last_seen) = next(iter(sessions.items()))
+            if now - last_seen <= self.ttl:
+                break
+            del sessions[engine_id]
+            self._free.append(slot)
+            self.evicted_ttl += 1
+
+    def _slot(self, engine_id, now):
+        entry = self._sessions.pop(engine_id, None)
+        if entry is not None:
+            slot = entry[0]
+        else:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                _, (slot, _) = self._sessions.popitem(last=False)
+                self.evicted_lru += 1
+            self.head[slot] = 0
+            self.filled[slot] = 0
+            self.created += 1
+        self._sessions[engine_id] = (slot, now)
+        return slot
+
+    def push(self, engine_id, row_scaled):
+        """
+        Append one scaled row to the engine's window, creating the session if needed.
+        Returns the number of rows held (at most window_size).
+        """
+        now = time.monotonic()
+        self._expire(now)
+        slot = self._slot(engine_id, now)
+        head = self.head[slot]
+        self.rows[slot, head] = row_scaled
+        self.head[slot] = (head + 1) % self.window_size
+        self.filled[slot] = min(self.filled[slot] + 1, self.window_size)
+        return int(self.filled[slot])
+
+    def window(self, engine_id):
+        """Copy of the engine's window, oldest row first, shape (1, window_size, n_features)"""
+        slot = self._sessions[engine_id][0]
+        return self.rows[slot, (self.head[slot] + self._order) % self.window_size][None]
+
+    def drop(self, engine_id):
+        entry = self._sessions.pop(engine_id, None)
+        if entry is None:
+            return False
+        self._free.append(entry[0])
+        return True
+
+    def stats(self):
+        self._expire(time.monotonic())
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "buffer_bytes": self.rows.nbytes,
+            "created": self.created,
+            "evicted_lru": self.evicted_lru,
+            "evicted_ttl": self.evicted_ttl
+        }
@@ -5,6 +5,11 @@ import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 
+from engine_patterns import (
+    define_engine_schemas, generate_engine_samples, generate_driving_pattern, generate_bike_pattern,
+    generate_tractor_pattern, generate_generator_pattern, generate_throttle_pattern
+)
+
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
@@ -41,37 +46,7 @@ class EngineAnomalyDetector:
         Define min-max value ranges for different engine types.
         Based on real-world specifications and operating conditions.
         """
-        schemas = {
-            "car": {
-                "throttle_pos": (0, 100),      # Throttle position percentage
-                "rpm": (600, 6500),            # Idle to redline
-                "coolant_temp": (70, 110),     # Celsius - normal operating range
-                "pressure": (10, 45),          # Oil pressure (PSI)
-                "vibration": (0.1, 2.5)       # Vibration amplitude (m/s²)
-            },
-            "bike": {
-                "throttle_pos": (0, 100),
-                "rpm": (800, 12000),           # Higher RPM range for motorcycles
-                "coolant_temp": (65, 105),     # Slightly cooler operating temp
-                "pressure": (8, 40),           # Lower oil pressure
-                "vibration": (0.2, 4.0)       # Higher vibration due to single/twin cylinders
-            },
-            "tractor": {
-                "throttle_pos": (0, 100),
-                "rpm": (500, 2500),            # Lower RPM range for torque
-                "coolant_temp": (75, 115),     # Higher operating temperatures
-                "pressure": (15, 60),          # Higher oil pressure for heavy duty
-                "vibration": (0.3, 3.5)       # Moderate vibration
-            },
-            "generator": {
-                "throttle_pos": (20, 85),      # More stable throttle range
-                "rpm": (1500, 3600),          # Fixed or narrow RPM range
-                "coolant_temp": (80, 105),     # Consistent operating temp
-                "pressure": (12, 50),          # Steady pressure
-                "vibration": (0.1, 1.8)       # Lower vibration (stationary)
-            }
-        }
-        return schemas
+        return define_engine_schemas()
     
     def generate_engine_data(self, engine_type, hours=24, sampling_rate_sec=30):
         """
@@ -94,162 +69,31 @@ class EngineAnomalyDetector:
         # Generate time vector
         time_vec = np.arange(0, total_samples * sampling_rate_sec, sampling_rate_sec)
         
-        # Generate base patterns for each sensor
+        # Generate base patterns and sensor correlations (see engine_patterns.py)
         data = {"t_sec": time_vec}
-        
-        # Create realistic engine operation cycles
-        if engine_type == "car":
-            # Car: Variable driving patterns
-            base_rpm = self._generate_driving_pattern(total_samples, schema["rpm"])
-            base_throttle = self._generate_throttle_pattern(base_rpm, schema)
-        elif engine_type == "bike":
-            # Bike: More aggressive acceleration patterns
-            base_rpm = self._generate_bike_pattern(total_samples, schema["rpm"])
-            base_throttle = self._generate_throttle_pattern(base_rpm, schema)
-        elif engine_type == "tractor":
-            # Tractor: Steady work patterns with load variations
-            base_rpm = self._generate_tractor_pattern(total_samples, schema["rpm"])
-            base_throttle = self._generate_throttle_pattern(base_rpm, schema)
-        else:  # generator
-            # Generator: Very stable operation
-            base_rpm = self._generate_generator_pattern(total_samples, schema["rpm"])
-            base_throttle = self._generate_throttle_pattern(base_rpm, schema)
-        
-        # Add realistic correlations between sensors
-        data["rpm"] = base_rpm
-        data["throttle_pos"] = base_throttle
-        
-        # Coolant temperature: Correlated with RPM and load
-        temp_base = (schema["coolant_temp"][0] + schema["coolant_temp"][1]) / 2
-        temp_variation = (data["rpm"] - schema["rpm"][0]) / (schema["rpm"][1] - schema["rpm"][0]) * 20
-        data["coolant_temp"] = temp_base + temp_variation + np.random.normal(0, 2, total_samples)
-        data["coolant_temp"] = np.clip(data["coolant_temp"], *schema["coolant_temp"])
-        
-        # Oil pressure: Correlated with RPM
-        pressure_base = (schema["pressure"][0] + schema["pressure"][1]) / 2
-        pressure_variation = (data["rpm"] - schema["rpm"][0]) / (schema["rpm"][1] - schema["rpm"][0]) * 15
-        data["pressure"] = pressure_base + pressure_variation + np.random.normal(0, 1.5, total_samples)
-        data["pressure"] = np.clip(data["pressure"], *schema["pressure"])
-        
-        # Vibration: Correlated with RPM and throttle
-        vib_base = (schema["vibration"][0] + schema["vibration"][1]) / 2
-        rpm_factor = (data["rpm"] - schema["rpm"][0]) / (schema["rpm"][1] - schema["rpm"][0])
-        throttle_factor = data["throttle_pos"] / 100
-        vib_variation = (rpm_factor * 0.6 + throttle_factor * 0.4) * schema["vibration"][1]
-        data["vibration"] = vib_base + vib_variation + np.random.normal(0, 0.2, total_samples)
-        data["vibration"] = np.clip(data["vibration"], *schema["vibration"])
+        data.update(generate_engine_samples(schema, engine_type, total_samples))
         
         return pd.DataFrame(data)
     
     def _generate_driving_pattern(self, samples, rpm_range):
         """Generate realistic car driving RPM pattern."""
-        # Create cycles of acceleration, cruising, and deceleration
-        pattern = np.zeros(samples)
-        idle_rpm = rpm_range[0]
-        max_rpm = rpm_range[1]
-        
-        i = 0
-        while i < samples:
-            # Idle period
-            idle_duration = np.random.randint(30, 120)
-            pattern[i:i+idle_duration] = idle_rpm + np.random.normal(0, 50, idle_duration)
-            i += idle_duration
-            
-            # Acceleration phase
-            if i < samples:
-                accel_duration = np.random.randint(20, 60)
-                target_rpm = np.random.uniform(1500, max_rpm * 0.8)
-                pattern[i:i+accel_duration] = np.linspace(idle_rpm, target_rpm, accel_duration)
-                i += accel_duration
-            
-            # Cruising phase
-            if i < samples:
-                cruise_duration = np.random.randint(60, 200)
-                cruise_rpm = pattern[i-1] if i > 0 else target_rpm
-                pattern[i:i+cruise_duration] = cruise_rpm + np.random.normal(0, 100, cruise_duration)
-                i += cruise_duration
-        
-        return np.clip(pattern[:samples], *rpm_range)
+        return generate_driving_pattern(samples, rpm_range)
     
     def _generate_bike_pattern(self, samples, rpm_range):
         """Generate realistic motorcycle RPM pattern with more aggressive acceleration."""
-        pattern = np.zeros(samples)
-        idle_rpm = rpm_range[0]
-        max_rpm = rpm_range[1]
-        
-        i = 0
-        while i < samples:
-            # Idle/low RPM
-            low_duration = np.random.randint(20, 80)
-            pattern[i:i+low_duration] = idle_rpm + np.random.normal(0, 100, low_duration)
-            i += low_duration
-            
-            # Quick acceleration (bikes accelerate faster)
-            if i < samples:
-                accel_duration = np.random.randint(10, 30)
-                target_rpm = np.random.uniform(2000, max_rpm * 0.9)
-                pattern[i:i+accel_duration] = np.linspace(pattern[i-1], target_rpm, accel_duration)
-                i += accel_duration
-            
-            # High RPM cruising
-            if i < samples:
-                cruise_duration = np.random.randint(40, 100)
-                cruise_rpm = pattern[i-1] if i > 0 else target_rpm
-                pattern[i:i+cruise_duration] = cruise_rpm + np.random.normal(0, 200, cruise_duration)
-                i += cruise_duration
-        
-        return np.clip(pattern[:samples], *rpm_range)
+        return generate_bike_pattern(samples, rpm_range)
     
     def _generate_tractor_pattern(self, samples, rpm_range):
         """Generate realistic tractor RPM pattern with steady work cycles."""
-        pattern = np.zeros(samples)
-        idle_rpm = rpm_range[0]
-        work_rpm = rpm_range[1] * 0.7  # Tractors typically work at 70% max RPM
-        
-        i = 0
-        while i < samples:
-            # Idle period
-            idle_duration = np.random.randint(50, 150)
-            pattern[i:i+idle_duration] = idle_rpm + np.random.normal(0, 25, idle_duration)
-            i += idle_duration
-            
-            # Work period - steady RPM with load variations
-            if i < samples:
-                work_duration = np.random.randint(200, 500)
-                base_work_rpm = np.random.uniform(work_rpm * 0.8, work_rpm * 1.1)
-                # Add load variations (PTO, hydraulics, etc.)
-                load_variations = np.sin(np.linspace(0, 4*np.pi, work_duration)) * 200
-                pattern[i:i+work_duration] = base_work_rpm + load_variations + np.random.normal(0, 50, work_duration)
-                i += work_duration
-        
-        return np.clip(pattern[:samples], *rpm_range)
+        return generate_tractor_pattern(samples, rpm_range)
     
     def _generate_generator_pattern(self, samples, rpm_range):
         """Generate realistic generator RPM pattern - very stable."""
-        # Generators typically run at fixed RPM (1800 or 3600 for 60Hz)
-        target_rpm = 1800 if rpm_range[1] >= 1800 else rpm_range[1] * 0.9
-        
-        # Very stable with minimal variation
-        pattern = np.full(samples, target_rpm)
-        pattern += np.random.normal(0, 10, samples)  # Minimal variation
-        
-        return np.clip(pattern, *rpm_range)
+        return generate_generator_pattern(samples, rpm_range)
     
     def _generate_throttle_pattern(self, rpm_data, schema):
         """Generate throttle position based on RPM pattern."""
-        rpm_min, rpm_max = schema["rpm"]
-        throttle_min, throttle_max = schema["throttle_pos"]
-        
-        # Throttle roughly correlates with RPM but with some lag and nonlinearity
-        normalized_rpm = (rpm_data - rpm_min) / (rpm_max - rpm_min)
-        
-        # Nonlinear relationship (throttle curve)
-        throttle = throttle_min + (throttle_max - throttle_min) * (normalized_rpm ** 0.7)
-        
-        # Add noise and lag
-        throttle += np.random.normal(0, 5, len(rpm_data))
-        
-        return np.clip(throttle, throttle_min, throttle_max)
+        return generate_throttle_pattern(rpm_data, schema)
     
     def create_sequences(self, data, window_size=None):
         """
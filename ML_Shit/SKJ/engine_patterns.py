@@ -0,0 +1,218 @@
+"""
+Engine telemetry patterns shared by the anomaly detection system and the backend
+load generators. Kept free of TensorFlow and plotting imports so it can be used
+wherever synthetic engine data is needed.
+
+Every function takes an optional `rng` (a np.random.RandomState or the np.random
+module itself, the default), so callers can give each engine its own stream while
+the detector keeps its globally seeded behaviour.
+"""
+
+import numpy as np
+
+FEATURE_NAMES = ["throttle_pos", "rpm", "coolant_temp", "pressure", "vibration"]
+ENGINE_TYPES = ["car", "bike", "tractor", "generator"]
+
+
+def define_engine_schemas():
+    """
+    Define min-max value ranges for different engine types.
+    Based on real-world specifications and operating conditions.
+    """
+    schemas = {
+        "car": {
+            "throttle_pos": (0, 100),      # Throttle position percentage
+            "rpm": (600, 6500),            # Idle to redline
+            "coolant_temp": (70, 110),     # Celsius - normal operating range
+            "pressure": (10, 45),          # Oil pressure (PSI)
+            "vibration": (0.1, 2.5)       # Vibration amplitude (m/s²)
+        },
+        "bike": {
+            "throttle_pos": (0, 100),
+            "rpm": (800, 12000),           # Higher RPM range for motorcycles
+            "coolant_temp": (65, 105),     # Slightly cooler operating temp
+            "pressure": (8, 40),           # Lower oil pressure
+            "vibration": (0.2, 4.0)       # Higher vibration due to single/twin cylinders
+        },
+        "tractor": {
+            "throttle_pos": (0, 100),
+            "rpm": (500, 2500),            # Lower RPM range for torque
+            "coolant_temp": (75, 115),     # Higher operating temperatures
+            "pressure": (15, 60),          # Higher oil pressure for heavy duty
+            "vibration": (0.3, 3.5)       # Moderate vibration
+        },
+        "generator": {
+            "throttle_pos": (20, 85),      # More stable throttle range
+            "rpm": (1500, 3600),          # Fixed or narrow RPM range
+            "coolant_temp": (80, 105),     # Consistent operating temp
+            "pressure": (12, 50),          # Steady pressure
+            "vibration": (0.1, 1.8)       # Lower vibration (stationary)
+        }
+    }
+    return schemas
+
+
+def generate_driving_pattern(samples, rpm_range, rng=np.random):
+    """Generate realistic car driving RPM pattern."""
+    # Create cycles of acceleration, cruising, and deceleration
+    # (padded by the longest phase so the last cycle can run past the end)
+    pattern = np.zeros(samples + 200)
+    idle_rpm = rpm_range[0]
+    max_rpm = rpm_range[1]
+
+    i = 0
+    while i < samples:
+        # Idle period
+        idle_duration = rng.randint(30, 120)
+        pattern[i:i+idle_duration] = idle_rpm + rng.normal(0, 50, idle_duration)
+        i += idle_duration
+
+        # Acceleration phase
+        if i < samples:
+            accel_duration = rng.randint(20, 60)
+            target_rpm = rng.uniform(1500, max_rpm * 0.8)
+            pattern[i:i+accel_duration] = np.linspace(idle_rpm, target_rpm, accel_duration)
+            i += accel_duration
+
+        # Cruising phase
+        if i < samples:
+            cruise_duration = rng.randint(60, 200)
+            cruise_rpm = pattern[i-1] if i > 0 else target_rpm
+            pattern[i:i+cruise_duration] = cruise_rpm + rng.normal(0, 100, cruise_duration)
+            i += cruise_duration
+
+    return np.clip(pattern[:samples], *rpm_range)
+
+
+def generate_bike_pattern(samples, rpm_range, rng=np.random):
+    """Generate realistic motorcycle RPM pattern with more aggressive acceleration."""
+    pattern = np.zeros(samples + 100)  # padded by the longest phase
+    idle_rpm = rpm_range[0]
+    max_rpm = rpm_range[1]
+
+    i = 0
+    while i < samples:
+        # Idle/low RPM
+        low_duration = rng.randint(20, 80)
+        pattern[i:i+low_duration] = idle_rpm + rng.normal(0, 100, low_duration)
+        i += low_duration
+
+        # Quick acceleration (bikes accelerate faster)
+        if i < samples:
+            accel_duration = rng.randint(10, 30)
+            target_rpm = rng.uniform(2000, max_rpm * 0.9)
+            pattern[i:i+accel_duration] = np.linspace(pattern[i-1], target_rpm, accel_duration)
+            i += accel_duration
+
+        # High RPM cruising
+        if i < samples:
+            cruise_duration = rng.randint(40, 100)
+            cruise_rpm = pattern[i-1] if i > 0 else target_rpm
+            pattern[i:i+cruise_duration] = cruise_rpm + rng.normal(0, 200, cruise_duration)
+            i += cruise_duration
+
+    return np.clip(pattern[:samples], *rpm_range)
+
+
+def generate_tractor_pattern(samples, rpm_range, rng=np.random):
+    """Generate realistic tractor RPM pattern with steady work cycles."""
+    pattern = np.zeros(samples + 500)  # padded by the longest phase
+    idle_rpm = rpm_range[0]
+    work_rpm = rpm_range[1] * 0.7  # Tractors typically work at 70% max RPM
+
+    i = 0
+    while i < samples:
+        # Idle period
+        idle_duration = rng.randint(50, 150)
+        pattern[i:i+idle_duration] = idle_rpm + rng.normal(0, 25, idle_duration)
+        i += idle_duration
+
+        # Work period - steady RPM with load variations
+        if i < samples:
+            work_duration = rng.randint(200, 500)
+            base_work_rpm = rng.uniform(work_rpm * 0.8, work_rpm * 1.1)
+            # Add load variations (PTO, hydraulics, etc.)
+            load_variations = np.sin(np.linspace(0, 4*np.pi, work_duration)) * 200
+            pattern[i:i+work_duration] = base_work_rpm + load_variations + rng.normal(0, 50, work_duration)
+            i += work_duration
+
+    return np.clip(pattern[:samples], *rpm_range)
+
+
+def generate_generator_pattern(samples, rpm_range, rng=np.random):
+    """Generate realistic generator RPM pattern - very stable."""
+    # Generators typically run at fixed RPM (1800 or 3600 for 60Hz)
+    target_rpm = 1800 if rpm_range[1] >= 1800 else rpm_range[1] * 0.9
+
+    # Very stable with minimal variation
+    pattern = np.full(samples, target_rpm, dtype=float)
+    pattern += rng.normal(0, 10, samples)  # Minimal variation
+
+    return np.clip(pattern, *rpm_range)
+
+
+def generate_throttle_pattern(rpm_data, schema, rng=np.random):
+    """Generate throttle position based on RPM pattern."""
+    rpm_min, rpm_max = schema["rpm"]
+    throttle_min, throttle_max = schema["throttle_pos"]
+
+    # Throttle roughly correlates with RPM but with some lag and nonlinearity
+    normalized_rpm = (rpm_data - rpm_min) / (rpm_max - rpm_min)
+
+    # Nonlinear relationship (throttle curve)
+    throttle = throttle_min + (throttle_max - throttle_min) * (normalized_rpm ** 0.7)
+
+    # Add noise and lag
+    throttle += rng.normal(0, 5, len(rpm_data))
+
+    return np.clip(throttle, throttle_min, throttle_max)
+
+
+RPM_PATTERNS = {
+    "car": generate_driving_pattern,        # Variable driving patterns
+    "bike": generate_bike_pattern,          # More aggressive acceleration patterns
+    "tractor": generate_tractor_pattern,    # Steady work patterns with load variations
+    "generator": generate_generator_pattern  # Very stable operation
+}
+
+
+def generate_engine_samples(schema, engine_type, samples, rng=np.random):
+    """
+    Generate correlated sensor series for one engine.
+
+    Args:
+        schema (dict): Min-max ranges for the engine type (see define_engine_schemas)
+        engine_type (str): Type of engine ("car", "bike", "tractor", "generator")
+        samples (int): Number of samples to generate
+        rng: np.random.RandomState, or the np.random module for the global stream
+
+    Returns:
+        dict: Feature name -> np.array of length `samples`
+    """
+    base_rpm = RPM_PATTERNS[engine_type](samples, schema["rpm"], rng)
+    base_throttle = generate_throttle_pattern(base_rpm, schema, rng)
+
+    # Add realistic correlations between sensors
+    data = {"rpm": base_rpm, "throttle_pos": base_throttle}
+
+    # Coolant temperature: Correlated with RPM and load
+    temp_base = (schema["coolant_temp"][0] + schema["coolant_temp"][1]) / 2
+    temp_variation = (data["rpm"] - schema["rpm"][0]) / (schema["rpm"][1] - schema["rpm"][0]) * 20
+    data["coolant_temp"] = temp_base + temp_variation + rng.normal(0, 2, samples)
+    data["coolant_temp"] = np.clip(data["coolant_temp"], *schema["coolant_temp"])
+
+    # Oil pressure: Correlated with RPM
+    pressure_base = (schema["pressure"][0] + schema["pressure"][1]) / 2
+    pressure_variation = (data["rpm"] - schema["rpm"][0]) / (schema["rpm"][1] - schema["rpm"][0]) * 15
+    data["pressure"] = pressure_base + pressure_variation + rng.normal(0, 1.5, samples)
+    data["pressure"] = np.clip(data["pressure"], *schema["pressure"])
+
+    # Vibration: Correlated with RPM and throttle
+    vib_base = (schema["vibration"][0] + schema["vibration"][1]) / 2
+    rpm_factor = (data["rpm"] - schema["rpm"][0]) / (schema["rpm"][1] - schema["rpm"][0])
+    throttle_factor = data["throttle_pos"] / 100
+    vib_variation = (rpm_factor * 0.6 + throttle_factor * 0.4) * schema["vibration"][1]
+    data["vibration"] = vib_base + vib_variation + rng.normal(0, 0.2, samples)
+    data["vibration"] = np.clip(data["vibration"], *schema["vibration"])
+
+    return data
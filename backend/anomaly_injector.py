@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Anomaly Injection Scheduler
+Seeded, scheduled anomaly injection on top of the sensor engine's output, with a
+ground-truth label stream so anomaly detectors can be scored (precision / recall /
+time-to-detect) against large simulated datasets.
+
+Events start as a Poisson process over simulated ticks. Each event has a kind, a
+start tick, a duration and a magnitude scaled by the sensor's variance, and is
+written as one label row per affected sensor when it starts:
+
+  spike       short positive excursion (+1.5..3 x variance)
+  drop        short negative excursion (-1..2 x variance)
+  noise       burst of extra Gaussian noise (0.5..1 x variance standard deviation)
+  stuck       value frozen at its reading when the event started
+  drift       slow linear ramp to +/-1..3 x variance over the event, then recovery
+  correlated  device-wide fault: every sensor on the device ramps towards its
+              unhealthy side (see device_status.STATUS_RULES) at the same time
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from device_status import DeviceStatusRollup
+
+# kind -> (min ticks, max ticks, min magnitude, max magnitude); magnitudes are in
+# multiples of the sensor's variance
+ANOMALY_PROFILES: Dict[str, Tuple[int, int, float, float]] = {
+    'spike': (1, 1, 1.5, 3.0),
+    'drop': (1, 5, 1.0, 2.0),
+    'noise': (10, 60, 0.5, 1.0),
+    'stuck': (30, 600, 0.0, 0.0),
+    'drift': (600, 3600, 1.0, 3.0),
+    'correlated': (60, 600, 1.0, 2.0)
+}
+
+ANOMALY_KINDS = tuple(ANOMALY_PROFILES)
+
+LABEL_FIELDS = ('event_id', 'kind', 'sensor_id', 'device_id', 'start_tick', 'end_tick',
+                'start_ms', 'end_ms', 'magnitude')
+
+_SPIKE, _DROP, _NOISE, _STUCK, _DRIFT, _CORRELATED = range(len(ANOMALY_KINDS))
+
+_EVENT_FIELDS = ('event_id', 'kind', 'sensor', 'start', 'end', 'magnitude', 'held')
+
+
+def _expand_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + length) for every pair, without a Python loop"""
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + (np.arange(total) - offsets)
+
+
+class AnomalyInjector:
+    """
+    Schedules anomaly events for a catalog and applies them in place to engine output,
+    one tick (SensorEngine.step) or a block of ticks (SensorEngine.step_block) at a time.
+
+    `rate` is the expected number of events per sensor per simulated day, `interval`
+    the simulated seconds per tick. Events are drawn from their own generator, so the
+    schedule depends only on the seed, rate and kinds.
+    """
+
+    def __init__(self, catalog, rate: float, interval: float = 1.0, kinds: Sequence[str] = ANOMALY_KINDS,
+                 seed: Optional[int] = None):
+        unknown = [kind for kind in kinds if kind not in ANOMALY_PROFILES]
+        if unknown:
+            raise ValueError(f"Unknown anomaly kinds {unknown}, choose from {ANOMALY_KINDS}")
+        if rate < 0:
+            raise ValueError("rate must not be negative")
+
+        self.catalog = catalog
+        self.rate = rate
+        self.interval = interval
+        self.event_probability = rate * interval / 86400  # per sensor per tick
+        self.kind_codes = np.array([ANOMALY_KINDS.index(kind) for kind in kinds], dtype=np.int8)
+        self.rng = np.random.default_rng(None if seed is None else (seed, 34))
+
+        profiles = np.array([ANOMALY_PROFILES[kind] for kind in ANOMALY_KINDS])
+        self.min_ticks = profiles[:, 0].astype(np.int64)
+        self.max_ticks = profiles[:, 1].astype(np.int64)
+        self.min_magnitude = profiles[:, 2]
+        self.max_magnitude = profiles[:, 3]
+
+        self.variance = catalog.variance.astype(np.float64)
+        self.min_value = catalog.min_value
+        self.max_value = catalog.max_value
+        # Direction in which each sensor becomes unhealthy (+1 rising, -1 falling)
+        self.unhealthy_sign = DeviceStatusRollup(catalog).sign
+
+        # Scheduled events that have not finished yet, one row per (event, sensor)
+        self.events = {name: np.empty(0, dtype=dtype) for name, dtype in zip(
+            _EVENT_FIELDS, (np.int64, np.int8, np.intp, np.int64, np.int64, np.float64, np.float32))}
+        # Rows started by the most recent apply(), for labelling and logging
+        self.started = self.events
+        self.next_event_id = 0
+        self.scheduled_until = None
+
+    def _schedule(self, start_tick: int, end_tick: int) -> Dict[str, np.ndarray]:
+        """Draw the events starting in [start_tick, end_tick)"""
+        rng = self.rng
+        catalog = self.catalog
+        n = catalog.size
+        ticks = end_tick - start_tick
+        count = rng.poisson(self.event_probability * n * ticks) if self.kind_codes.size else 0
+
+        start = np.sort(start_tick + rng.integers(0, ticks, size=count))
+        sensor = rng.integers(0, n, size=count)
+        kind = self.kind_codes[rng.integers(0, self.kind_codes.size, size=count)]
+        duration = rng.integers(self.min_ticks[kind], self.max_ticks[kind] + 1)
+        event_id = self.next_event_id + np.arange(count)
+        self.next_event_id += count
+
+        # Correlated faults cover every sensor of the chosen sensor's device
+        sensors_per_event = np.ones(count, dtype=np.int64)
+        correlated = kind == _CORRELATED
+        device = catalog.device_index[sensor[correlated]]
+        first_sensor = catalog.device_offsets[device]
+        sensors_per_event[correlated] = catalog.device_offsets[device + 1] - first_sensor
+        sensor[correlated] = first_sensor
+
+        rows = np.repeat(np.arange(count), sensors_per_event)
+        sensor = _expand_ranges(sensor, sensors_per_event)
+        kind = kind[rows]
+
+        magnitude = rng.uniform(self.min_magnitude[kind], self.max_magnitude[kind]) * self.variance[sensor]
+        magnitude[kind == _DROP] *= -1
+        drift = kind == _DRIFT
+        magnitude[drift] *= rng.choice(np.array([-1.0, 1.0]), size=int(drift.sum()))
+        magnitude[kind == _CORRELATED] *= self.unhealthy_sign[sensor[kind == _CORRELATED]]
+
+        return {'event_id': event_id[rows], 'kind': kind, 'sensor': sensor, 'start': start[rows],
+                'end': start[rows] + duration[rows], 'magnitude': magnitude,
+                'held': np.full(rows.size, np.nan, dtype=np.float32)}
+
+    def apply(self, values: np.ndarray, start_tick: int) -> np.ndarray:
+        """
+        Inject the events active during the ticks covered by `values` (one tick of
+        readings, or a (ticks, sensors) block starting at `start_tick`), in place.
+        Ticks must be applied in order; returns `values`.
+        """
+        block = values.reshape(-1, self.catalog.size)
+        end_tick = start_tick + block.shape[0]
+        if self.scheduled_until is not None and start_tick < self.scheduled_until:
+            raise ValueError(f"Tick {start_tick} was already scheduled (next tick is {self.scheduled_until})")
+
+        events = self.events
+        live = events['end'] > start_tick
+        self.started = self._schedule(start_tick, end_tick)
+        self.scheduled_until = end_tick
+        events = self.events = {name: np.concatenate((events[name][live], self.started[name]))
+                                for name in _EVENT_FIELDS}
+        if not events['start'].size:
+            return values
+
+        # Every (tick, sensor) cell an event covers in this block
+        first = np.maximum(events['start'], start_tick) - start_tick
+        lengths = np.minimum(events['end'], end_tick) - start_tick - first
+        owner = np.repeat(np.arange(lengths.size), lengths)
+        rows = _expand_ranges(first, lengths)
+        cols = events['sensor'][owner]
+        kind = events['kind'][owner]
+
+        # Stuck sensors hold the reading from the tick their event started
+        held = events['held']
+        holding = (events['kind'] == _STUCK) & np.isnan(held)
+        held[holding] = block[events['start'][holding] - start_tick, events['sensor'][holding]]
+
+        # Fraction of the event elapsed at each covered tick, for the ramps
+        duration = (events['end'] - events['start'])[owner]
+        progress = (start_tick + rows - events['start'][owner] + 1) / duration
+        shape = np.ones(rows.size)
+        shape[kind == _DRIFT] = progress[kind == _DRIFT]
+        ramp = kind == _CORRELATED
+        shape[ramp] = np.minimum(1.0, progress[ramp] * 10)  # onset over the first 10%
+        noisy = kind == _NOISE
+        shape[noisy] = self.rng.standard_normal(int(noisy.sum()))
+
+        # Overlapping events on one cell add up: sum per distinct cell before adding
+        additive = kind != _STUCK
+        cells, position = np.unique(rows[additive] * block.shape[1] + cols[additive], return_inverse=True)
+        delta = np.bincount(position, weights=(events['magnitude'][owner] * shape)[additive], minlength=cells.size)
+        flat = block.reshape(-1)
+        flat[cells] += delta.astype(block.dtype)
+        stuck = ~additive
+        block[rows[stuck], cols[stuck]] = held[owner[stuck]]
+
+        touched = np.clip(block[rows, cols], self.min_value[cols], self.max_value[cols])
+        block[rows, cols] = np.round(touched, 2)
+        return values
+
+    def describe_started(self) -> Iterable[Tuple[str, str, int, int]]:
+        """(kind, sensor id, start tick, end tick) for each label row started by the last apply()"""
+        started = self.started
+        for kind, sensor, start, end in zip(started['kind'].tolist(), started['sensor'].tolist(),
+                                            started['start'].tolist(), started['end'].tolist()):
+            yield ANOMALY_KINDS[kind], self.catalog.sensor_id(sensor), start, end
+
+
+class GroundTruthWriter:
+    """
+    Appends label rows for started events to a CSV or NDJSON file (chosen by suffix).
+    Tick numbers are mapped to epoch milliseconds with the origin given on each write.
+    """
+
+    def __init__(self, path: str, catalog):
+        self.path = Path(path)
+        self.catalog = catalog
+        self.rows = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', newline='')
+        self._csv = None
+        if self.path.suffix.lower() == '.csv':
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(LABEL_FIELDS)
+
+    def write(self, injector: AnomalyInjector, origin_tick: int, origin_ms: int, interval_ms: int):
+        started = injector.started
+        if not started['start'].size:
+            return
+        catalog = self.catalog
+        device_ids = catalog.device_ids
+        start_ms = origin_ms + (started['start'] - origin_tick) * interval_ms
+        end_ms = origin_ms + (started['end'] - origin_tick) * interval_ms
+        for event_id, kind, sensor, start, end, first_ms, last_ms, magnitude in zip(
+                started['event_id'].tolist(), started['kind'].tolist(), started['sensor'].tolist(),
+                started['start'].tolist(), started['end'].tolist(), start_ms.tolist(), end_ms.tolist(),
+                np.round(started['magnitude'], 4).tolist()):
+            row = (event_id, ANOMALY_KINDS[kind], catalog.sensor_id(sensor),
+                   device_ids[catalog.device_index[sensor]], start, end, first_ms, last_ms, magnitude)
+            if self._csv is not None:
+                self._csv.writerow(row)
+            else:
+                self._file.write(json.dumps(dict(zip(LABEL_FIELDS, row)), separators=(',', ':')) + '\n')
+        self.rows += started['start'].size
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_labels(path: str) -> Dict[str, np.ndarray]:
+    """Label columns from a GroundTruthWriter CSV or NDJSON file"""
+    with open(path, newline='') as f:
+        if Path(path).suffix.lower() == '.csv':
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+    columns = {name: np.array([record[name] for record in records]) for name in LABEL_FIELDS}
+    for name in ('event_id', 'start_tick', 'end_tick', 'start_ms', 'end_ms'):
+        columns[name] = columns[name].astype(np.int64)
+    return columns
+
+
+def score_detections(labels: Dict[str, np.ndarray], detections: Iterable[Tuple[str, int]],
+                     tolerance_ms: int = 0) -> dict:
+    """
+    Score detector output against ground truth.
+
+    `detections` are (sensor_id, timestamp_ms) pairs. A detection is a true positive
+    when it falls inside a labelled window for its sensor (extended by `tolerance_ms`);
+    an event is detected when any of its sensors is, and its time-to-detect is the
+    first such detection minus the event start.
+    """
+    by_sensor: Dict[str, list] = {}
+    for sensor_id, timestamp in detections:
+        by_sensor.setdefault(sensor_id, []).append(timestamp)
+    detection_times = {sensor_id: np.sort(np.array(times, dtype=np.int64)) for sensor_id, times in by_sensor.items()}
+    true_detections = {sensor_id: np.zeros(times.size, dtype=bool) for sensor_id, times in detection_times.items()}
+
+    first_detection: Dict[int, int] = {}
+    event_start: Dict[int, int] = {}
+    event_kind: Dict[int, str] = {}
+    for event_id, kind, sensor_id, start, end in zip(labels['event_id'].tolist(), labels['kind'].tolist(),
+                                                     labels['sensor_id'].tolist(), labels['start_ms'].tolist(),
+                                                     labels['end_ms'].tolist()):
+        event_start[event_id] = start
+        event_kind[event_id] = kind
+        times = detection_times.get(sensor_id)
+        if times is None:
+            continue
+        low, high = np.searchsorted(times, [start, end + tolerance_ms])
+        if high > low:
+            true_detections[sensor_id][low:high] = True
+            first = int(times[low])
+            if event_id not in first_detection or first < first_detection[event_id]:
+                first_detection[event_id] = first
+
+    total_detections = sum(times.size for times in detection_times.values())
+    true_positive = sum(int(hits.sum()) for hits in true_detections.values())
+    precision = true_positive / total_detections if total_detections else 0.0
+    recall = len(first_detection) / len(event_start) if event_start else 0.0
+    delays = np.array([first_detection[e] - event_start[e] for e in first_detection], dtype=np.float64)
+
+    per_kind = {}
+    for kind in sorted(set(event_kind.values())):
+        events = [e for e, k in event_kind.items() if k == kind]
+        per_kind[kind] = round(sum(e in first_detection for e in events) / len(events), 4)
+
+    summary = {
+        'events': len(event_start),
+        'detected_events': len(first_detection),
+        'recall': round(recall, 4),
+        'detections': total_detections,
+        'true_detections': true_positive,
+        'precision': round(precision, 4),
+        'f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        'recall_by_kind': per_kind
+    }
+    if delays.size:
+        p50, p90 = np.percentile(delays, [50, 90]).tolist()
+        summary.update({'time_to_detect_p50_ms': p50, 'time_to_detect_p90_ms': p90,
+                        'time_to_detect_mean_ms': float(delays.mean())})
+    return summary
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+ML API Benchmark Suite
+Closed-loop benchmark of the Engine-sim and Anomaly-Detection APIs: every endpoint,
+across batch sizes, concurrency levels and payload formats, both in-process (through
+an ASGI transport, no sockets) and against a locally started uvicorn server.
+
+    python api_benchmark.py [--apis engine-sim,anomaly] [--modes asgi,server]
+                            [--backends numpy,keras] [--output api_benchmark.json]
+
+Each case sends up to --requests requests (or runs for --max-seconds) from
+`concurrency` clients, after a short warm-up, and reports p50/p95/p99 latency,
+requests/s, predictions/s and CPU-seconds per prediction. In-process CPU time is
+the whole benchmark process (client and app); server CPU time is the server
+process's alone. Payloads come from a fixed seed, so runs on the same commit and
+machine are comparable (engine_telemetry.py is the open-loop load generator).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # only needed to drive the APIs
+    httpx = None
+
+from engine_telemetry import API_FEATURE_RANGES, WINDOW_SIZE
+
+API_ROOT = Path(__file__).resolve().parent.parent / 'ML_Shit' / 'AYAAN'
+API_DIRS = {'engine-sim': API_ROOT / 'Engine-sim-api', 'anomaly': API_ROOT / 'Anomaly-Detection-Api'}
+APIS = tuple(API_DIRS)
+MODES = ('asgi', 'server')
+FORMATS = ('json', 'float32', 'npy')
+
+SWEEP_POINTS = 50  # throttle values per /predict/sweep request
+SIMULATE_HORIZON = 60  # steps per /simulate request
+SESSION_ENGINES = 64  # engines cycled through by the session readings case
+
+
+class Case(NamedTuple):
+    api: str
+    endpoint: str
+    format: str
+    batch: int  # windows (or readings) per request
+    predictions: int  # model outputs per request
+    concurrency: int
+    request: Callable[[int], Tuple[str, bytes, Dict[str, str]]]  # request number -> path, body, headers
+    setup: Optional[Callable] = None  # async fn(client) run before the warm-up
+
+
+def _body(array: np.ndarray, fmt: str, key: str) -> Tuple[bytes, Dict[str, str]]:
+    if fmt == 'json':
+        return json.dumps({key: np.round(array, 4).tolist()}).encode(), {'content-type': 'application/json'}
+    if fmt == 'float32':
+        return array.astype(np.float32).tobytes(), {'content-type': 'application/octet-stream',
+                                                    'x-shape': ','.join(map(str, array.shape))}
+    stream = io.BytesIO()
+    np.save(stream, array.astype(np.float32))
+    return stream.getvalue(), {'content-type': 'application/x-npy'}
+
+
+def _json(payload: dict) -> Tuple[bytes, Dict[str, str]]:
+    return json.dumps(payload).encode(), {'content-type': 'application/json'}
+
+
+def build_cases(api: str, args, seed: int) -> List[Case]:
+    rng = np.random.default_rng(seed)
+    low, high = np.array(list(API_FEATURE_RANGES.values())).T
+    features = list(API_FEATURE_RANGES)
+
+    def windows(n: int) -> np.ndarray:
+        return low + rng.random((n, WINDOW_SIZE, len(low))) * (high - low)
+
+    def fixed(path: str, body: bytes, headers: Dict[str, str]):
+        return lambda i: (path, body, headers)
+
+    cases = []
+    if api == 'anomaly':
+        body, headers = _json(dict(zip(features, windows(1)[0, -1].round(4).tolist())))
+        for concurrency in args.concurrency:
+            cases.append(Case(api, '/predict', 'json', 1, 1, concurrency, fixed('/predict', body, headers)))
+            cases.append(Case(api, '/diagnostics', 'json', 1, 0, concurrency, fixed('/diagnostics', body, headers)))
+        return cases
+
+    window = windows(1)[0]
+    for fmt in args.formats:
+        body, headers = _body(window, fmt, 'window')
+        for concurrency in args.concurrency:
+            cases.append(Case(api, '/predict', fmt, 1, 1, concurrency, fixed('/predict', body, headers)))
+    for fmt in args.formats:
+        for batch in args.batch_sizes:
+            body, headers = _body(windows(batch), fmt, 'windows')
+            for concurrency in args.batch_concurrency:
+                cases.append(Case(api, '/predict/batch', fmt, batch, batch, concurrency,
+                                  fixed('/predict/batch', body, headers)))
+
+    body, headers = _json({'window': window.round(4).tolist(), 'grid': {'start': 0, 'stop': 100,
+                                                                         'num': SWEEP_POINTS}})
+    cases.append(Case(api, '/predict/sweep', 'json', SWEEP_POINTS, SWEEP_POINTS, 1,
+                      fixed('/predict/sweep', body, headers)))
+    body, headers = _json({'window': window.round(4).tolist(), 'horizon': SIMULATE_HORIZON})
+    cases.append(Case(api, '/simulate', 'json', 1, SIMULATE_HORIZON, 1, fixed('/simulate', body, headers)))
+
+    # Session readings: every engine's window is filled first, so each reading predicts
+    readings = [_json(dict(zip(features, row))) for row in windows(SESSION_ENGINES)[:, -1].round(4).tolist()]
+
+    def reading(i: int):
+        engine = i % SESSION_ENGINES
+        return (f'/sessions/bench-{engine}/readings', *readings[engine])
+
+    async def fill_sessions(client):
+        for engine in range(SESSION_ENGINES):
+            for _ in range(WINDOW_SIZE):
+                path, body, headers = reading(engine)
+                await client.post(path, content=body, headers=headers)
+
+    for concurrency in args.concurrency:
+        cases.append(Case(api, '/sessions/{engine_id}/readings', 'json', 1, 1, concurrency, reading,
+                          setup=fill_sessions))
+    return cases
+
+
+async def run_case(client, case: Case, requests: int, max_seconds: float, warmup: int,
+                   cpu_seconds: Callable[[], Optional[float]]) -> dict:
+    if case.setup:
+        await case.setup(client)
+    for i in range(warmup):
+        path, body, headers = case.request(i)
+        await client.post(path, content=body, headers=headers)
+
+    latencies: List[float] = []
+    status: Dict[str, int] = {}
+    sent = 0
+    started = time.perf_counter()
+    deadline = started + max_seconds
+
+    async def worker():
+        nonlocal sent
+        while sent < requests and time.perf_counter() < deadline:
+            path, body, headers = case.request(sent)
+            sent += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers=headers)
+                code = str(response.status_code)
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            status[code] = status.get(code, 0) + 1
+
+    cpu_start = cpu_seconds()
+    await asyncio.gather(*(worker() for _ in range(case.concurrency)))
+    elapsed = time.perf_counter() - started
+    cpu_end = cpu_seconds()
+
+    ok = status.get('200', 0)
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist() if len(values) else (0.0, 0.0, 0.0)
+    cpu = None if cpu_start is None or cpu_end is None else cpu_end - cpu_start
+    predictions = ok * case.predictions
+    return {
+        'api': case.api,
+        'endpoint': case.endpoint,
+        'format': case.format,
+        'batch': case.batch,
+        'concurrency': case.concurrency,
+        'requests': len(latencies),
+        'errors': len(latencies) - ok,
+        'status': status,
+        'elapsed_s': round(elapsed, 3),
+        'req_per_s': round(ok / elapsed, 2) if elapsed else 0.0,
+        'predictions_per_s': round(predictions / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3),
+                       'mean': round(float(values.mean()), 3) if len(values) else 0.0,
+                       'max': round(float(values.max()), 3) if len(values) else 0.0},
+        'cpu_seconds': round(cpu, 3) if cpu is not None else None,
+        'cpu_s_per_prediction': round(cpu / predictions, 6) if cpu is not None and predictions else None
+    }
+
+
+async def run_cases(client, cases: List[Case], args, cpu_seconds, label: str) -> List[dict]:
+    results = []
+    for case in cases:
+        result = await run_case(client, case, args.batch_requests if case.batch > 1 else args.requests,
+                                args.max_seconds, args.warmup, cpu_seconds)
+        print(f"  {label:22s} {case.endpoint:31s} {case.format:7s} batch={case.batch:<5d} "
+              f"c={case.concurrency:<3d} p50={result['latency_ms']['p50']:9.2f}ms "
+              f"p99={result['latency_ms']['p99']:9.2f}ms {result['req_per_s']:9.1f} req/s "
+              f"errors={result['errors']}", file=sys.stderr)
+        results.append(result)
+    return results
+
+
+def run_in_process(api: str, args) -> List[dict]:
+    """Benchmark one API through an ASGI transport, in this process"""
+    backend = os.environ.get('MODEL_BACKEND', 'keras') if api == 'engine-sim' else 'keras'
+    os.chdir(API_DIRS[api])  # the APIs load their artifacts relative to the cwd
+    sys.path.insert(0, str(API_DIRS[api]))
+    with contextlib.redirect_stdout(sys.stderr):
+        import main as app_module
+        # The ASGI transport doesn't run the lifespan, so load and warm up here
+        app_module.lifecycle.run()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=args.timeout) as client:
+            # The Engine-sim API logs every prediction
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                return await run_cases(client, build_cases(api, args, args.seed), args, time.process_time,
+                                       f"{api}/{backend}/asgi")
+    return asyncio.run(run())
+
+
+def _process_cpu(pid: int) -> Optional[float]:
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')  # utime + stime
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_against_server(api: str, backend: Optional[str], args) -> List[dict]:
+    """Start the API under uvicorn on a free local port and benchmark it over HTTP"""
+    port = _free_port()
+    env = dict(os.environ, **({'MODEL_BACKEND': backend} if backend else {}))
+    with tempfile.TemporaryFile() as log:
+        server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port),
+                                   '--log-level', 'warning'], cwd=API_DIRS[api], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=log)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            deadline = time.monotonic() + args.startup_timeout
+            while True:
+                if server.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"{api} server exited: {log.read().decode(errors='replace')[-2000:]}")
+                try:
+                    if httpx.get(f'{base_url}/readyz', timeout=1).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{api} server not ready after {args.startup_timeout:g}s")
+                time.sleep(0.2)
+
+            async def run():
+                limits = httpx.Limits(max_connections=max(args.concurrency + args.batch_concurrency))
+                async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+                    return await run_cases(client, build_cases(api, args, args.seed), args,
+                                           lambda: _process_cpu(server.pid), f"{api}/{backend or 'keras'}/server")
+            return asyncio.run(run())
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def _metadata(args) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': {k: v for k, v in vars(args).items() if k not in ('child', 'output')}
+    }
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _names(value: str) -> List[str]:
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the ML prediction APIs")
+    parser.add_argument('--apis', type=_names, default=list(APIS), help=f"Comma-separated: {', '.join(APIS)}")
+    parser.add_argument('--modes', type=_names, default=list(MODES), help=f"Comma-separated: {', '.join(MODES)}")
+    parser.add_argument('--backends', type=_names, default=['numpy', 'keras'],
+                        help="Engine-sim MODEL_BACKENDs to compare")
+    parser.add_argument('--formats', type=_names, default=list(FORMATS),
+                        help=f"Engine-sim payload formats: {', '.join(FORMATS)}")
+    parser.add_argument('--concurrency', type=_ints, default=[1, 16, 64],
+                        help="Concurrent clients for single-prediction cases")
+    parser.add_argument('--batch-sizes', type=_ints, default=[32, 256, 1000], help="Windows per /predict/batch")
+    parser.add_argument('--batch-concurrency', type=_ints, default=[1, 4],
+                        help="Concurrent clients for /predict/batch")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per single-prediction case")
+    parser.add_argument('--batch-requests', type=int, default=50, help="Requests per multi-prediction case")
+    parser.add_argument('--max-seconds', type=float, default=15.0, help="Time limit per case")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests before each case")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument('--startup-timeout', type=float, default=180.0, help="Seconds to wait for /readyz")
+    parser.add_argument('--seed', type=int, default=0, help="Payload random seed")
+    parser.add_argument('--output', default='api_benchmark.json', help="JSON results file")
+    parser.add_argument('--child', help=argparse.SUPPRESS)  # internal: in-process run of one API
+    args = parser.parse_args()
+
+    if httpx is None:
+        parser.error("httpx is required: pip install httpx")
+    for name, chosen, allowed in [('api', args.apis, APIS), ('mode', args.modes, MODES),
+                                  ('format', args.formats, FORMATS)]:
+        unknown = set(chosen) - set(allowed)
+        if unknown:
+            parser.error(f"Unknown {name} {sorted(unknown)}, choose from {list(allowed)}")
+
+    if args.child:
+        with open(args.output, 'w') as f:
+            json.dump(run_in_process(args.child, args), f)
+        return
+
+    output = Path(args.output).resolve()
+    results = []
+    for api in args.apis:
+        # The Anomaly-Detection API has a single (Keras) backend
+        for backend in (args.backends if api == 'engine-sim' else [None]):
+            for mode in args.modes:
+                print(f"{api} / {backend or 'keras'} / {mode}", file=sys.stderr)
+                if mode == 'asgi':
+                    # Each API gets a fresh process: both are a top-level `main` module
+                    # loading artifacts from their own directory
+                    with tempfile.NamedTemporaryFile(suffix='.json') as tmp:
+                        env = dict(os.environ, **({'MODEL_BACKEND': backend} if backend else {}))
+                        subprocess.run([sys.executable, __file__, *sys.argv[1:], '--child', api,
+                                        '--output', tmp.name], check=True, env=env)
+                        with open(tmp.name) as f:
+                            entries = json.load(f)
+                else:
+                    entries = run_against_server(api, backend, args)
+                for entry in entries:
+                    entry.update(backend=backend or 'keras', mode=mode)
+                results.extend(entries)
+
+    with open(output, 'w') as f:
+        json.dump({'metadata': _metadata(args), 'results': results}, f, indent=2)
+    print(f"{len(results)} results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Backfill Mode
+Simulates SCADA history as fast as possible (no wall-clock pacing) and streams it into
+date-partitioned Parquet or CSV files for training the anomaly detection models.
+
+Memory is bounded by the chunk size: each chunk of ticks is generated in one
+vectorized block and written as one row group by a writer thread while the next
+chunk is generated, so at most two chunks are alive at once.
+"""
+
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from anomaly_injector import GroundTruthWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for backfill
+    pa = None
+
+FORMATS = ('parquet', 'csv')
+LAYOUTS = ('wide', 'long')
+
+# Default number of values generated and written per chunk (~16 MB of float32)
+DEFAULT_CHUNK_VALUES = 4_000_000
+
+MS_PER_DAY = 86_400_000
+
+# Shortest backfill tick in seconds: timestamps have millisecond resolution
+MIN_INTERVAL = 0.001
+
+
+def _open_writer(path: Path, schema, fmt: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'parquet':
+        return pq.ParquetWriter(str(path), schema, compression='zstd')
+    return pa_csv.CSVWriter(str(path), schema)
+
+
+def write_sensor_index(catalog, output_dir: Path):
+    """Write _sensors.csv (skipped by dataset discovery) describing every column / sensor index in the dataset"""
+    with open(output_dir / '_sensors.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['index', 'sensor_id', 'device_id', 'sensor_type', 'unit',
+                         'min_value', 'max_value'])
+        device_ids = catalog.device_ids
+        for index, sensor_id in enumerate(catalog.sensor_ids):
+            writer.writerow([index, sensor_id, device_ids[catalog.device_index[index]],
+                             catalog.sensor_type(index), catalog.sensor_unit(index),
+                             float(catalog.min_value[index]), float(catalog.max_value[index])])
+
+
+def run_backfill(generator, days: float, output_dir: str, fmt: str = 'parquet', layout: str = 'wide',
+                 interval: float = 1.0, chunk_values: int = DEFAULT_CHUNK_VALUES,
+                 start: Optional[datetime] = None) -> dict:
+    """
+    Generate `days` of readings at one sample per `interval` seconds of simulated time.
+
+    wide layout: one row per tick, a `timestamp` column plus one float32 column per sensor
+                 (best up to a few thousand sensors).
+    long layout: one row per reading with `timestamp`, dictionary-encoded `sensor_id`, `value`.
+    Files are partitioned by UTC day as <output_dir>/date=YYYY-MM-DD/part-0.<fmt>.
+    With an anomaly injector attached to the generator, ground-truth labels are written
+    to <output_dir>/_labels.csv.
+    """
+    if pa is None:
+        raise RuntimeError("Backfill requires pyarrow (pip install pyarrow)")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', choose from {FORMATS}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}', choose from {LAYOUTS}")
+    if interval < MIN_INTERVAL:
+        raise ValueError(f"Backfill interval must be at least {MIN_INTERVAL} s, got {interval}")
+
+    catalog = generator.catalog
+    engine = generator.engine
+    n = catalog.size
+    interval_ms = int(round(interval * 1000))
+    total_ticks = int(days * 86400 / interval)
+    chunk_ticks = max(1, chunk_values // n)
+
+    if start is None:
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=days)
+    start_ms = int(start.timestamp() * 1000)
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    write_sensor_index(catalog, output)
+    injector = generator.injector
+    labels = GroundTruthWriter(output / '_labels.csv', catalog) if injector is not None else None
+
+    sensor_ids = catalog.sensor_ids
+    if layout == 'wide':
+        schema = pa.schema([('timestamp', pa.int64())] + [(sensor_id, pa.float32()) for sensor_id in sensor_ids])
+    else:
+        schema = pa.schema([('timestamp', pa.int64()),
+                            ('sensor_id', pa.dictionary(pa.int32(), pa.string())),
+                            ('value', pa.float32())])
+        dictionary = pa.array(sensor_ids, type=pa.string())
+        sensor_column = np.arange(n, dtype=np.int32)
+
+    print(f"Backfilling {days} days ({total_ticks} ticks x {n} sensors) into {output} as {layout} {fmt}")
+    started = time.perf_counter()
+    writer = None
+    partition_day = None
+    tick = 0
+    rows_written = 0
+    io = ThreadPoolExecutor(max_workers=1)
+    pending = None
+
+    try:
+        while tick < total_ticks:
+            timestamp = start_ms + tick * interval_ms
+            day = timestamp // MS_PER_DAY
+
+            # Chunks never straddle a partition boundary
+            if day != partition_day:
+                if writer is not None:
+                    io.submit(writer.close).result()
+                partition_day = day
+                date = datetime.fromtimestamp(day * 86400, timezone.utc).strftime('%Y-%m-%d')
+                writer = _open_writer(output / f"date={date}" / f"part-0.{fmt}", schema, fmt)
+                elapsed = time.perf_counter() - started
+                if tick:
+                    print(f"  {date}: {tick}/{total_ticks} ticks, "
+                          f"{tick * n / elapsed / 1e6:.1f}M values/s")
+
+            ticks_left_in_day = -(-((day + 1) * MS_PER_DAY - timestamp) // interval_ms)
+            ticks = min(chunk_ticks, total_ticks - tick, ticks_left_in_day)
+
+            block = engine.step_block(generator.simulation_time, ticks)
+            if injector is not None:
+                injector.apply(block, generator.simulation_time)
+                labels.write(injector, generator.simulation_time, timestamp, interval_ms)
+            timestamps = timestamp + np.arange(ticks, dtype=np.int64) * interval_ms
+
+            if layout == 'wide':
+                # Zero-copy float32 columns over the transposed block
+                columns = np.ascontiguousarray(block.T)
+                buffer = pa.py_buffer(columns)
+                table = pa.Table.from_arrays(
+                    [pa.array(timestamps)] +
+                    [pa.Array.from_buffers(pa.float32(), ticks, [None, buffer], offset=i * ticks) for i in range(n)],
+                    schema=schema)
+            else:
+                indices = pa.array(np.tile(sensor_column, ticks))
+                table = pa.Table.from_arrays([
+                    pa.array(np.repeat(timestamps, n)),
+                    pa.DictionaryArray.from_arrays(indices, dictionary),
+                    pa.array(block.ravel())
+                ], schema=schema)
+
+            # Wait for the previous chunk before queueing this one
+            if pending is not None:
+                pending.result()
+            pending = io.submit(writer.write_table, table)
+            rows_written += table.num_rows
+            generator.simulation_time += ticks
+            tick += ticks
+        if pending is not None:
+            pending.result()
+    finally:
+        if writer is not None:
+            io.submit(writer.close).result()
+        io.shutdown()
+        if labels is not None:
+            labels.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'ticks': total_ticks,
+        'sensors': n,
+        'rows': rows_written,
+        'seconds': round(elapsed, 2),
+        'values_per_second': round(total_ticks * n / elapsed) if elapsed else None
+    }
+    if labels is not None:
+        summary['anomaly_labels'] = labels.rows
+    print(f"Backfill complete: {summary}")
+    return summary
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Device Status Rollup
+Table-driven health thresholds per sensor type, evaluated with vectorized comparisons
+over every sensor at once and rolled up per device through the catalog's device index.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# sensor type -> (direction, warning threshold, critical threshold)
+# 'above': unhealthy when the value exceeds the threshold, 'below': when it drops under it
+STATUS_RULES: Dict[str, Tuple[str, float, float]] = {
+    'temperature': ('above', 75.0, 90.0),
+    'pressure': ('above', 80.0, 95.0),
+    'vibration': ('above', 5.0, 8.0),
+    'flow': ('below', 20.0, 10.0)
+}
+
+STATUS_NAMES = ('normal', 'warning', 'critical')
+
+
+class DeviceStatusRollup:
+    """
+    Compiles STATUS_RULES against a SensorCatalog once, then evaluates the health of
+    every device in a single pass over the current sensor values.
+    """
+
+    def __init__(self, catalog, rules: Optional[Dict[str, Tuple[str, float, float]]] = None):
+        self.catalog = catalog
+        rules = STATUS_RULES if rules is None else rules
+
+        # Per-type lookup tables; types without a rule can never warn or go critical.
+        # 'below' rules are flipped to 'above' by negating both value and thresholds.
+        type_count = max(len(catalog.types), 1)
+        sign = np.ones(type_count)
+        warning = np.full(type_count, np.inf)
+        critical = np.full(type_count, np.inf)
+        for code, sensor_type in enumerate(catalog.types):
+            if sensor_type not in rules:
+                continue
+            direction, warning_threshold, critical_threshold = rules[sensor_type]
+            if direction not in ('above', 'below'):
+                raise ValueError(f"Unknown rule direction '{direction}' for {sensor_type}")
+            sign[code] = 1.0 if direction == 'above' else -1.0
+            warning[code] = warning_threshold * sign[code]
+            critical[code] = critical_threshold * sign[code]
+
+        self.sign = sign[catalog.type_code]
+        self.warning_threshold = warning[catalog.type_code]
+        self.critical_threshold = critical[catalog.type_code]
+        self.sensor_count = np.diff(catalog.device_offsets)
+
+    def evaluate(self, values: np.ndarray, devices: Optional[np.ndarray] = None):
+        """
+        Returns (status_code, critical_count, warning_count) arrays aligned with the
+        catalog's devices, or with `devices` (device indices) when given.
+        status_code indexes STATUS_NAMES.
+        """
+        catalog = self.catalog
+        if devices is None:
+            signed = values * self.sign
+            critical = signed > self.critical_threshold
+            warning = (signed > self.warning_threshold) & ~critical
+            device_count = catalog.device_count
+            critical_count = np.bincount(catalog.device_index, weights=critical, minlength=device_count)
+            warning_count = np.bincount(catalog.device_index, weights=warning, minlength=device_count)
+        else:
+            critical_count = np.empty(len(devices))
+            warning_count = np.empty(len(devices))
+            for i, device in enumerate(devices):
+                start, end = catalog.device_offsets[device], catalog.device_offsets[device + 1]
+                signed = values[start:end] * self.sign[start:end]
+                critical = signed > self.critical_threshold[start:end]
+                critical_count[i] = critical.sum()
+                warning_count[i] = ((signed > self.warning_threshold[start:end]) & ~critical).sum()
+
+        critical_count = critical_count.astype(np.int64)
+        warning_count = warning_count.astype(np.int64)
+        status = np.where(critical_count > 0, 2, np.where(warning_count > 0, 1, 0)).astype(np.int8)
+        return status, critical_count, warning_count
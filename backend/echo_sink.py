@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Echo Sink
+Lightweight local websocket receiver for the mock SCADA generator. Stands in for the
+SCADA server when testing the generator alone and, for messages generated with
+--probes, measures loss, reordering and latency.
+
+Latency uses the monotonic send / generation stamps in each frame, so the sink must run
+on the same host as the generator (CLOCK_MONOTONIC is shared by all local processes).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from array import array
+from typing import Dict, Optional
+
+import numpy as np
+import websockets
+
+
+class ProbeStats:
+    """Loss, reordering and latency accounting for probe-stamped messages"""
+
+    def __init__(self):
+        self.messages = 0
+        self.readings = 0
+        self.bytes = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.sessions = 0
+        self.last_seq: Dict[str, int] = {}
+        self.send_latency_ns = array('q')
+        self.end_to_end_ns = array('q')
+
+    def record(self, message: dict, received_ns: int, size: int):
+        self.messages += 1
+        self.bytes += size
+        if 'sentNs' in message:
+            self.send_latency_ns.append(received_ns - message['sentNs'])
+        if 'generatedNs' in message:
+            self.end_to_end_ns.append(received_ns - message['generatedNs'])
+
+        message_type = message.get('type')
+        if message_type == 'sensor_batch':
+            readings = message.get('readings', [])
+            key = 'sensorId'
+        elif message_type == 'sensor_data':
+            readings = [message]
+            key = 'sensorId'
+        elif message_type == 'device_snapshot':
+            # One sequence per device; every value in the snapshot counts as a reading
+            self.readings += len(message.get('values', {})) - 1
+            readings = [message]
+            key = 'deviceId'
+        else:
+            if message_type == 'session_start':
+                self.sessions += 1
+            return
+
+        self.readings += len(readings)
+        last_seq = self.last_seq
+        for reading in readings:
+            seq = reading.get('seq')
+            if seq is None:
+                continue
+            sensor_id = reading[key]
+            previous = last_seq.get(sensor_id)
+            if previous is None or seq > previous:
+                if previous is not None and seq > previous + 1:
+                    self.lost += seq - previous - 1
+                last_seq[sensor_id] = seq
+            elif seq == previous:
+                self.duplicates += 1
+            else:
+                # Arrived after a later reading: it was counted lost when the gap appeared
+                self.reordered += 1
+                self.lost -= 1
+
+    @staticmethod
+    def _percentiles(samples: array) -> Optional[Dict[str, float]]:
+        if not samples:
+            return None
+        values = np.frombuffer(samples, dtype=np.int64) / 1e6
+        p50, p99, p999 = np.percentile(values, [50, 99, 99.9]).tolist()
+        return {'p50_ms': round(p50, 3), 'p99_ms': round(p99, 3), 'p999_ms': round(p999, 3),
+                'max_ms': round(float(values.max()), 3)}
+
+    def summary(self) -> dict:
+        expected = self.readings + self.lost
+        return {
+            'messages': self.messages,
+            'readings': self.readings,
+            'bytes': self.bytes,
+            'sessions': self.sessions,
+            'sequences': len(self.last_seq),
+            'lost': self.lost,
+            'loss_rate': round(self.lost / expected, 6) if expected else 0.0,
+            'reordered': self.reordered,
+            'duplicates': self.duplicates,
+            'send_latency': self._percentiles(self.send_latency_ns),
+            'end_to_end_latency': self._percentiles(self.end_to_end_ns)
+        }
+
+
+async def serve(host: str = 'localhost', port: int = 8080, echo: bool = False,
+                report_interval: float = 5.0, duration: Optional[float] = None) -> dict:
+    """Run the sink until `duration` elapses (or forever) and return the final summary"""
+    stats = ProbeStats()
+
+    async def handler(ws):
+        print("Generator connected")
+        try:
+            async for raw in ws:
+                received_ns = time.monotonic_ns()
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    print("Received non-JSON message")
+                    continue
+                stats.record(message, received_ns, len(raw))
+                if echo:
+                    await ws.send(raw)
+        except websockets.ConnectionClosed:
+            pass
+        print("Generator disconnected")
+
+    async def reporter():
+        previous = 0
+        while True:
+            await asyncio.sleep(report_interval)
+            summary = stats.summary()
+            rate = (summary['readings'] - previous) / report_interval
+            previous = summary['readings']
+            latency = summary['end_to_end_latency'] or summary['send_latency'] or {}
+            print(f"{summary['messages']} msgs, {rate:.0f} readings/s, lost {summary['lost']}, "
+                  f"reordered {summary['reordered']}, latency p50 {latency.get('p50_ms')} "
+                  f"p99 {latency.get('p99_ms')} p999 {latency.get('p999_ms')} ms")
+
+    report_task = None
+    try:
+        async with websockets.serve(handler, host, port, max_size=None):
+            print(f"Echo sink listening on ws://{host}:{port}")
+            report_task = asyncio.create_task(reporter())
+            if duration is None:
+                await asyncio.Future()
+            else:
+                await asyncio.sleep(duration)
+    finally:
+        if report_task is not None:
+            report_task.cancel()
+        summary = stats.summary()
+        print(f"Sink summary: {json.dumps(summary)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local websocket sink for the mock SCADA generator")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--echo', action='store_true', help="Send every message back to the generator")
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, echo=args.echo, report_interval=args.report_interval,
+                          duration=args.duration))
+    except KeyboardInterrupt:
+        print("\nSink stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Engine Telemetry Load Generator
+Streams correlated throttle_pos / rpm / coolant_temp / pressure / vibration telemetry
+for a fleet of engines (cars, bikes, tractors and generators, using the patterns from
+ML_Shit/SKJ/engine_patterns.py) and drives the ML services with it: the Engine-sim
+API gets each engine's latest window, the Anomaly-Detection API its latest reading.
+
+Requests are issued open-loop at a fixed rate per API. Latency is measured from each
+request's scheduled send time, so time spent waiting for a free connection while the
+service is saturated counts against it (no coordinated omission).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # only needed to drive the APIs
+    httpx = None
+
+ML_PATTERNS_DIR = Path(__file__).resolve().parent.parent / 'ML_Shit' / 'SKJ'
+if str(ML_PATTERNS_DIR) not in sys.path:
+    sys.path.append(str(ML_PATTERNS_DIR))
+
+from engine_patterns import ENGINE_TYPES, FEATURE_NAMES, define_engine_schemas, generate_engine_samples  # noqa: E402
+
+from load_launcher import TokenBucket  # noqa: E402
+from tick_scheduler import TickScheduler  # noqa: E402
+
+# Ranges the Engine-sim and Anomaly-Detection input scalers were fitted on. The pattern
+# schemas use real-world units per engine type (e.g. car rpm 600-6500, oil pressure in
+# PSI), so samples are mapped linearly into these ranges before they are sent.
+API_FEATURE_RANGES = {
+    'throttle_pos': (0.0, 98.9),
+    'rpm': (783.0, 1080.0),
+    'coolant_temp': (60.0, 130.0),
+    'pressure': (1.29, 3.39),
+    'vibration': (0.12, 0.327)
+}
+WINDOW_SIZE = 10  # Engine-sim LSTM input length
+
+DEFAULT_ENGINE_SIM_URL = "http://localhost:8000/predict"
+DEFAULT_ANOMALY_URL = "http://localhost:8001/predict"
+TARGETS = ('engine-sim', 'anomaly')
+
+# Open-loop requests allowed to wait for a connection before new ones are dropped
+DEFAULT_MAX_BACKLOG = 10000
+
+
+class EngineFleet:
+    """
+    Telemetry for `count` engines, one sample per engine per step. Samples are
+    generated per engine in chunks of `chunk` steps (each engine has its own random
+    stream), and the last `window - 1` samples of a chunk are carried into the next so
+    every engine always has a full window.
+    """
+
+    def __init__(self, count: int, engine_types: Optional[Sequence[str]] = None, seed: Optional[int] = None,
+                 chunk: int = 720, window: int = WINDOW_SIZE, api_units: bool = True):
+        if count <= 0:
+            raise ValueError("count must be positive")
+        schemas = define_engine_schemas()
+        engine_types = list(engine_types or ENGINE_TYPES)
+        unknown = set(engine_types) - set(schemas)
+        if unknown:
+            raise ValueError(f"Unknown engine types {sorted(unknown)}, choose from {ENGINE_TYPES}")
+
+        self.count = count
+        self.chunk = chunk
+        self.window_size = window
+        self.types = [engine_types[i % len(engine_types)] for i in range(count)]
+        self.schemas = schemas
+        self.api_units = api_units
+        self._rngs = [np.random.RandomState(np.random.MT19937(s))
+                      for s in np.random.SeedSequence(seed).spawn(count)]
+
+        # Per-engine affine map from schema units to output units
+        low = np.array([[schemas[t][f][0] for f in FEATURE_NAMES] for t in self.types], dtype=np.float64)
+        high = np.array([[schemas[t][f][1] for f in FEATURE_NAMES] for t in self.types], dtype=np.float64)
+        if api_units:
+            api_low = np.array([API_FEATURE_RANGES[f][0] for f in FEATURE_NAMES])
+            api_high = np.array([API_FEATURE_RANGES[f][1] for f in FEATURE_NAMES])
+            self._scale = (api_high - api_low) / (high - low)
+            self._offset = api_low - low * self._scale
+        else:
+            self._scale = np.ones_like(low)
+            self._offset = np.zeros_like(low)
+
+        self.series = self._generate(window - 1 + chunk)
+        self.position = window - 1
+        self.steps = 0
+
+    def _generate(self, samples: int) -> np.ndarray:
+        block = np.empty((self.count, samples, len(FEATURE_NAMES)), dtype=np.float64)
+        for engine, (engine_type, rng) in enumerate(zip(self.types, self._rngs)):
+            data = generate_engine_samples(self.schemas[engine_type], engine_type, samples, rng)
+            for column, name in enumerate(FEATURE_NAMES):
+                block[engine, :, column] = data[name]
+        block *= self._scale[:, None, :]
+        block += self._offset[:, None, :]
+        return block
+
+    def step(self):
+        """
+        Advance every engine by one sample. Refills build a new buffer and swap it in,
+        so readers on other threads always see a consistent window.
+        """
+        if self.position + 1 == self.series.shape[1]:
+            carry = self.window_size - 1
+            series = np.empty_like(self.series)
+            series[:, :carry] = self.series[:, self.series.shape[1] - carry:]
+            series[:, carry:] = self._generate(self.chunk)
+            self.series, self.position = series, carry
+        else:
+            self.position += 1
+        self.steps += 1
+
+    def current(self) -> np.ndarray:
+        """Latest sample of every engine, shape (count, features)"""
+        return self.series[:, self.position]
+
+    def window(self, engine: int) -> np.ndarray:
+        """Latest `window_size` samples of one engine, oldest first"""
+        return self.series[engine, self.position - self.window_size + 1:self.position + 1]
+
+    def engine_sim_payload(self, engine: int) -> dict:
+        return {'window': np.round(self.window(engine), 4).tolist()}
+
+    def anomaly_payload(self, engine: int) -> dict:
+        return dict(zip(FEATURE_NAMES, np.round(self.series[engine, self.position], 4).tolist()))
+
+
+def _percentiles(samples: array) -> Optional[Dict[str, float]]:
+    if not samples:
+        return None
+    values = np.frombuffer(samples, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return {'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3),
+            'max_ms': round(float(values.max()), 3)}
+
+
+class TargetStats:
+    """Per-API request accounting"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.scheduled = 0
+        self.completed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.status: Counter = Counter()
+        self.pending = 0
+        self.max_pending = 0
+        self.latency = array('d')  # scheduled time -> response
+        self.service = array('d')  # request sent -> response
+        self._reported = 0
+
+    def interval(self) -> Dict[str, float]:
+        """Completed requests and latency percentiles since the previous call"""
+        recent = self.latency[self._reported:]
+        self._reported = len(self.latency)
+        return {'completed': len(recent), **(_percentiles(recent) or {})}
+
+    def summary(self, elapsed: float) -> dict:
+        return {
+            'url': self.url,
+            'scheduled': self.scheduled,
+            'completed': self.completed,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'status': {str(k): v for k, v in self.status.items()},
+            'achieved_rps': round(self.completed / elapsed, 2) if elapsed else 0.0,
+            'max_pending': self.max_pending,
+            'latency': _percentiles(self.latency),
+            'service_time': _percentiles(self.service)
+        }
+
+
+async def _request(client, stats: TargetStats, slots: asyncio.Semaphore, payload: dict, scheduled: float):
+    try:
+        async with slots:
+            sent = time.monotonic()
+            try:
+                response = await client.post(stats.url, json=payload)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+        done = time.monotonic()
+        stats.status[status] += 1
+        stats.completed += 1
+        if status != 200:
+            stats.errors += 1
+        stats.latency.append(done - scheduled)
+        stats.service.append(done - sent)
+    finally:
+        stats.pending -= 1
+
+
+async def _drive_target(client, stats: TargetStats, fleet: EngineFleet, payload_for, rate: float,
+                        slots: asyncio.Semaphore, stop_at: float, max_backlog: int):
+    bucket = TokenBucket(rate)
+    tasks = set()
+    engine = 0
+    while True:
+        lag = await bucket.acquire()
+        now = time.monotonic()
+        if now >= stop_at:
+            break
+        stats.scheduled += 1
+        if stats.pending >= max_backlog:
+            stats.dropped += 1
+            continue
+        stats.pending += 1
+        stats.max_pending = max(stats.max_pending, stats.pending)
+        task = asyncio.create_task(_request(client, stats, slots, payload_for(engine), now - lag))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        engine = (engine + 1) % fleet.count
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def run_engine_load(fleet: EngineFleet, targets: Dict[str, str], rate: float, duration: float,
+                          concurrency: int = 64, sample_interval: float = 1.0, timeout: float = 10.0,
+                          report_interval: float = 1.0, max_backlog: int = DEFAULT_MAX_BACKLOG) -> dict:
+    """
+    Drive each API in `targets` (name -> URL) at `rate` requests/s for `duration`
+    seconds while the fleet advances one sample every `sample_interval` seconds.
+    Each API gets up to `concurrency` requests in flight; requests round-robin over
+    the engines.
+    """
+    if httpx is None:
+        raise RuntimeError("httpx is not installed (pip install httpx)")
+    payloads = {'engine-sim': fleet.engine_sim_payload, 'anomaly': fleet.anomaly_payload}
+    stats = {name: TargetStats(name, url) for name, url in targets.items()}
+
+    async def advance():
+        scheduler = TickScheduler(sample_interval)
+        while True:
+            await scheduler.wait()
+            # A chunk refill takes ~1 ms per engine; keep it off the event loop
+            await asyncio.to_thread(fleet.step)
+
+    async def reporter(started: float):
+        while True:
+            await asyncio.sleep(report_interval)
+            parts = []
+            for name, target in stats.items():
+                recent = target.interval()
+                parts.append(f"{name} {recent['completed'] / report_interval:7.1f} req/s "
+                             f"p50 {recent.get('p50_ms', 0):.1f} p99 {recent.get('p99_ms', 0):.1f} ms "
+                             f"errors {target.errors} pending {target.pending}")
+            print(f"[{time.monotonic() - started:6.1f}s] " + "  |  ".join(parts))
+
+    limits = httpx.Limits(max_connections=concurrency * len(targets), max_keepalive_connections=concurrency * len(targets))
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        started = time.monotonic()
+        stop_at = started + duration
+        background = [asyncio.create_task(advance()), asyncio.create_task(reporter(started))]
+        try:
+            await asyncio.gather(*(
+                _drive_target(client, target, fleet, payloads[name], rate, asyncio.Semaphore(concurrency),
+                              stop_at, max_backlog)
+                for name, target in stats.items()))
+        finally:
+            for task in background:
+                task.cancel()
+        elapsed = time.monotonic() - started
+
+    summary = {
+        'engines': fleet.count,
+        'engine_types': dict(Counter(fleet.types)),
+        'api_units': fleet.api_units,
+        'fleet_steps': fleet.steps,
+        'target_rps': rate,
+        'seconds': round(elapsed, 2),
+        'targets': {name: target.summary(elapsed) for name, target in stats.items()}
+    }
+    print(f"Engine load complete: {json.dumps(summary)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine telemetry load generator for the ML prediction APIs")
+    parser.add_argument('--engines', type=int, default=1000, help="Number of simulated engines")
+    parser.add_argument('--engine-types', default=','.join(ENGINE_TYPES),
+                        help="Comma-separated engine types, assigned round-robin")
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Comma-separated APIs to drive: {', '.join(TARGETS)}")
+    parser.add_argument('--engine-sim-url', default=DEFAULT_ENGINE_SIM_URL)
+    parser.add_argument('--anomaly-url', default=DEFAULT_ANOMALY_URL)
+    parser.add_argument('--rate', type=float, required=True, help="Target requests per second per API")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run")
+    parser.add_argument('--concurrency', type=int, default=64, help="Maximum requests in flight per API")
+    parser.add_argument('--sample-interval', type=float, default=1.0, help="Seconds between engine samples")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, help="Random seed for the fleet")
+    parser.add_argument('--raw-units', action='store_true',
+                        help="Send the engine schemas' real-world units instead of the APIs' training ranges")
+    parser.add_argument('--report-interval', type=float, default=1.0, help="Seconds between live reports")
+    parser.add_argument('--output', help="Write the final summary to this JSON file")
+    args = parser.parse_args()
+
+    urls = {'engine-sim': args.engine_sim_url, 'anomaly': args.anomaly_url}
+    names: List[str] = [t.strip() for t in args.targets.split(',') if t.strip()]
+    unknown = set(names) - set(TARGETS)
+    if unknown:
+        parser.error(f"Unknown targets {sorted(unknown)}, choose from {TARGETS}")
+
+    started = time.perf_counter()
+    fleet = EngineFleet(args.engines, [t.strip() for t in args.engine_types.split(',')], seed=args.seed,
+                        api_units=not args.raw_units)
+    print(f"Generated telemetry for {fleet.count} engines in {time.perf_counter() - started:.2f}s; "
+          f"driving {', '.join(names)} at {args.rate:.0f} req/s each")
+
+    try:
+        summary = asyncio.run(run_engine_load(fleet, {name: urls[name] for name in names}, args.rate,
+                                              args.duration, concurrency=args.concurrency,
+                                              sample_interval=args.sample_interval, timeout=args.timeout,
+                                              report_interval=args.report_interval))
+    except KeyboardInterrupt:
+        print("\nEngine load interrupted by user")
+        return
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
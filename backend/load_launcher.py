@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Sharded Load Generator
+Shards the sensor catalog across worker processes, each running its own
+SCADADataGenerator and sink connection (websocket, MQTT, HTTP or file; see sinks.py),
+so load is not capped by one GIL.
+
+Every worker paces its messages with a token bucket targeting its share of
+the aggregate messages/s figure and reports achieved rate, send errors and scheduling
+lag to the launcher, which prints one combined live report.
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import queue
+import signal
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from mock_data_gen import SCADADataGenerator, MESSAGE_FORMATS
+from sensor_catalog import SensorCatalog, DEFAULT_PLANT
+from sinks import create_sink
+
+
+class TokenBucket:
+    """
+    Token bucket in virtual-scheduling form: token k is due at start + k / rate, and up
+    to `burst` tokens may be taken ahead of schedule. acquire() returns how far behind
+    schedule the token was taken; past `max_lag` the schedule is restarted rather than
+    bursting to catch up.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_lag: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self.burst = burst if burst is not None else max(1.0, rate * 0.01)  # 10 ms worth of tokens
+        self.max_lag = max_lag
+        self.due = time.monotonic()
+        self.resets = 0
+
+    async def acquire(self, tokens: int = 1) -> float:
+        now = time.monotonic()
+        ahead = self.due - now - self.burst * self.interval
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+            now = time.monotonic()
+
+        lag = max(0.0, now - self.due)
+        if lag > self.max_lag:
+            self.due = now
+            self.resets += 1
+        self.due += tokens * self.interval
+        return lag
+
+
+def _lag_stats(lags) -> Dict[str, float]:
+    if not lags:
+        return {'lag_p99_ms': 0.0, 'lag_max_ms': 0.0}
+    values = np.fromiter(lags, dtype=np.float64)
+    return {'lag_p99_ms': float(np.percentile(values, 99)) * 1000, 'lag_max_ms': float(values.max()) * 1000}
+
+
+async def _run_worker(index: int, shards: int, options: Dict[str, Any], stop_event, reports):
+    plant = options['plant']
+    catalog = SensorCatalog.load(plant) if plant else SensorCatalog.from_config(DEFAULT_PLANT)
+    catalog = catalog.shard(index, shards)
+    seed = options['seed'] + index if options['seed'] is not None else None
+
+    generator = SCADADataGenerator(options['sink'], catalog=catalog, seed=seed, log_anomalies=False)
+    generator.readings_per_frame = options['batch']
+    generator.probes = options['probes']
+    generator.message_format = options['message_format']
+    sender = create_sink(options['sink'], probes=options['probes'], **options['sink_options'])
+    if options['message_format'] == 'snapshot':
+        sender.session_messages = [generator.build_session_start()]
+    payloads = (sender.payload,)
+    sender.start()
+    bucket = TokenBucket(options['rate'] / shards)
+
+    lags = deque(maxlen=10000)
+    pending = deque()
+    readings = 0
+    report_interval = options['report_interval']
+    next_report = time.monotonic() + report_interval
+
+    def report(final: bool = False):
+        stats = sender.stats()
+        reports.put({'worker': index, 'sensors': catalog.size, 'frames_sent': stats['messages_sent'],
+                     'readings': readings, 'send_errors': stats['send_errors'] + stats['rejected'],
+                     'frames_dropped': stats['messages_dropped'], 'reconnects': stats['reconnects'],
+                     'connected': stats['connected'], 'schedule_resets': bucket.resets,
+                     'blocked_seconds': stats['blocked_seconds'],
+                     'final': final, **_lag_stats(lags)})
+        lags.clear()
+
+    try:
+        while not stop_event.is_set():
+            if not pending:
+                pending.extend(generator.build_tick(payloads)[sender.payload])
+                generator.simulation_time += 1
+                readings += catalog.size
+
+            lags.append(await bucket.acquire())
+            # Waits while the send queue is full, so a slow server shows up as lag
+            await sender.put([pending.popleft()])
+
+            now = time.monotonic()
+            if now >= next_report:
+                report()
+                next_report = now + report_interval
+    finally:
+        await sender.stop(drain_timeout=1.0)
+        report(final=True)
+
+
+def worker_main(index: int, shards: int, options: Dict[str, Any], stop_event, reports):
+    """Process entry point: the launcher owns Ctrl-C and stops workers via stop_event"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, shards, options, stop_event, reports))
+
+
+def run_load(plant: Optional[str], sink: str, workers: int, rate: float, batch: Optional[int] = None,
+             duration: Optional[float] = None, seed: Optional[int] = None,
+             report_interval: float = 1.0, probes: bool = False,
+             sink_options: Optional[Dict[str, Any]] = None, message_format: str = 'batch') -> Dict[str, Any]:
+    """
+    Launch sharded workers and print an aggregated live report until duration or Ctrl-C.
+    `sink` is a sinks.create_sink spec; one message is a frame (or, with the snapshot
+    message format, one device's snapshot) for websocket/file sinks and a single
+    reading for MQTT/HTTP sinks.
+    """
+    catalog = SensorCatalog.load(plant) if plant else SensorCatalog.from_config(DEFAULT_PLANT)
+    shards = max(1, min(workers, catalog.device_count))
+    options = {'plant': plant, 'sink': sink, 'sink_options': sink_options or {}, 'rate': rate, 'batch': batch, 'message_format': message_format, 'seed': seed,
+               'report_interval': report_interval, 'probes': probes}
+
+    print(f"Launching {shards} workers for {catalog.size} sensors on {catalog.device_count} devices, "
+          f"target {rate:.0f} messages/s ({batch or 'all'} readings per message)")
+
+    stop_event = mp.Event()
+    reports = mp.Queue()
+    processes = [mp.Process(target=worker_main, args=(i, shards, options, stop_event, reports), daemon=True)
+                 for i in range(shards)]
+    for process in processes:
+        process.start()
+
+    latest: Dict[int, Dict[str, Any]] = {}
+    previous_frames = previous_readings = 0
+    started = last_print = time.monotonic()
+
+    def aggregate():
+        return {
+            'frames_sent': sum(r['frames_sent'] for r in latest.values()),
+            'readings': sum(r['readings'] for r in latest.values()),
+            'send_errors': sum(r['send_errors'] for r in latest.values()),
+            'frames_dropped': sum(r['frames_dropped'] for r in latest.values()),
+            'reconnects': sum(r['reconnects'] for r in latest.values()),
+            'blocked_seconds': round(sum(r['blocked_seconds'] for r in latest.values()), 3),
+            'connected_workers': sum(bool(r['connected']) for r in latest.values()),
+            'lag_p99_ms': max((r['lag_p99_ms'] for r in latest.values()), default=0.0),
+            'lag_max_ms': max((r['lag_max_ms'] for r in latest.values()), default=0.0)
+        }
+
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            try:
+                update = reports.get(timeout=0.1)
+                latest[update['worker']] = update
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if now - last_print >= report_interval and latest:
+                totals = aggregate()
+                elapsed = now - last_print
+                print(f"[{now - started:6.1f}s] {(totals['frames_sent'] - previous_frames) / elapsed:10.0f} msg/s "
+                      f"{(totals['readings'] - previous_readings) / elapsed:10.0f} readings/s  "
+                      f"lag p99 {totals['lag_p99_ms']:.1f} ms max {totals['lag_max_ms']:.1f} ms  "
+                      f"errors {totals['send_errors']}  dropped {totals['frames_dropped']}  "
+                      f"connected {totals['connected_workers']}/{shards}")
+                previous_frames, previous_readings = totals['frames_sent'], totals['readings']
+                last_print = now
+    except KeyboardInterrupt:
+        print("\nLoad test interrupted by user")
+    finally:
+        stop_event.set()
+        finals = 0
+        deadline = time.monotonic() + 10
+        while finals < len(processes) and time.monotonic() < deadline:
+            try:
+                update = reports.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            latest[update['worker']] = update
+            finals += update['final']
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    elapsed = time.monotonic() - started
+    summary = aggregate()
+    summary.update({'workers': shards, 'seconds': round(elapsed, 2),
+                    'messages_per_second': round(summary['frames_sent'] / elapsed),
+                    'readings_per_second': round(summary['readings'] / elapsed)})
+    print(f"Load test complete: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded multi-process SCADA load generator")
+    parser.add_argument('--url', default="ws://localhost:8080", help="SCADA websocket server URL")
+    parser.add_argument('--sink', metavar='SPEC',
+                        help="Sink to load instead of --url: ws://..., mqtt://host:port, "
+                             "http://host:port/api/data/ingest or file:path.ndjson")
+    parser.add_argument('--message-format', choices=MESSAGE_FORMATS, default='batch',
+                        help="Websocket/file messages: batched readings, or one snapshot per device per tick")
+    parser.add_argument('--project', default='demo', help="Project id for MQTT topics")
+    parser.add_argument('--project-token', help="X-Project-Token for HTTP ingest")
+    parser.add_argument('--http-concurrency', type=int, default=8, help="Concurrent HTTP requests per worker")
+    parser.add_argument('--http-bulk', type=int, default=1, help="Readings per HTTP request (JSON array)")
+    parser.add_argument('--mqtt-qos', type=int, choices=(0, 1, 2), default=0, help="MQTT publish QoS")
+    parser.add_argument('--plant', help="Plant description (JSON/YAML); defaults to the six-sensor demo plant")
+    parser.add_argument('--workers', type=int, default=mp.cpu_count(), help="Worker processes (shards)")
+    parser.add_argument('--rate', type=float, required=True, help="Target aggregate websocket messages per second")
+    parser.add_argument('--batch', type=int, help="Readings per message (default: one message per tick)")
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds")
+    parser.add_argument('--seed', type=int, help="Base random seed (worker i uses seed + i)")
+    parser.add_argument('--report-interval', type=float, default=1.0, help="Seconds between live reports")
+    parser.add_argument('--probes', action='store_true',
+                        help="Add sequence numbers and monotonic send stamps for echo_sink.py")
+    args = parser.parse_args()
+
+    sink_options = {'project': args.project, 'project_token': args.project_token,
+                    'concurrency': args.http_concurrency, 'bulk': args.http_bulk, 'qos': args.mqtt_qos}
+    run_load(args.plant, args.sink or args.url, args.workers, args.rate, batch=args.batch, duration=args.duration,
+             seed=args.seed, report_interval=args.report_interval, probes=args.probes, sink_options=sink_options,
+             message_format=args.message_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,249 +5,175 @@ Generates realistic industrial sensor data for testing the Digital Twin platform
 Simulates temperature, pressure, flow, and vibration sensors with realistic patterns
 """
 
+import argparse
 import json
 import time
 import random
-import math
-import websocket
-import threading
-from datetime import datetime
-from typing import Dict, List, Any
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+
+from websockets.sync.client import connect
+
+from sensor_catalog import SensorCatalog, DEFAULT_PLANT
+from sensor_engine import SensorEngine, ANOMALY_TYPES
+from anomaly_injector import AnomalyInjector, GroundTruthWriter, ANOMALY_KINDS
+from backfill import run_backfill, FORMATS, LAYOUTS, DEFAULT_CHUNK_VALUES, MIN_INTERVAL
+from device_status import DeviceStatusRollup, STATUS_NAMES
+from replay import replay
+from sinks import SinkFanOut, create_sink, DEFAULT_MAX_QUEUE, DEFAULT_MAX_QUEUE_READINGS
+from tick_scheduler import TickScheduler, OVERRUN_POLICIES
+from ws_sender import pack_frames, DEFAULT_MAX_FRAME_BYTES
+
+# Websocket/file message formats: 'batch' packs a tick's readings (full per-sensor
+# metadata) into size-capped sensor_batch frames, 'snapshot' sends one device_snapshot
+# per device per tick with a field -> value map
+MESSAGE_FORMATS = ('batch', 'snapshot')
 
 class SCADADataGenerator:
     """
     Generates mock SCADA sensor data with realistic patterns and anomalies
     """
     
-    def __init__(self, websocket_url: str = "ws://localhost:8080"):
+    def __init__(self, websocket_url: str = "ws://localhost:8080", plant_config: Optional[str] = None,
+                 seed: Optional[int] = None, log_anomalies: bool = True,
+                 catalog: Optional[SensorCatalog] = None):
         self.websocket_url = websocket_url
-        self.ws = None
+        self.sinks = [websocket_url]  # sink specs, see sinks.create_sink
+        self.sink_options: Dict[str, Any] = {}
+        self.sender = None
+        self.ws = None  # blocking connection for the per-reading API (connect_websocket)
         self.running = False
+        self.max_frame_bytes = DEFAULT_MAX_FRAME_BYTES
+        self.readings_per_frame = None  # no cap beyond max_frame_bytes
+        self.probes = False  # add sequence numbers and monotonic latency stamps
+        self.probe_seq = 0  # probe sequence number, one per tick sent (skipped ticks don't count)
+        self.message_format = 'batch'  # see MESSAGE_FORMATS
+        self.overrun_policy = 'skip'  # what to do with ticks missed while a tick overran
+        self.scheduler = None
+        self.injector = None  # scheduled, labelled anomalies (see attach_injector)
+        self.labels = None
+        self.readings = None  # latest tick's readings, after injected anomalies
+        self.readings_time = None  # simulation_time self.readings were generated at
+        self._prefixes = None
+        self._sdk_prefixes = None
+        self._snapshot_keys = None
+        self._device_id_json = None
         
-        # Define sensor configurations
-        self.sensors = {
-            'pump_001_temp': {
-                'type': 'temperature',
-                'device_id': 'pump_001',
-                'base_value': 65.0,
-                'variance': 15.0,
-                'unit': 'celsius',
-                'min_value': 20.0,
-                'max_value': 120.0,
-                'drift_rate': 0.1
-            },
-            'pump_001_vibration': {
-                'type': 'vibration',
-                'device_id': 'pump_001',
-                'base_value': 3.0,
-                'variance': 2.0,
-                'unit': 'mm/s',
-                'min_value': 0.0,
-                'max_value': 15.0,
-                'drift_rate': 0.05
-            },
-            'vessel_001_pressure': {
-                'type': 'pressure',
-                'device_id': 'vessel_001',
-                'base_value': 75.0,
-                'variance': 10.0,
-                'unit': 'psi',
-                'min_value': 0.0,
-                'max_value': 150.0,
-                'drift_rate': 0.2
-            },
-            'vessel_001_temp': {
-                'type': 'temperature',
-                'device_id': 'vessel_001',
-                'base_value': 80.0,
-                'variance': 12.0,
-                'unit': 'celsius',
-                'min_value': 20.0,
-                'max_value': 150.0,
-                'drift_rate': 0.15
-            },
-            'flow_001_rate': {
-                'type': 'flow',
-                'device_id': 'flow_001',
-                'base_value': 45.0,
-                'variance': 20.0,
-                'unit': 'l/min',
-                'min_value': 0.0,
-                'max_value': 100.0,
-                'drift_rate': 0.3
-            },
-            'flow_001_temp': {
-                'type': 'temperature',
-                'device_id': 'flow_001',
-                'base_value': 55.0,
-                'variance': 8.0,
-                'unit': 'celsius',
-                'min_value': 20.0,
-                'max_value': 100.0,
-                'drift_rate': 0.1
-            }
-        }
+        # Sensor configurations come from a plant description (device templates,
+        # sensor templates and instance counts) expanded into an array-backed catalog
+        if catalog is not None:
+            self.catalog = catalog
+        elif plant_config:
+            self.catalog = SensorCatalog.load(plant_config)
+        else:
+            self.catalog = SensorCatalog.from_config(DEFAULT_PLANT)
         
         # Simulation state
-        self.sensor_states = {}
         self.simulation_time = 0
         self.anomaly_probability = 0.05  # 5% chance of anomaly per reading
+        self.log_anomalies = log_anomalies
         
-        # Initialize sensor states
-        for sensor_id, config in self.sensors.items():
-            self.sensor_states[sensor_id] = {
-                'current_value': config['base_value'],
-                'drift_offset': 0.0,
-                'last_anomaly': 0,
-                'trend_direction': random.choice([-1, 1])
-            }
-    
-    def connect_websocket(self):
-        """Establish WebSocket connection to SCADA server"""
-        try:
-            self.ws = websocket.WebSocket()
-            self.ws.connect(self.websocket_url)
-            print(f"Connected to SCADA server at {self.websocket_url}")
-            return True
-        except Exception as e:
-            print(f"Failed to connect to WebSocket: {e}")
-            return False
+        # Array-backed sensor model: one vectorized step per tick for all sensors
+        self.engine = SensorEngine(
+            base_value=self.catalog.base_value,
+            variance=self.catalog.variance,
+            min_value=self.catalog.min_value,
+            max_value=self.catalog.max_value,
+            drift_rate=self.catalog.drift_rate,
+            anomaly_probability=self.anomaly_probability,
+            seed=seed
+        )
+        
+        # Device health: table-driven thresholds evaluated for all sensors at once
+        self.status_rollup = DeviceStatusRollup(self.catalog)
     
-    def generate_sensor_value(self, sensor_id: str) -> float:
+    def generate_readings(self):
         """
-        Generate realistic sensor value with patterns, drift, and anomalies
+        Advance every sensor by one tick with patterns, drift, and anomalies.
+        Returns an array of readings in catalog order.
         """
-        config = self.sensors[sensor_id]
-        state = self.sensor_states[sensor_id]
-        
-        # Base value with normal variance
-        base = config['base_value']
-        variance = config['variance']
-        
-        # Add normal random variation
-        normal_variation = random.gauss(0, variance * 0.3)
-        
-        # Add gradual drift over time
-        drift_rate = config['drift_rate']
-        state['drift_offset'] += random.gauss(0, drift_rate) * state['trend_direction']
+        values = self.engine.step(self.simulation_time)
         
-        # Limit drift to reasonable bounds
-        max_drift = variance * 0.5
-        state['drift_offset'] = max(-max_drift, min(max_drift, state['drift_offset']))
-        
-        # Occasionally reverse drift direction
-        if random.random() < 0.01:  # 1% chance per reading
-            state['trend_direction'] *= -1
-        
-        # Add cyclic patterns (simulating daily/operational cycles)
-        cycle_amplitude = variance * 0.2
-        cycle_value = cycle_amplitude * math.sin(self.simulation_time * 0.01)
-        
-        # Calculate base value
-        value = base + normal_variation + state['drift_offset'] + cycle_value
-        
-        # Add anomalies
-        if random.random() < self.anomaly_probability:
-            anomaly_type = random.choice(['spike', 'drop', 'noise'])
-            
-            if anomaly_type == 'spike':
-                value += variance * random.uniform(1.5, 3.0)
-            elif anomaly_type == 'drop':
-                value -= variance * random.uniform(1.0, 2.0)
-            elif anomaly_type == 'noise':
-                value += random.gauss(0, variance * 0.8)
-            
-            state['last_anomaly'] = self.simulation_time
-            print(f"Generated {anomaly_type} anomaly for {sensor_id}: {value:.2f}")
+        if self.injector is not None:
+            self.injector.apply(values, self.simulation_time)
+            if self.log_anomalies:
+                for kind, sensor_id, start, end in self.injector.describe_started():
+                    print(f"Injected {kind} anomaly for {sensor_id}: ticks {start}-{end}")
+        elif self.log_anomalies:
+            for index, kind in zip(self.engine.anomaly_index, self.engine.anomaly_kind):
+                print(f"Generated {ANOMALY_TYPES[kind]} anomaly for {self.catalog.sensor_id(index)}: {values[index]:.2f}")
         
-        # Ensure value stays within realistic bounds
-        value = max(config['min_value'], min(config['max_value'], value))
-        
-        # Update state
-        state['current_value'] = value
-        
-        return round(value, 2)
+        self.readings = values
+        self.readings_time = self.simulation_time
+        return values
+    
+    def attach_injector(self, injector: AnomalyInjector, labels_path: Optional[str] = None):
+        """
+        Replace the engine's random anomalies with a scheduled injector, so every
+        anomaly in the output is labelled. Live runs write labels to `labels_path`;
+        backfill writes them next to the data.
+        """
+        self.injector = injector
+        self.engine.anomaly_probability = 0.0
+        if labels_path:
+            self.labels = GroundTruthWriter(labels_path, self.catalog)
+    
+    def _status_values(self):
+        """Values device health is judged on: the reported readings, so injected faults count"""
+        return self.engine.current_value if self.readings is None else self.readings
     
     def generate_device_status(self, device_id: str) -> Dict[str, Any]:
         """Generate device status information"""
-        # Get all sensors for this device
-        device_sensors = [s for s in self.sensors.keys() if self.sensors[s]['device_id'] == device_id]
-        
-        # Determine overall device health
-        critical_count = 0
-        warning_count = 0
-        
-        for sensor_id in device_sensors:
-            config = self.sensors[sensor_id]
-            current_value = self.sensor_states[sensor_id]['current_value']
-            
-            # Simple threshold-based health assessment
-            if config['type'] == 'temperature':
-                if current_value > 90:
-                    critical_count += 1
-                elif current_value > 75:
-                    warning_count += 1
-            elif config['type'] == 'pressure':
-                if current_value > 95:
-                    critical_count += 1
-                elif current_value > 80:
-                    warning_count += 1
-            elif config['type'] == 'vibration':
-                if current_value > 8:
-                    critical_count += 1
-                elif current_value > 5:
-                    warning_count += 1
-            elif config['type'] == 'flow':
-                if current_value < 10:
-                    critical_count += 1
-                elif current_value < 20:
-                    warning_count += 1
-        
-        # Determine status
-        if critical_count > 0:
-            status = 'critical'
-        elif warning_count > 0:
-            status = 'warning'
-        else:
-            status = 'normal'
+        device = self.catalog.device_index_of(device_id)
+        status, critical, warning = self.status_rollup.evaluate(self._status_values(), devices=[device])
         
         return {
             'device_id': device_id,
-            'status': status,
-            'sensor_count': len(device_sensors),
-            'critical_sensors': critical_count,
-            'warning_sensors': warning_count,
+            'status': STATUS_NAMES[status[0]],
+            'sensor_count': int(self.status_rollup.sensor_count[device]),
+            'critical_sensors': int(critical[0]),
+            'warning_sensors': int(warning[0]),
             'last_maintenance': '2024-01-15T10:30:00Z',  # Mock data
             'uptime_hours': random.randint(100, 8760)  # Mock uptime
         }
     
+    def connect_websocket(self):
+        """Establish a blocking WebSocket connection for the per-reading send_* methods"""
+        try:
+            self.ws = connect(self.websocket_url)
+            print(f"Connected to SCADA server at {self.websocket_url}")
+            return True
+        except Exception as e:
+            print(f"Failed to connect to WebSocket: {e}")
+            return False
+    
+    def generate_sensor_value(self, sensor_id: str) -> float:
+        """
+        Reading of one sensor at the current simulation time. The first call in a tick
+        generates every sensor's reading (generate_readings); later calls reuse them.
+        """
+        if self.readings_time != self.simulation_time:
+            self.generate_readings()
+        return float(self.readings[self.catalog.index_of(sensor_id)])
+    
     def send_sensor_data(self, sensor_id: str, value: float):
-        """Send sensor data via WebSocket"""
-        config = self.sensors[sensor_id]
-        
+        """Send one sensor reading via WebSocket"""
+        index = self.catalog.index_of(sensor_id)
         message = {
             'type': 'sensor_data',
             'sensorId': sensor_id,
-            'sensorType': config['type'],
-            'deviceId': config['device_id'],
+            'sensorType': self.catalog.sensor_type(index),
+            'deviceId': self.catalog.device_ids[self.catalog.device_index[index]],
             'value': value,
-            'unit': config['unit'],
+            'unit': self.catalog.sensor_unit(index),
             'quality': 'good',
             'timestamp': int(time.time() * 1000)
         }
-        
-        try:
-            self.ws.send(json.dumps(message))
-        except Exception as e:
-            print(f"Error sending sensor data: {e}")
-            return False
-        
-        return True
+        return self._send(json.dumps(message), "sensor data")
     
     def send_device_status(self, device_id: str):
-        """Send device status via WebSocket"""
+        """Send one device's status via WebSocket"""
         status_data = self.generate_device_status(device_id)
-        
         message = {
             'type': 'device_status',
             'deviceId': device_id,
@@ -255,81 +181,307 @@ class SCADADataGenerator:
             'details': status_data,
             'timestamp': int(time.time() * 1000)
         }
-        
+        return self._send(json.dumps(message), "device status")
+    
+    def _send(self, message: str, what: str) -> bool:
         try:
-            self.ws.send(json.dumps(message))
+            self.ws.send(message)
         except Exception as e:
-            print(f"Error sending device status: {e}")
+            print(f"Error sending {what}: {e}")
             return False
-        
         return True
     
+    def _reading_prefixes(self) -> List[str]:
+        """Pre-encoded JSON for the static part of every reading, built once"""
+        if self._prefixes is None:
+            catalog = self.catalog
+            device_ids = catalog.device_ids
+            types = [json.dumps(t) for t in catalog.types]
+            units = [json.dumps(u) for u in catalog.units]
+            self._prefixes = [
+                f'{{"sensorId":{json.dumps(sensor_id)},"sensorType":{types[type_code]},'
+                f'"deviceId":{json.dumps(device_ids[device_index])},"unit":{units[unit_code]},'
+                f'"quality":"good","value":'
+                for sensor_id, type_code, unit_code, device_index in zip(
+                    catalog.sensor_ids, catalog.type_code.tolist(),
+                    catalog.unit_code.tolist(), catalog.device_index.tolist())
+            ]
+        return self._prefixes
+    
+    def build_sensor_frames(self, values, timestamp: int) -> List[str]:
+        """Serialize one tick of readings into batched, size-capped frames"""
+        tick = self.simulation_time
+        if self.probes:
+            # Per-sensor sequence numbers (every sensor reports once per tick) and a
+            # monotonic generation stamp for end-to-end latency measurement
+            seq = self.probe_seq
+            self.probe_seq += 1
+            readings = [f'{prefix}{value!r},"seq":{seq}}}' for prefix, value in zip(self._reading_prefixes(), values.tolist())]
+            header = (f'{{"type":"sensor_batch","tick":{tick},"timestamp":{timestamp},'
+                      f'"generatedNs":{time.monotonic_ns()},"readings":[')
+        else:
+            readings = [f"{prefix}{value!r}}}" for prefix, value in zip(self._reading_prefixes(), values.tolist())]
+            header = f'{{"type":"sensor_batch","tick":{tick},"timestamp":{timestamp},"readings":['
+        return pack_frames(header, readings, ']}', self.max_frame_bytes, self.readings_per_frame)
+    
+    def build_session_start(self) -> str:
+        """
+        Session header for the snapshot format, sent once per connection: the field
+        names, sensor types and units of each distinct device layout, and which layout
+        every device uses, so snapshots only need to carry values.
+        """
+        catalog = self.catalog
+        names = catalog.sensor_names
+        schemas, schema_index, devices = [], {}, {}
+        for device, device_id in enumerate(catalog.device_ids):
+            sensors = catalog.device_sensors(device)
+            schema = (tuple(names[i] for i in sensors), tuple(catalog.sensor_type(i) for i in sensors),
+                      tuple(catalog.sensor_unit(i) for i in sensors))
+            if schema not in schema_index:
+                schema_index[schema] = len(schemas)
+                schemas.append({'fields': list(schema[0]), 'types': list(schema[1]), 'units': list(schema[2])})
+            devices[device_id] = schema_index[schema]
+        return json.dumps({'type': 'session_start', 'format': 'device_snapshot', 'sensorCount': catalog.size,
+                           'schemas': schemas, 'devices': devices}, separators=(',', ':'))
+    
+    def build_device_snapshots(self, values, timestamp: int) -> List[str]:
+        """One device_snapshot message per device holding all of its sensor values as a field map"""
+        catalog = self.catalog
+        if self._snapshot_keys is None:
+            # Pre-encoded '{..."values":{"name":' for a device's first sensor, ',"name":' for the rest
+            keys = [f',{json.dumps(name)}:' for name in catalog.sensor_names]
+            for device, device_id in enumerate(catalog.device_ids):
+                first = int(catalog.device_offsets[device])
+                keys[first] = f'{{"type":"device_snapshot","deviceId":{json.dumps(device_id)},"values":{{' + keys[first][1:]
+            self._snapshot_keys = keys
+        
+        tick = self.simulation_time
+        if self.probes:
+            seq = self.probe_seq
+            self.probe_seq += 1
+            suffix = f'}},"tick":{tick},"timestamp":{timestamp},"seq":{seq},"generatedNs":{time.monotonic_ns()}}}'
+        else:
+            suffix = f'}},"tick":{tick},"timestamp":{timestamp}}}'
+        pieces = [f"{key}{value!r}" for key, value in zip(self._snapshot_keys, values.tolist())]
+        offsets = catalog.device_offsets.tolist()
+        return [''.join(pieces[start:end]) + suffix for start, end in zip(offsets[:-1], offsets[1:])]
+    
+    def build_device_status_frames(self, timestamp: int) -> List[str]:
+        """Evaluate every device in one vectorized pass and serialize into batched, size-capped frames"""
+        status, critical, warning = self.status_rollup.evaluate(self._status_values())
+        uptime = self.engine.rng.integers(100, 8761, size=len(status))  # Mock uptime
+        
+        if self._device_id_json is None:
+            self._device_id_json = [json.dumps(device_id) for device_id in self.catalog.device_ids]
+        statuses = [
+            f'{{"deviceId":{device_id},"status":"{STATUS_NAMES[code]}","details":{{"device_id":{device_id},'
+            f'"status":"{STATUS_NAMES[code]}","sensor_count":{sensor_count},"critical_sensors":{critical_count},'
+            f'"warning_sensors":{warning_count},"last_maintenance":"2024-01-15T10:30:00Z","uptime_hours":{hours}}}}}'
+            for device_id, code, sensor_count, critical_count, warning_count, hours in zip(
+                self._device_id_json, status.tolist(), self.status_rollup.sensor_count.tolist(),
+                critical.tolist(), warning.tolist(), uptime.tolist())
+        ]
+        header = f'{{"type":"device_status_batch","timestamp":{timestamp},"devices":['
+        return pack_frames(header, statuses, ']}', self.max_frame_bytes)
+    
+    def build_sdk_readings(self, values, timestamp: int) -> List[Tuple[str, str]]:
+        """(sensor id, JSON payload) per reading in the TwinSDK send_data format, for MQTT/HTTP sinks"""
+        if self._sdk_prefixes is None:
+            self._sdk_prefixes = [f'{{"sensorId":{json.dumps(sensor_id)},"reading":{{"value":'
+                                  for sensor_id in self.catalog.sensor_ids]
+        suffix = f'}},"timestamp":{timestamp / 1000},"metadata":{{"quality":"good","source":"mock_scada","version":"1.0"}}}}'
+        return [(sensor_id, f"{prefix}{value!r}{suffix}") for sensor_id, prefix, value in zip(
+            self.catalog.sensor_ids, self._sdk_prefixes, values.tolist())]
+    
+    def build_tick(self, payloads=('frames',)) -> Dict[str, list]:
+        """Generate one tick and serialize it in each requested sink payload format (runs in a worker thread)"""
+        values = self.generate_readings()
+        timestamp = int(time.time() * 1000)
+        if self.labels is not None:
+            self.labels.write(self.injector, self.simulation_time, timestamp, int(round(self.injector.interval * 1000)))
+        
+        built = {}
+        if 'frames' in payloads:
+            if self.message_format == 'snapshot':
+                frames = self.build_device_snapshots(values, timestamp)
+            else:
+                frames = self.build_sensor_frames(values, timestamp)
+            
+            # Send device status updates (less frequently)
+            if self.simulation_time % 10 == 0:  # Every 10 cycles
+                frames.extend(self.build_device_status_frames(timestamp))
+            built['frames'] = frames
+        if 'readings' in payloads:
+            built['readings'] = self.build_sdk_readings(values, timestamp)
+        
+        return built
+    
+    def build_tick_frames(self) -> List[str]:
+        """Generate one tick and serialize it into websocket frames"""
+        return self.build_tick()['frames']
+    
+    async def simulate(self, update_interval: float = 1.0):
+        """
+        Main simulation loop. Ticks run on absolute monotonic deadlines (see TickScheduler),
+        so the period stays at update_interval however long generating a tick takes.
+        Each tick is generated and serialized in a worker thread while the sink tasks
+        push the previous tick's messages to every configured sink.
+        """
+        loop = asyncio.get_running_loop()
+        sink_options = dict(self.sink_options)
+        if self.message_format == 'snapshot' and sink_options.get('max_queue') is None:
+            # One message per device per tick: room for a few ticks of snapshots
+            sink_options['max_queue'] = max(DEFAULT_MAX_QUEUE, 4 * self.catalog.device_count)
+        self.sender = SinkFanOut([create_sink(spec, probes=self.probes, **sink_options) for spec in self.sinks])
+        if self.message_format == 'snapshot':
+            self.sender.set_session_messages('frames', [self.build_session_start()])
+        payloads = self.sender.payloads
+        self.sender.start()
+        self.scheduler = TickScheduler(update_interval, policy=self.overrun_policy)
+        self.running = True
+        
+        try:
+            while self.running:
+                try:
+                    # Wait for the tick's deadline; skipped ticks still advance simulation time
+                    self.simulation_time += await self.scheduler.wait()
+                    
+                    built = await loop.run_in_executor(None, self.build_tick, payloads)
+                    self.sender.submit(built)
+                    
+                    # Increment simulation time
+                    self.simulation_time += 1
+                    
+                except Exception as e:
+                    print(f"Simulation error: {e}")
+                    await asyncio.sleep(5)  # Wait before retrying
+        finally:
+            await self.sender.stop()
+            print(f"Tick scheduler stats: {self.scheduler.stats()}")
+            for name, stats in self.sender.stats().items():
+                print(f"Sink {name} stats: {stats}")
+            if self.labels is not None:
+                self.labels.close()
+                print(f"Wrote {self.labels.rows} anomaly labels to {self.labels.path}")
+    
     def run_simulation(self, update_interval: float = 1.0):
         """Run the main simulation loop"""
         print("Starting SCADA data simulation...")
-        print(f"Generating data for {len(self.sensors)} sensors")
+        print(f"Generating data for {self.catalog.size} sensors on {self.catalog.device_count} devices")
+        print(f"Sinks: {', '.join(self.sinks)}")
         print(f"Update interval: {update_interval} seconds")
         
-        self.running = True
-        
-        while self.running:
-            try:
-                # Generate and send sensor data
-                for sensor_id in self.sensors.keys():
-                    value = self.generate_sensor_value(sensor_id)
-                    
-                    if not self.send_sensor_data(sensor_id, value):
-                        print("Failed to send sensor data, attempting reconnection...")
-                        if not self.connect_websocket():
-                            print("Reconnection failed, stopping simulation")
-                            break
-                
-                # Send device status updates (less frequently)
-                if self.simulation_time % 10 == 0:  # Every 10 cycles
-                    unique_devices = set(config['device_id'] for config in self.sensors.values())
-                    for device_id in unique_devices:
-                        self.send_device_status(device_id)
-                
-                # Increment simulation time
-                self.simulation_time += 1
-                
-                # Wait for next update
-                time.sleep(update_interval)
-                
-            except KeyboardInterrupt:
-                print("\nSimulation interrupted by user")
-                break
-            except Exception as e:
-                print(f"Simulation error: {e}")
-                time.sleep(5)  # Wait before retrying
+        try:
+            asyncio.run(self.simulate(update_interval))
+        except KeyboardInterrupt:
+            print("\nSimulation interrupted by user")
     
     def stop_simulation(self):
         """Stop the simulation"""
         self.running = False
-        if self.ws:
-            self.ws.close()
         print("SCADA simulation stopped")
 
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Mock SCADA data generator")
+    parser.add_argument('--url', default="ws://localhost:8080", help="SCADA websocket server URL")
+    parser.add_argument('--plant', help="Plant description (JSON/YAML); defaults to the six-sensor demo plant")
+    parser.add_argument('--sink', action='append', metavar='SPEC',
+                        help="Output sink, repeatable for fan-out: ws://host:port, mqtt://host:port, "
+                             "http://host:port/api/data/ingest or file:path.ndjson (default: --url)")
+    parser.add_argument('--message-format', choices=MESSAGE_FORMATS, default='batch',
+                        help="Websocket/file messages: batched readings per tick, or one snapshot per device "
+                             "per tick (units sent once in a session_start message)")
+    parser.add_argument('--project', default='demo', help="Project id for MQTT topics sensors/{project}/{sensor}/data")
+    parser.add_argument('--project-token', help="X-Project-Token for HTTP ingest")
+    parser.add_argument('--http-concurrency', type=int, default=8, help="Concurrent HTTP ingest requests")
+    parser.add_argument('--http-bulk', type=int, default=1,
+                        help="Readings per HTTP request, sent as a JSON array (needs a bulk-capable endpoint)")
+    parser.add_argument('--mqtt-qos', type=int, choices=(0, 1, 2), default=0, help="MQTT publish QoS")
+    parser.add_argument('--sink-queue', type=int,
+                        help=f"Bounded queue length per sink in messages (default: {DEFAULT_MAX_QUEUE} frames, "
+                             f"{DEFAULT_MAX_QUEUE_READINGS} readings)")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help=f"Update interval in seconds (sub-millisecond intervals are supported live; "
+                             f"backfill needs at least {MIN_INTERVAL})")
+    parser.add_argument('--overrun', choices=OVERRUN_POLICIES, default='skip',
+                        help="When a tick overruns its interval: skip the missed ticks or catch up on them")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible runs")
+    parser.add_argument('--max-frame-bytes', type=int, default=DEFAULT_MAX_FRAME_BYTES,
+                        help="Split a tick's readings into frames no larger than this")
+    parser.add_argument('--backfill', type=float, metavar='DAYS',
+                        help="Generate DAYS of history as fast as possible into files instead of streaming")
+    parser.add_argument('--output', default='backfill', help="Backfill output directory")
+    parser.add_argument('--format', choices=FORMATS, default='parquet', help="Backfill file format")
+    parser.add_argument('--layout', choices=LAYOUTS, default='wide',
+                        help="Backfill layout: one column per sensor (wide) or one row per reading (long)")
+    parser.add_argument('--chunk-values', type=int, default=DEFAULT_CHUNK_VALUES,
+                        help="Values generated per backfill chunk / row group (bounds memory)")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Replay a recorded CSV/Parquet/NDJSON file or directory instead of generating")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed factor (e.g. 1, 10, 100)")
+    parser.add_argument('--probes', action='store_true',
+                        help="Add per-sensor sequence numbers and monotonic send stamps (see echo_sink.py)")
+    parser.add_argument('--inject-rate', type=float, metavar='EVENTS',
+                        help="Inject scheduled, labelled anomalies at EVENTS per sensor per simulated day "
+                             "instead of unlabelled random ones")
+    parser.add_argument('--inject-kinds', default=','.join(ANOMALY_KINDS),
+                        help=f"Comma-separated anomaly kinds to inject (default: {','.join(ANOMALY_KINDS)})")
+    parser.add_argument('--labels', default='anomaly_labels.ndjson',
+                        help="Ground-truth label file for live runs (.ndjson or .csv); "
+                             "backfill writes <output>/_labels.csv")
+    parser.add_argument('--quiet', action='store_true', help="Do not print every generated anomaly")
+    args = parser.parse_args()
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    if args.backfill and args.interval < MIN_INTERVAL:
+        parser.error(f"--backfill timestamps are in milliseconds, --interval must be at least {MIN_INTERVAL}")
+    return args
+
 def main():
     """Main function to run the SCADA data generator"""
+    args = parse_args()
+    
     print("SCADA Mock Data Generator")
     print("=" * 40)
     
+    if args.replay:
+        try:
+            asyncio.run(replay(args.replay, args.url, speed=args.speed, max_frame_bytes=args.max_frame_bytes))
+        except KeyboardInterrupt:
+            print("\nReplay interrupted by user")
+        return
+    
     # Initialize generator
-    generator = SCADADataGenerator()
+    generator = SCADADataGenerator(args.url, plant_config=args.plant, seed=args.seed,
+                                   log_anomalies=not args.quiet)
+    generator.max_frame_bytes = args.max_frame_bytes
+    generator.probes = args.probes
+    generator.overrun_policy = args.overrun
+    generator.message_format = args.message_format
+    generator.sinks = args.sink or [args.url]
+    generator.sink_options = {'project': args.project, 'project_token': args.project_token,
+                              'concurrency': args.http_concurrency, 'bulk': args.http_bulk,
+                              'qos': args.mqtt_qos, 'max_queue': args.sink_queue}
+    
+    if args.inject_rate is not None:
+        kinds = [kind.strip() for kind in args.inject_kinds.split(',') if kind.strip()]
+        injector = AnomalyInjector(generator.catalog, args.inject_rate, interval=args.interval,
+                                   kinds=kinds, seed=args.seed)
+        generator.attach_injector(injector, labels_path=None if args.backfill else args.labels)
     
-    # Connect to WebSocket server
-    if not generator.connect_websocket():
-        print("Could not connect to SCADA server. Make sure the server is running.")
+    if args.backfill:
+        run_backfill(generator, args.backfill, args.output, fmt=args.format, layout=args.layout,
+                     interval=args.interval, chunk_values=args.chunk_values)
         return
     
     try:
         # Run simulation
-        generator.run_simulation(update_interval=1.0)
+        generator.run_simulation(update_interval=args.interval)
     except Exception as e:
         print(f"Simulation failed: {e}")
     finally:
         generator.stop_simulation()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Recorded Data Replay
+Streams a recorded CSV/Parquet/NDJSON file (or a directory of them, e.g. a backfill
+output) through the same batched websocket send path as the live generator,
+preserving inter-arrival times scaled by a speed factor.
+
+Readings sharing a timestamp are sent as one sensor_batch frame. Frames are scheduled
+against absolute monotonic deadlines (start + elapsed / speed), so sleeps never
+accumulate drift; when the sink cannot keep up the lag against the schedule is reported.
+"""
+
+import csv
+import json
+import mmap
+import random
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for CSV/Parquet recordings
+    pa = None
+
+from tick_scheduler import sleep_until
+from ws_sender import BatchedWebSocketSender, pack_frames, DEFAULT_MAX_FRAME_BYTES
+
+SUFFIX_FORMATS = {
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.csv': 'csv',
+    '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson'
+}
+
+# Recorded column name -> message field (snake_case and camelCase recordings both work)
+READING_FIELDS = {
+    'sensor_id': 'sensorId', 'sensorId': 'sensorId',
+    'sensor_type': 'sensorType', 'sensorType': 'sensorType',
+    'device_id': 'deviceId', 'deviceId': 'deviceId',
+    'unit': 'unit',
+    'quality': 'quality'
+}
+
+BATCH_ROWS = 65536
+
+
+def recording_files(path: Path) -> List[Path]:
+    """The recording itself, or every recording file under a directory in path order"""
+    if path.is_dir():
+        return sorted(p for p in path.rglob('*')
+                      if p.suffix.lower() in SUFFIX_FORMATS and not p.name.startswith('_'))
+    return [path]
+
+
+def load_sensor_index(path: Path) -> Dict[str, Dict[str, str]]:
+    """Sensor metadata from a backfill _sensors.csv next to (or above) the recording"""
+    for directory in [path] + list(path.parents)[:2]:
+        index_file = directory / '_sensors.csv'
+        if index_file.is_file():
+            with open(index_file, newline='') as f:
+                return {row['sensor_id']: {'deviceId': row['device_id'], 'sensorType': row['sensor_type'],
+                                           'unit': row['unit']}
+                        for row in csv.DictReader(f)}
+    return {}
+
+
+def _to_epoch_ms(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind in 'iuf':
+        return values.astype(np.int64)
+    return np.array([int(datetime.fromisoformat(str(v).replace('Z', '+00:00')).timestamp() * 1000)
+                     for v in values], dtype=np.int64)
+
+
+def _arrow_columns(batch) -> Dict[str, np.ndarray]:
+    columns = {}
+    for name, column in zip(batch.schema.names, batch.columns):
+        if pa.types.is_timestamp(column.type):
+            column = pc.cast(pc.cast(column, pa.timestamp('ms')), pa.int64())
+        columns[name] = column.to_numpy(zero_copy_only=False)
+    return columns
+
+
+def _ndjson_batches(file: Path) -> Iterator[Dict[str, np.ndarray]]:
+    if file.stat().st_size == 0:  # empty files can't be memory-mapped
+        return
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        records = []
+        for line in iter(data.readline, b''):
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) == BATCH_ROWS:
+                yield _record_columns(records)
+                records = []
+        if records:
+            yield _record_columns(records)
+
+
+def _record_columns(records: List[dict]) -> Dict[str, np.ndarray]:
+    names = list(records[0].keys())
+    return {name: np.array([record.get(name) for record in records]) for name in names}
+
+
+def iter_batches(path: Path) -> Iterator[Dict[str, np.ndarray]]:
+    """Column batches from every file of a recording, read through memory maps"""
+    for file in recording_files(path):
+        fmt = SUFFIX_FORMATS.get(file.suffix.lower())
+        if fmt == 'ndjson':
+            yield from _ndjson_batches(file)
+            continue
+        if pa is None:
+            raise RuntimeError("Replaying CSV/Parquet recordings requires pyarrow (pip install pyarrow)")
+        source = pa.memory_map(str(file))
+        if fmt == 'parquet':
+            batches = pq.ParquetFile(source).iter_batches(batch_size=BATCH_ROWS)
+        else:
+            batches = pa_csv.open_csv(source)
+        for batch in batches:
+            yield _arrow_columns(batch)
+
+
+def _value_text(values: np.ndarray) -> List[str]:
+    """Shortest round-trip text for each value (float32 stays 62.04, not 62.040000915...)"""
+    if values.dtype.kind != 'f':
+        values = np.array([np.nan if v is None else v for v in values.tolist()], dtype=np.float64)
+    text = values.astype(str).astype(object)
+    text[np.isnan(values)] = 'null'
+    return text.tolist()
+
+
+class ReadingEncoder:
+    """Encodes recorded rows as sensor_batch readings, caching the static JSON per sensor"""
+
+    def __init__(self, sensor_index: Dict[str, Dict[str, str]]):
+        self.sensor_index = sensor_index
+        self._prefixes: Dict[tuple, str] = {}
+
+    def _prefix(self, fields: tuple) -> str:
+        prefix = self._prefixes.get(fields)
+        if prefix is None:
+            message = dict(fields)
+            for key, value in self.sensor_index.get(message['sensorId'], {}).items():
+                message.setdefault(key, value)
+            message.setdefault('quality', 'good')
+            prefix = json.dumps(message, separators=(',', ':'))[:-1] + ',"value":'
+            self._prefixes[fields] = prefix
+        return prefix
+
+    def encode(self, columns: Dict[str, np.ndarray]) -> List[str]:
+        """One pre-encoded item per row (a wide row becomes several comma-joined readings)"""
+        static = {READING_FIELDS[name]: values for name, values in columns.items() if name in READING_FIELDS}
+        if 'sensorId' in static:
+            keys = list(static)
+            rows = zip(*(static[key].tolist() for key in keys))
+            values = _value_text(columns['value'])
+            return [f"{self._prefix(tuple(zip(keys, row)))}{value}}}" for row, value in zip(rows, values)]
+
+        # Wide recording: every remaining column is a sensor
+        sensor_columns = [name for name in columns if name not in ('date', 'tick')]
+        per_sensor = [[f"{self._prefix((('sensorId', name),))}{value}}}" for value in _value_text(columns[name])]
+                      for name in sensor_columns]
+        return [','.join(row) for row in zip(*per_sensor)]
+
+
+def iter_ticks(path: Path) -> Iterator[Tuple[int, List[str]]]:
+    """(recorded timestamp in ms, encoded readings) for each group of rows sharing a timestamp"""
+    encoder = ReadingEncoder(load_sensor_index(path if path.is_dir() else path.parent))
+    pending_timestamp, pending = None, []
+    for columns in iter_batches(path):
+        timestamps = _to_epoch_ms(columns.pop('timestamp'))
+        items = encoder.encode(columns)
+        starts = np.concatenate(([0], np.flatnonzero(timestamps[1:] != timestamps[:-1]) + 1))
+        ends = np.append(starts[1:], len(items))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            timestamp = int(timestamps[start])
+            if timestamp == pending_timestamp:
+                pending.extend(items[start:end])
+                continue
+            if pending:
+                yield pending_timestamp, pending
+            pending_timestamp, pending = timestamp, items[start:end]
+    if pending:
+        yield pending_timestamp, pending
+
+
+def lag_summary(lags: np.ndarray) -> Dict[str, float]:
+    if not len(lags):
+        return {}
+    p50, p99 = np.percentile(lags, [50, 99]).tolist()
+    return {'lag_p50_ms': round(p50 * 1000, 3), 'lag_p99_ms': round(p99 * 1000, 3),
+            'lag_max_ms': round(float(lags.max()) * 1000, 3)}
+
+
+class LagStats:
+    """
+    Schedule lags in bounded memory: the most recent `recent` lags for progress
+    reports, a uniform reservoir sample of `reservoir` lags for the run's
+    percentiles, and the exact maximum.
+    """
+
+    def __init__(self, recent: int = 1000, reservoir: int = 10000, seed: int = 0):
+        self.recent = deque(maxlen=recent)
+        self.sample: List[float] = []
+        self.reservoir = reservoir
+        self.count = 0
+        self.max = 0.0
+        self._rng = random.Random(seed)
+
+    def add(self, lag: float):
+        self.recent.append(lag)
+        self.count += 1
+        self.max = max(self.max, lag)
+        if len(self.sample) < self.reservoir:
+            self.sample.append(lag)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self.reservoir:
+                self.sample[slot] = lag
+
+    def recent_summary(self) -> Dict[str, float]:
+        return lag_summary(np.array(self.recent))
+
+    def summary(self) -> Dict[str, float]:
+        summary = lag_summary(np.array(self.sample))
+        if summary:
+            summary['lag_max_ms'] = round(self.max * 1000, 3)
+        return summary
+
+
+async def replay(path: str, url: str, speed: float = 1.0, max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+                 report_interval: float = 5.0, late_threshold: float = 0.005,
+                 sender: Optional[BatchedWebSocketSender] = None) -> dict:
+    """Replay a recording at `speed` x real time and return schedule-lag statistics"""
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    path = Path(path)
+    own_sender = sender is None
+    if own_sender:
+        sender = BatchedWebSocketSender(url)
+        sender.start()
+
+    lags = LagStats()
+    ticks = readings = late = 0
+    first_timestamp = start = wall_start_ms = None
+    next_report = None
+
+    try:
+        for timestamp, items in iter_ticks(path):
+            if first_timestamp is None:
+                first_timestamp = timestamp
+                start = time.monotonic()
+                wall_start_ms = int(time.time() * 1000)
+                next_report = start + report_interval
+
+            # Absolute deadline on the monotonic clock: no accumulated sleep drift
+            offset = (timestamp - first_timestamp) / 1000 / speed
+            deadline = start + offset
+            await sleep_until(deadline)
+
+            header = (f'{{"type":"sensor_batch","tick":{ticks},"timestamp":{wall_start_ms + int(offset * 1000)},'
+                      f'"recordedTimestamp":{timestamp},"readings":[')
+            await sender.put(pack_frames(header, items, ']}', max_frame_bytes))
+
+            now = time.monotonic()
+            lag = max(0.0, now - deadline)
+            lags.add(lag)
+            if lag > late_threshold:
+                late += 1
+            ticks += 1
+            readings += len(items)
+
+            if now >= next_report:
+                recent = lags.recent_summary()
+                print(f"Replay: {ticks} ticks, {readings} rows, schedule lag {lag * 1000:.1f} ms "
+                      f"(recent p99 {recent['lag_p99_ms']} ms), {late} late ticks, "
+                      f"queue {sender.queue.qsize()} frames")
+                next_report = now + report_interval
+    finally:
+        if own_sender:
+            await sender.stop()
+
+    elapsed = time.monotonic() - start if start is not None else 0.0
+    summary = {'ticks': ticks, 'rows': readings, 'late_ticks': late, 'seconds': round(elapsed, 3),
+               'speed': speed, **lags.summary()}
+    print(f"Replay complete: {summary}")
+    return summary
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Sensor Catalog
+Expands a plant description (device templates, sensor templates, instance counts)
+into a compact, array-backed catalog for the mock SCADA generator.
+
+Sensor and device ids are derived from the instance blocks on demand, so a catalog
+costs a few dozen bytes per sensor instead of a dict of dicts per sensor.
+"""
+
+import bisect
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # YAML plant files are optional
+    yaml = None
+
+# Numeric fields every sensor template must define
+SENSOR_FIELDS = ('base_value', 'variance', 'min_value', 'max_value', 'drift_rate')
+
+# The original six-sensor demo plant
+DEFAULT_PLANT = {
+    'sensor_templates': {
+        'pump_temp': {'type': 'temperature', 'unit': 'celsius', 'base_value': 65.0, 'variance': 15.0,
+                      'min_value': 20.0, 'max_value': 120.0, 'drift_rate': 0.1},
+        'pump_vibration': {'type': 'vibration', 'unit': 'mm/s', 'base_value': 3.0, 'variance': 2.0,
+                           'min_value': 0.0, 'max_value': 15.0, 'drift_rate': 0.05},
+        'vessel_pressure': {'type': 'pressure', 'unit': 'psi', 'base_value': 75.0, 'variance': 10.0,
+                            'min_value': 0.0, 'max_value': 150.0, 'drift_rate': 0.2},
+        'vessel_temp': {'type': 'temperature', 'unit': 'celsius', 'base_value': 80.0, 'variance': 12.0,
+                        'min_value': 20.0, 'max_value': 150.0, 'drift_rate': 0.15},
+        'flow_rate': {'type': 'flow', 'unit': 'l/min', 'base_value': 45.0, 'variance': 20.0,
+                      'min_value': 0.0, 'max_value': 100.0, 'drift_rate': 0.3},
+        'flow_temp': {'type': 'temperature', 'unit': 'celsius', 'base_value': 55.0, 'variance': 8.0,
+                      'min_value': 20.0, 'max_value': 100.0, 'drift_rate': 0.1}
+    },
+    'device_templates': {
+        'pump': {'sensors': {'temp': 'pump_temp', 'vibration': 'pump_vibration'}},
+        'vessel': {'sensors': {'pressure': 'vessel_pressure', 'temp': 'vessel_temp'}},
+        'flow': {'sensors': {'rate': 'flow_rate', 'temp': 'flow_temp'}}
+    },
+    'devices': [
+        {'template': 'pump', 'count': 1},
+        {'template': 'vessel', 'count': 1},
+        {'template': 'flow', 'count': 1}
+    ]
+}
+
+
+class _DeviceBlock:
+    """A run of `count` identical devices created from one device template"""
+
+    __slots__ = ('prefix', 'count', 'width', 'first_number', 'sensor_names',
+                 'device_start', 'sensor_start')
+
+    def __init__(self, prefix: str, count: int, first_number: int, sensor_names: List[str],
+                 device_start: int, sensor_start: int, width: Optional[int] = None):
+        self.prefix = prefix
+        self.count = count
+        self.first_number = first_number
+        self.width = width or max(3, len(str(first_number + count - 1)))
+        self.sensor_names = sensor_names
+        self.device_start = device_start
+        self.sensor_start = sensor_start
+
+    def device_id(self, local_index: int) -> str:
+        return f"{self.prefix}_{self.first_number + local_index:0{self.width}d}"
+
+
+class SensorCatalog:
+    """
+    Array-backed sensor catalog.
+
+    Sensors are laid out device-major: the sensors of device d occupy the contiguous
+    range device_offsets[d]:device_offsets[d + 1].
+    """
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.units: List[str] = []
+        self._blocks: List[_DeviceBlock] = []
+        self._block_device_starts: List[int] = []
+        self._block_sensor_starts: List[int] = []
+        self._sensor_ids: Optional[List[str]] = None
+        self._sensor_lookup: Optional[Dict[str, int]] = None
+        self._device_lookup: Optional[Dict[str, int]] = None
+
+        self.base_value = np.empty(0, dtype=np.float32)
+        self.variance = np.empty(0, dtype=np.float32)
+        self.min_value = np.empty(0, dtype=np.float32)
+        self.max_value = np.empty(0, dtype=np.float32)
+        self.drift_rate = np.empty(0, dtype=np.float32)
+        self.type_code = np.empty(0, dtype=np.uint8)
+        self.unit_code = np.empty(0, dtype=np.uint8)
+        self.device_index = np.empty(0, dtype=np.int32)
+        self.device_offsets = np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path: str) -> 'SensorCatalog':
+        """Load a plant description from a JSON or YAML file"""
+        path = Path(path)
+        text = path.read_text()
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise RuntimeError("PyYAML is required to load YAML plant files (pip install pyyaml)")
+            config = yaml.safe_load(text)
+        else:
+            config = json.loads(text)
+        return cls.from_config(config)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'SensorCatalog':
+        """Expand a plant description dict into a catalog"""
+        catalog = cls()
+        sensor_templates = config.get('sensor_templates', {})
+        device_templates = config['device_templates']
+
+        # Each block is `count` devices x k sensors laid out device-major, so every
+        # per-sensor column is the template's k values tiled `count` times
+        columns = {field: [] for field in SENSOR_FIELDS + ('type_code', 'unit_code')}
+        sensors_per_device, device_counts = [], []
+        next_number: Dict[str, int] = {}
+        device_start = sensor_start = 0
+
+        for entry in config['devices']:
+            template_name = entry['template']
+            if template_name not in device_templates:
+                raise ValueError(f"Unknown device template '{template_name}'")
+            template = device_templates[template_name]
+            count = int(entry.get('count', 1))
+            prefix = entry.get('prefix', template.get('prefix', template_name))
+            first_number = int(entry.get('start', next_number.get(prefix, 1)))
+            next_number[prefix] = first_number + count
+
+            sensor_names = list(template['sensors'].keys())
+            specs = [cls._resolve_sensor(template['sensors'][name], sensor_templates) for name in sensor_names]
+            for field in SENSOR_FIELDS:
+                values = np.array([float(spec[field]) for spec in specs], dtype=np.float32)
+                columns[field].append(np.tile(values, count))
+            types = [catalog._code(catalog.types, spec['type']) for spec in specs]
+            units = [catalog._code(catalog.units, spec.get('unit', '')) for spec in specs]
+            if len(catalog.types) > 255 or len(catalog.units) > 255:
+                raise ValueError("A catalog supports at most 255 distinct sensor types and units")
+            columns['type_code'].append(np.tile(np.array(types, dtype=np.uint8), count))
+            columns['unit_code'].append(np.tile(np.array(units, dtype=np.uint8), count))
+
+            catalog._blocks.append(_DeviceBlock(prefix, count, first_number, sensor_names,
+                                                device_start, sensor_start))
+            catalog._block_device_starts.append(device_start)
+            catalog._block_sensor_starts.append(sensor_start)
+            sensors_per_device.append(len(sensor_names))
+            device_counts.append(count)
+            device_start += count
+            sensor_start += count * len(sensor_names)
+
+        for field, parts in columns.items():
+            if parts:
+                setattr(catalog, field, np.concatenate(parts))
+
+        per_device = np.repeat(np.array(sensors_per_device, dtype=np.int64), device_counts)
+        catalog.device_offsets = np.concatenate(([0], np.cumsum(per_device)))
+        catalog.device_index = np.repeat(np.arange(device_start, dtype=np.int32), per_device)
+
+        bad = catalog.min_value > catalog.max_value
+        if bad.any():
+            raise ValueError(f"Sensor {catalog.sensor_id(int(np.flatnonzero(bad)[0]))} has min_value > max_value")
+
+        return catalog
+
+    def shard(self, index: int, count: int) -> 'SensorCatalog':
+        """
+        The index-th of `count` catalogs covering contiguous, near-equal device ranges.
+        Sensor and device ids are the same as in the full catalog.
+        """
+        bounds = np.linspace(0, self.device_count, count + 1).astype(np.int64)
+        first_device, last_device = int(bounds[index]), int(bounds[index + 1])
+        first_sensor = int(self.device_offsets[first_device])
+        last_sensor = int(self.device_offsets[last_device])
+
+        shard = SensorCatalog()
+        shard.types = self.types
+        shard.units = self.units
+        for field in SENSOR_FIELDS + ('type_code', 'unit_code'):
+            setattr(shard, field, getattr(self, field)[first_sensor:last_sensor])
+        shard.device_index = self.device_index[first_sensor:last_sensor] - first_device
+        shard.device_offsets = self.device_offsets[first_device:last_device + 1] - first_sensor
+
+        for block in self._blocks:
+            start = max(block.device_start, first_device)
+            end = min(block.device_start + block.count, last_device)
+            if start >= end:
+                continue
+            k = len(block.sensor_names)
+            device_start = start - first_device
+            sensor_start = block.sensor_start + (start - block.device_start) * k - first_sensor
+            shard._blocks.append(_DeviceBlock(block.prefix, end - start,
+                                              block.first_number + start - block.device_start,
+                                              block.sensor_names, device_start, sensor_start, block.width))
+            shard._block_device_starts.append(device_start)
+            shard._block_sensor_starts.append(sensor_start)
+        return shard
+
+    @staticmethod
+    def _resolve_sensor(spec, sensor_templates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """A device's sensor is a template name, or a dict with an optional 'template' plus overrides"""
+        if isinstance(spec, str):
+            spec = {'template': spec}
+        resolved = {}
+        if 'template' in spec:
+            if spec['template'] not in sensor_templates:
+                raise ValueError(f"Unknown sensor template '{spec['template']}'")
+            resolved.update(sensor_templates[spec['template']])
+        resolved.update({k: v for k, v in spec.items() if k != 'template'})
+        missing = [field for field in SENSOR_FIELDS + ('type',) if field not in resolved]
+        if missing:
+            raise ValueError(f"Sensor definition {spec} is missing {', '.join(missing)}")
+        return resolved
+
+    @staticmethod
+    def _code(table: List[str], value: str) -> int:
+        if value not in table:
+            table.append(value)
+        return table.index(value)
+
+    @property
+    def size(self) -> int:
+        return int(self.base_value.shape[0])
+
+    @property
+    def device_count(self) -> int:
+        return int(self.device_offsets.shape[0] - 1)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the per-sensor and per-device arrays"""
+        return sum(getattr(self, name).nbytes for name in
+                   SENSOR_FIELDS + ('type_code', 'unit_code', 'device_index', 'device_offsets'))
+
+    def _block_for_sensor(self, index: int) -> _DeviceBlock:
+        if not 0 <= index < self.size:
+            raise IndexError(f"Sensor index {index} out of range")
+        return self._blocks[bisect.bisect_right(self._block_sensor_starts, index) - 1]
+
+    def _block_for_device(self, index: int) -> _DeviceBlock:
+        if not 0 <= index < self.device_count:
+            raise IndexError(f"Device index {index} out of range")
+        return self._blocks[bisect.bisect_right(self._block_device_starts, index) - 1]
+
+    def sensor_id(self, index: int) -> str:
+        block = self._block_for_sensor(index)
+        local_device, sensor = divmod(index - block.sensor_start, len(block.sensor_names))
+        return f"{block.device_id(local_device)}_{block.sensor_names[sensor]}"
+
+    def device_id(self, index: int) -> str:
+        block = self._block_for_device(index)
+        return block.device_id(index - block.device_start)
+
+    def sensor_type(self, index: int) -> str:
+        return self.types[self.type_code[index]]
+
+    def sensor_unit(self, index: int) -> str:
+        return self.units[self.unit_code[index]]
+
+    @property
+    def sensor_ids(self) -> List[str]:
+        """All sensor ids in catalog order (materialized on first use)"""
+        if self._sensor_ids is None:
+            ids = []
+            for block in self._blocks:
+                for local_device in range(block.count):
+                    device_id = block.device_id(local_device)
+                    ids.extend(f"{device_id}_{name}" for name in block.sensor_names)
+            self._sensor_ids = ids
+        return self._sensor_ids
+
+    @property
+    def sensor_names(self) -> List[str]:
+        """Every sensor's name within its device (the device template's sensor key), in catalog order"""
+        names = []
+        for block in self._blocks:
+            names.extend(block.sensor_names * block.count)
+        return names
+
+    @property
+    def device_ids(self) -> List[str]:
+        return [self.device_id(index) for index in range(self.device_count)]
+
+    def index_of(self, sensor_id: str) -> int:
+        if self._sensor_lookup is None:
+            self._sensor_lookup = {sensor_id: i for i, sensor_id in enumerate(self.sensor_ids)}
+        return self._sensor_lookup[sensor_id]
+
+    def device_index_of(self, device_id: str) -> int:
+        if self._device_lookup is None:
+            self._device_lookup = {device_id: i for i, device_id in enumerate(self.device_ids)}
+        return self._device_lookup[device_id]
+
+    def device_sensors(self, device_index: int) -> range:
+        """Sensor indices belonging to a device"""
+        return range(int(self.device_offsets[device_index]), int(self.device_offsets[device_index + 1]))
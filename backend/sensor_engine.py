@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Vectorized Sensor Engine
+Array-backed version of the SCADA sensor model used by the mock data generator.
+Every sensor advances in one NumPy step per tick instead of one Python call per sensor.
+"""
+
+import numpy as np
+from typing import Optional
+
+# Anomaly kinds, in the order they are drawn
+ANOMALY_TYPES = ('spike', 'drop', 'noise')
+
+# Per-tick probability that a sensor reverses its drift direction
+TREND_REVERSAL_PROBABILITY = 0.01
+
+
+class SensorEngine:
+    """
+    Holds base values, variances, drift offsets and trend directions as NumPy vectors.
+
+    The model is the same one SCADADataGenerator used per sensor:
+      value = base + N(0, 0.3 * variance) + drift_offset + 0.2 * variance * sin(0.01 * t)
+    with the drift doing a bounded random walk (|drift| <= 0.5 * variance), a 1% chance
+    per tick of reversing the drift direction, and spike/drop/noise anomalies injected
+    with `anomaly_probability`. Values are clipped to [min_value, max_value] and rounded
+    to two decimals.
+    """
+
+    def __init__(self, base_value, variance, min_value, max_value, drift_rate,
+                 anomaly_probability: float = 0.05, seed: Optional[int] = None):
+        self.base_value = np.asarray(base_value, dtype=np.float64)
+        self.variance = np.asarray(variance, dtype=np.float64)
+        self.min_value = np.asarray(min_value, dtype=np.float64)
+        self.max_value = np.asarray(max_value, dtype=np.float64)
+        self.drift_rate = np.asarray(drift_rate, dtype=np.float64)
+        self.anomaly_probability = anomaly_probability
+        self.size = self.base_value.shape[0]
+
+        self.rng = np.random.default_rng(seed)
+
+        # Derived per-sensor constants, computed once instead of on every reading
+        self.noise_scale = self.variance * 0.3
+        self.max_drift = self.variance * 0.5
+        self.cycle_amplitude = self.variance * 0.2
+
+        # Simulation state
+        self.current_value = self.base_value.copy()
+        self.drift_offset = np.zeros(self.size)
+        self.trend_direction = self.rng.choice(np.array([-1.0, 1.0]), size=self.size)
+        self.last_anomaly = np.zeros(self.size, dtype=np.int64)
+
+        # Anomalies injected by the most recent step (sensor indices and ANOMALY_TYPES codes)
+        self.anomaly_index = np.empty(0, dtype=np.intp)
+        self.anomaly_kind = np.empty(0, dtype=np.int8)
+
+        # Scratch buffers reused across ticks
+        self._noise = np.empty(self.size)
+        self._uniform = np.empty(self.size)
+        self._output = np.empty(self.size)
+
+    def step(self, simulation_time: int) -> np.ndarray:
+        """
+        Advance every sensor by one tick and return the rounded readings.
+
+        The returned array is a buffer reused on the next call; copy it if it must be kept.
+        """
+        rng = self.rng
+        noise = self._noise
+        uniform = self._uniform
+
+        # Gradual drift over time, bounded to half the variance
+        rng.standard_normal(out=noise)
+        noise *= self.drift_rate
+        noise *= self.trend_direction
+        self.drift_offset += noise
+        np.clip(self.drift_offset, -self.max_drift, self.max_drift, out=self.drift_offset)
+
+        # Occasionally reverse drift direction
+        rng.random(out=uniform)
+        np.negative(self.trend_direction, out=self.trend_direction,
+                    where=uniform < TREND_REVERSAL_PROBABILITY)
+
+        # Base value + normal variation + drift + operational cycle
+        value = self.current_value
+        rng.standard_normal(out=value)
+        value *= self.noise_scale
+        value += self.base_value
+        value += self.drift_offset
+        value += self.cycle_amplitude * np.sin(simulation_time * 0.01)
+
+        # Anomalies
+        rng.random(out=uniform)
+        index = np.flatnonzero(uniform < self.anomaly_probability)
+        kind = rng.integers(0, len(ANOMALY_TYPES), size=index.size).astype(np.int8)
+        if index.size:
+            variance = self.variance[index]
+            delta = np.empty(index.size)
+
+            spike = kind == 0
+            delta[spike] = variance[spike] * rng.uniform(1.5, 3.0, size=int(spike.sum()))
+            drop = kind == 1
+            delta[drop] = -variance[drop] * rng.uniform(1.0, 2.0, size=int(drop.sum()))
+            noisy = kind == 2
+            delta[noisy] = rng.normal(0.0, variance[noisy] * 0.8)
+
+            value[index] += delta
+            self.last_anomaly[index] = simulation_time
+        self.anomaly_index = index
+        self.anomaly_kind = kind
+
+        # Keep values within realistic bounds
+        np.clip(value, self.min_value, self.max_value, out=value)
+
+        return np.round(value, 2, out=self._output)
+
+    def _bernoulli_positions(self, total: int, probability: float) -> np.ndarray:
+        """
+        Sorted positions of successes in `total` Bernoulli trials, drawn as geometric
+        gaps so the cost scales with the number of successes rather than `total`.
+        """
+        rng = self.rng
+        if probability <= 0:
+            return np.empty(0, dtype=np.int64)
+        expected = total * probability
+        size = int(expected + 6 * np.sqrt(expected) + 16)
+        positions = np.cumsum(rng.geometric(probability, size=size)) - 1
+        while positions[-1] < total:
+            more = np.cumsum(rng.geometric(probability, size=size)) + positions[-1]
+            positions = np.concatenate((positions, more))
+        return positions[:np.searchsorted(positions, total)]
+
+    def step_block(self, start_time: int, ticks: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Advance every sensor by `ticks` ticks at once and return a (ticks, sensors)
+        float32 array of rounded readings.
+
+        Same model as step(), vectorized over time as well as sensors: only the bounded
+        drift walk has to be integrated tick by tick. Used by backfill, where there is
+        no wall clock to keep pace with.
+        """
+        rng = self.rng
+        n = self.size
+        if out is None:
+            out = np.empty((ticks, n), dtype=np.float32)
+
+        # N(0, drift_rate) * direction has the same distribution whatever the direction,
+        # so the direction only needs to be carried forward: it ends up reversed when an
+        # odd number of the block's 1%-per-tick reversals hit the sensor.
+        reversals = rng.binomial(ticks, TREND_REVERSAL_PROBABILITY, size=n)
+        self.trend_direction[reversals & 1 == 1] *= -1
+
+        # Bounded drift walk, integrated in place over the increments
+        drift_block = rng.standard_normal((ticks, n), dtype=np.float32)
+        drift_block *= self.drift_rate.astype(np.float32)
+        drift = self.drift_offset.astype(np.float32)
+        low = (-self.max_drift).astype(np.float32)
+        high = self.max_drift.astype(np.float32)
+        for row in drift_block:
+            np.add(drift, row, out=row)
+            np.minimum(row, high, out=row)
+            np.maximum(row, low, out=row)
+            drift = row
+        self.drift_offset[:] = drift
+
+        # Base value + normal variation + drift + operational cycle
+        value = out
+        rng.standard_normal((ticks, n), dtype=np.float32, out=value)
+        value *= self.noise_scale.astype(np.float32)
+        value += self.base_value.astype(np.float32)
+        value += drift_block
+        cycle = np.sin((start_time + np.arange(ticks)) * 0.01).astype(np.float32)
+        value += cycle[:, None] * self.cycle_amplitude.astype(np.float32)
+        del drift_block
+
+        # Anomalies
+        rows, cols = np.divmod(self._bernoulli_positions(ticks * n, self.anomaly_probability), n)
+        kind = rng.integers(0, len(ANOMALY_TYPES), size=rows.size).astype(np.int8)
+        if rows.size:
+            variance = self.variance[cols]
+            delta = np.empty(rows.size)
+
+            spike = kind == 0
+            delta[spike] = variance[spike] * rng.uniform(1.5, 3.0, size=int(spike.sum()))
+            drop = kind == 1
+            delta[drop] = -variance[drop] * rng.uniform(1.0, 2.0, size=int(drop.sum()))
+            noisy = kind == 2
+            delta[noisy] = rng.normal(0.0, variance[noisy] * 0.8)
+
+            value[rows, cols] += delta.astype(np.float32)
+            # rows are sorted, so the last write per sensor is its latest anomaly
+            self.last_anomaly[cols] = start_time + rows
+        self.block_anomalies = (rows, cols, kind)
+
+        # Keep values within realistic bounds
+        np.clip(value, self.min_value.astype(np.float32), self.max_value.astype(np.float32), out=value)
+        np.round(value, 2, out=value)
+        self.current_value[:] = value[-1]
+
+        return value
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Output Sinks
+Pluggable destinations for the mock SCADA generator: websocket (the SCADA listener),
+MQTT on the SDK topics, HTTP to /api/data/ingest, and NDJSON files. Several sinks
+can be fed from the same generator at once through SinkFanOut.
+
+Every sink owns a bounded queue drained by background tasks, and accounts for
+backpressure: messages dropped because the queue was full, time producers spent
+blocked waiting for room, the queue high-water mark and how long messages waited.
+
+Sinks consume one of two payload formats, built once per tick by the generator:
+  frames    batched sensor_batch / device_status_batch JSON frames (websocket, file)
+  readings  (sensor id, SDK JSON payload) per reading (MQTT, HTTP)
+"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+try:
+    import httpx
+except ImportError:  # only needed for HTTP sinks
+    httpx = None
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:  # only needed for MQTT sinks
+    mqtt = None
+
+PAYLOAD_FORMATS = ('frames', 'readings')
+
+# Default queue bounds in messages: a frame carries a whole tick, a reading one value
+DEFAULT_MAX_QUEUE = 256
+DEFAULT_MAX_QUEUE_READINGS = 65536
+
+
+class SinkUnavailable(Exception):
+    """Raised by a sink when its destination is unreachable; the message is retried after reconnecting"""
+
+
+class SinkRejected(Exception):
+    """Raised by a sink when the destination refused a message; it is counted and not retried"""
+
+
+class QueuedSink:
+    """
+    Base class: a bounded queue of messages delivered by `concurrency` background tasks.
+
+    submit() never blocks: when the queue is full the remaining messages are dropped
+    and counted, so generation keeps its pace. put() waits for room instead and counts
+    the time spent waiting. `session_messages` are delivered first on every connection
+    (e.g. a schema the receiver needs). Subclasses implement _open(), _deliver() and _close();
+    _deliver() raises SinkUnavailable (or one of `retry_errors`) to have the message
+    retried after reconnecting with exponential backoff, or SinkRejected to drop it.
+    """
+
+    name = 'sink'
+    payload = 'frames'
+    retry_errors: tuple = (OSError, SinkUnavailable)
+
+    def __init__(self, max_queue: int = DEFAULT_MAX_QUEUE, concurrency: int = 1,
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.concurrency = concurrency
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = False
+        self.session_messages: List = []  # sent first on every (re)connection
+        self._tasks: List[asyncio.Task] = []
+        self._connecting: Optional[asyncio.Lock] = None
+
+        # Statistics
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.messages_dropped = 0
+        self.send_errors = 0
+        self.rejected = 0
+        self.reconnects = 0
+        self.max_queued = 0
+        self.blocked_puts = 0
+        self.blocked_seconds = 0.0
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+        self._dequeued = 0
+
+    def start(self):
+        """Start the background delivery tasks (must be called from a running loop)"""
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._connecting = asyncio.Lock()
+            self._tasks = [loop.create_task(self._run()) for _ in range(self.concurrency)]
+
+    def submit(self, messages: Sequence) -> bool:
+        """Queue messages for sending; returns False if any had to be dropped"""
+        now = time.monotonic()
+        for i, message in enumerate(messages):
+            try:
+                self.queue.put_nowait((now, message))
+            except asyncio.QueueFull:
+                self.messages_dropped += len(messages) - i
+                return False
+        self.max_queued = max(self.max_queued, self.queue.qsize())
+        return True
+
+    async def put(self, messages: Sequence):
+        """Queue messages, waiting for room instead of dropping (backpressure)"""
+        for message in messages:
+            if self.queue.full():
+                started = time.monotonic()
+                await self.queue.put((started, message))
+                self.blocked_puts += 1
+                self.blocked_seconds += time.monotonic() - started
+            else:
+                self.queue.put_nowait((time.monotonic(), message))
+        self.max_queued = max(self.max_queued, self.queue.qsize())
+
+    async def _open(self):
+        """Connect to the destination"""
+
+    async def _deliver(self, message) -> int:
+        """Send one message and return the number of bytes sent"""
+        raise NotImplementedError
+
+    async def _close(self):
+        """Disconnect from the destination"""
+
+    async def _connect(self):
+        async with self._connecting:
+            if self.connected:
+                return
+            delay = self.reconnect_delay
+            while True:
+                try:
+                    await self._open()
+                    for message in self.session_messages:
+                        await self._deliver(message)
+                    self.connected = True
+                    print(f"{self.name} sink connected")
+                    return
+                except self.retry_errors as e:
+                    print(f"{self.name} sink failed to connect ({e}), retrying in {delay:.1f}s")
+                    await self._close()
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _run(self):
+        item = None
+        await self._connect()
+        while True:
+            if item is None:
+                item = await self.queue.get()
+                delay = time.monotonic() - item[0]
+                self.queue_delay_total += delay
+                self._dequeued += 1
+                self.queue_delay_max = max(self.queue_delay_max, delay)
+            try:
+                sent = await self._deliver(item[1])
+            except SinkRejected:
+                self.rejected += 1
+                self.queue.task_done()
+                item = None
+                continue
+            except self.retry_errors as e:
+                # Keep the message and resend it once the destination is back
+                self.send_errors += 1
+                if self.connected:
+                    self.connected = False
+                    self.reconnects += 1
+                    print(f"{self.name} sink error: {e}, reconnecting...")
+                    await self._close()
+                await self._connect()
+                continue
+            self.messages_sent += 1
+            self.bytes_sent += sent
+            self.queue.task_done()
+            item = None
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Flush queued messages (up to drain_timeout) and disconnect"""
+        if not self._tasks:
+            return
+        await asyncio.sleep(0)  # let freshly started tasks connect
+        if self.connected:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._close()
+        self.connected = False
+
+    def stats(self) -> dict:
+        return {
+            'connected': self.connected,
+            'messages_sent': self.messages_sent,
+            'bytes_sent': self.bytes_sent,
+            'messages_dropped': self.messages_dropped,
+            'rejected': self.rejected,
+            'queued': self.queue.qsize(),
+            'max_queued': self.max_queued,
+            'blocked_puts': self.blocked_puts,
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'queue_delay_mean_ms': round(self.queue_delay_total / self._dequeued * 1000, 3) if self._dequeued else 0.0,
+            'queue_delay_max_ms': round(self.queue_delay_max * 1000, 3),
+            'send_errors': self.send_errors,
+            'reconnects': self.reconnects
+        }
+
+
+class FileSink(QueuedSink):
+    """Appends every frame as one NDJSON line; writes run in a worker thread"""
+
+    name = 'file'
+    payload = 'frames'
+
+    def __init__(self, path: str, **options):
+        super().__init__(**options)
+        self.path = Path(path)
+        self._file = None
+
+    async def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    async def _deliver(self, frame: str) -> int:
+        await asyncio.get_running_loop().run_in_executor(None, self._file.write, frame + '\n')
+        return len(frame) + 1
+
+    async def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class HttpSink(QueuedSink):
+    """
+    POSTs SDK-format readings to the ingest endpoint with `concurrency` requests in
+    flight over keep-alive connections. With `bulk` > 1, up to that many queued
+    readings go out as one JSON array per request (for bulk-capable ingest endpoints;
+    /api/data/ingest accepts one reading per request). Non-2xx responses are counted
+    as rejected rather than retried.
+    """
+
+    name = 'http'
+    payload = 'readings'
+
+    def __init__(self, url: str, project_token: Optional[str] = None, bulk: int = 1,
+                 concurrency: int = 8, timeout: float = 10.0, **options):
+        if httpx is None:
+            raise RuntimeError("HTTP sinks require httpx (pip install httpx)")
+        options.setdefault('max_queue', DEFAULT_MAX_QUEUE_READINGS)
+        super().__init__(concurrency=concurrency, **options)
+        self.url = url
+        self.bulk = max(1, bulk)
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json'}
+        if project_token:
+            self.headers['X-Project-Token'] = project_token
+        self.retry_errors = (OSError, SinkUnavailable, httpx.TransportError)
+        self._client = None
+
+    async def _open(self):
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            self._client = httpx.AsyncClient(headers=self.headers, timeout=self.timeout, limits=limits)
+
+    async def _deliver(self, reading) -> int:
+        body = reading[1]
+        extra = 0
+        if self.bulk > 1:
+            # Gather whatever else is already queued into one array
+            bodies = [body]
+            while len(bodies) < self.bulk:
+                try:
+                    bodies.append(self.queue.get_nowait()[1][1])
+                except asyncio.QueueEmpty:
+                    break
+            extra = len(bodies) - 1
+            body = '[' + ','.join(bodies) + ']'
+        try:
+            response = await self._client.post(self.url, content=body)
+        except BaseException:
+            # Readings gathered into this request are lost; the first one is retried
+            self.messages_dropped += extra
+            raise
+        finally:
+            for _ in range(extra):
+                self.queue.task_done()
+        if response.status_code >= 300:
+            self.rejected += extra
+            raise SinkRejected(f"HTTP {response.status_code}")
+        self.messages_sent += extra
+        return len(body)
+
+    async def _close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class MqttSink(QueuedSink):
+    """
+    Publishes SDK-format readings to sensors/{project}/{sensor}/data, the topics the
+    TwinSDK and the MQTT ingestion server use. paho's own outgoing queue is capped at
+    `max_inflight` so a slow broker backs up into this sink's queue where it is counted.
+    """
+
+    name = 'mqtt'
+    payload = 'readings'
+
+    def __init__(self, host: str = 'localhost', port: int = 1883, project: str = 'demo', qos: int = 0,
+                 max_inflight: int = 1000, username: Optional[str] = None, password: Optional[str] = None,
+                 **options):
+        if mqtt is None:
+            raise RuntimeError("MQTT sinks require paho-mqtt (pip install paho-mqtt)")
+        options.setdefault('max_queue', DEFAULT_MAX_QUEUE_READINGS)
+        super().__init__(**options)
+        self.host = host
+        self.port = port
+        self.project = project
+        self.qos = qos
+        self.max_inflight = max_inflight
+        self.username = username
+        self.password = password
+        self._client = None
+        self._connected = threading.Event()
+        self._topic_prefix = f"sensors/{project}/"
+
+    def _make_client(self):
+        client_id = f"mock-scada-{self.project}-{int(time.time() * 1000)}"
+        if hasattr(mqtt, 'CallbackAPIVersion'):  # paho-mqtt >= 2.0
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
+        else:
+            client = mqtt.Client(client_id=client_id)
+        if self.username:
+            client.username_pw_set(self.username, self.password)
+        client.max_inflight_messages_set(self.max_inflight)
+        client.max_queued_messages_set(self.max_inflight)
+        client.on_connect = lambda c, userdata, flags, rc: rc == 0 and self._connected.set()
+        client.on_disconnect = lambda c, userdata, rc: self._connected.clear()
+        return client
+
+    async def _open(self):
+        if self._client is None:
+            self._client = self._make_client()
+            self._client.connect_async(self.host, self.port)
+            self._client.loop_start()
+        connected = await asyncio.get_running_loop().run_in_executor(None, self._connected.wait, 10.0)
+        if not connected:
+            raise SinkUnavailable(f"no CONNACK from {self.host}:{self.port}")
+
+    async def _deliver(self, reading) -> int:
+        sensor_id, body = reading
+        while True:
+            info = self._client.publish(f"{self._topic_prefix}{sensor_id}/data", body, qos=self.qos)
+            if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                return len(body)
+            if info.rc != mqtt.MQTT_ERR_QUEUE_SIZE:
+                raise SinkUnavailable(mqtt.error_string(info.rc))
+            # Broker is behind: wait for in-flight messages to clear
+            self.blocked_puts += 1
+            await asyncio.sleep(0.001)
+
+    async def _close(self):
+        if self._client is not None:
+            self._client.disconnect()
+            self._client.loop_stop()
+            self._client = None
+            self._connected.clear()
+
+
+class SinkFanOut:
+    """
+    Feeds every tick to several sinks, each with its own queue, so a slow sink drops
+    (submit) or waits (put) without affecting what the others receive.
+    """
+
+    def __init__(self, sinks: Sequence[QueuedSink]):
+        if not sinks:
+            raise ValueError("at least one sink is required")
+        self.sinks = list(sinks)
+        names = [sink.name for sink in self.sinks]
+        self.names = [name if names.count(name) == 1 else f"{name}{names[:i].count(name)}"
+                      for i, name in enumerate(names)]
+
+    @property
+    def payloads(self) -> set:
+        """Payload formats the generator has to build each tick"""
+        return {sink.payload for sink in self.sinks}
+
+    def set_session_messages(self, payload: str, messages: list):
+        """Messages every sink consuming `payload` sends first on each connection"""
+        for sink in self.sinks:
+            if sink.payload == payload:
+                sink.session_messages = list(messages)
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+
+    def submit(self, payloads: Dict[str, list]) -> bool:
+        results = [sink.submit(payloads[sink.payload]) for sink in self.sinks]
+        return all(results)
+
+    async def put(self, payloads: Dict[str, list]):
+        await asyncio.gather(*(sink.put(payloads[sink.payload]) for sink in self.sinks))
+
+    async def stop(self, drain_timeout: float = 5.0):
+        await asyncio.gather(*(sink.stop(drain_timeout) for sink in self.sinks))
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: sink.stats() for name, sink in zip(self.names, self.sinks)}
+
+
+def create_sink(spec: str, **options) -> QueuedSink:
+    """
+    Build a sink from a URL-like spec:
+      ws://host:port, wss://...           websocket (SCADA listener)
+      mqtt://[user:pass@]host[:port]      MQTT broker; option `project` picks the topic project
+      http://host:port/api/data/ingest    HTTP ingest; options `project_token`, `bulk`, `concurrency`
+      file:path.ndjson or a plain path    NDJSON file
+    Options a sink does not take are ignored.
+    """
+    parsed = urlparse(spec)
+    scheme = parsed.scheme.lower()
+    common = {key: options[key] for key in ('max_queue',) if options.get(key) is not None}
+
+    if scheme in ('ws', 'wss'):
+        from ws_sender import BatchedWebSocketSender
+        return BatchedWebSocketSender(spec, stamp_send=options.get('probes', False), **common)
+    if scheme in ('mqtt', 'tcp'):
+        mqtt_options = {key: options[key] for key in ('project', 'qos', 'max_inflight') if options.get(key) is not None}
+        return MqttSink(parsed.hostname or 'localhost', parsed.port or 1883, username=parsed.username,
+                        password=parsed.password, **mqtt_options, **common)
+    if scheme in ('http', 'https'):
+        http_options = {key: options[key] for key in ('project_token', 'bulk', 'concurrency')
+                        if options.get(key) is not None}
+        return HttpSink(spec, **http_options, **common)
+    if scheme == 'file':
+        return FileSink(spec[len('file:'):], **common)
+    if not scheme or len(scheme) == 1:  # plain (possibly Windows) path
+        return FileSink(spec, **common)
+    raise ValueError(f"Unsupported sink '{spec}' (use ws://, mqtt://, http:// or file:)")
@@ -0,0 +1,135 @@
+import json
+
+import numpy as np
+import pytest
+
+from anomaly_injector import ANOMALY_KINDS, AnomalyInjector, GroundTruthWriter, load_labels, score_detections
+from device_status import DeviceStatusRollup
+from mock_data_gen import SCADADataGenerator
+from sensor_catalog import DEFAULT_PLANT, SensorCatalog
+
+TICKS = 5000
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return SensorCatalog.from_config(DEFAULT_PLANT)
+
+
+def clean_block(catalog, ticks=TICKS):
+    """Readings held at each sensor's base value, so every change is an injected one"""
+    return np.tile(catalog.base_value.astype(np.float32), (ticks, 1))
+
+
+def inject(catalog, kinds=ANOMALY_KINDS, rate=200.0, seed=0, ticks=TICKS):
+    injector = AnomalyInjector(catalog, rate, interval=1.0, kinds=kinds, seed=seed)
+    block = injector.apply(clean_block(catalog, ticks), 0)
+    return injector, block
+
+
+def events(injector):
+    return [dict(zip(('kind', 'sensor', 'start', 'end'), event)) for event in zip(
+        injector.started['kind'].tolist(), injector.started['sensor'].tolist(),
+        injector.started['start'].tolist(), injector.started['end'].tolist())]
+
+
+def test_seeded_schedules_repeat(catalog):
+    first, first_block = inject(catalog, seed=5)
+    second, second_block = inject(catalog, seed=5)
+    np.testing.assert_array_equal(first_block, second_block)
+    for name in ('event_id', 'kind', 'sensor', 'start', 'end', 'magnitude'):
+        np.testing.assert_array_equal(first.started[name], second.started[name])
+
+
+def test_only_labelled_cells_change(catalog):
+    injector, block = inject(catalog)
+    covered = np.zeros(block.shape, dtype=bool)
+    for event in events(injector):
+        covered[event['start']:event['end'], event['sensor']] = True
+    changed = block != clean_block(catalog)
+    assert changed.any()
+    assert not (changed & ~covered).any()
+    assert (block >= catalog.min_value).all() and (block <= catalog.max_value).all()
+
+
+@pytest.mark.parametrize("kind, sign", [("spike", 1), ("drop", -1)])
+def test_spikes_and_drops_move_the_right_way(catalog, kind, sign):
+    injector, block = inject(catalog, kinds=[kind])
+    clean = clean_block(catalog)
+    for event in events(injector):
+        window = block[event['start']:min(event['end'], TICKS), event['sensor']]
+        base = clean[0, event['sensor']]
+        assert ((window - base) * sign >= 0).all()
+
+
+def test_stuck_sensors_hold_their_value(catalog):
+    generator = SCADADataGenerator(catalog=catalog, seed=1, log_anomalies=False)
+    injector = AnomalyInjector(catalog, 200.0, kinds=['stuck'], seed=1)
+    block = injector.apply(generator.engine.step_block(0, TICKS), 0)
+    stuck = events(injector)
+    assert stuck
+    for event in stuck:
+        if any(other is not event and other['sensor'] == event['sensor'] and other['start'] < event['end']
+               and event['start'] < other['end'] for other in stuck):
+            continue  # overlapping holds: the later one wins
+        window = block[event['start']:min(event['end'], TICKS), event['sensor']]
+        assert (window == window[0]).all()
+
+
+def test_correlated_faults_cover_a_device_towards_unhealthy(catalog):
+    injector, block = inject(catalog, kinds=['correlated'], rate=20.0)
+    sign = DeviceStatusRollup(catalog).sign
+    clean = clean_block(catalog)
+    started = injector.started
+    assert started['start'].size
+    for event_id in np.unique(started['event_id']):
+        rows = started['event_id'] == event_id
+        sensors = started['sensor'][rows]
+        device = catalog.device_index[sensors[0]]
+        assert sorted(sensors.tolist()) == list(catalog.device_sensors(device))
+        last = min(int(started['end'][rows][0]), TICKS) - 1
+        assert ((block[last, sensors] - clean[last, sensors]) * sign[sensors] >= 0).all()
+
+
+def test_correlated_faults_change_reported_device_status(catalog):
+    generator = SCADADataGenerator(catalog=catalog, seed=1, log_anomalies=False)
+    generator.attach_injector(AnomalyInjector(catalog, 86400.0, kinds=['correlated'], seed=1))
+    for tick in range(200):
+        generator.simulation_time = tick
+        generator.generate_readings()
+    statuses = [device['status'] for frame in generator.build_device_status_frames(0)
+                for device in json.loads(frame)['devices']]
+    assert statuses == ['critical'] * catalog.device_count
+
+
+def test_ticks_are_applied_once(catalog):
+    injector = AnomalyInjector(catalog, 1.0)
+    injector.apply(clean_block(catalog, 10), 0)
+    with pytest.raises(ValueError):
+        injector.apply(clean_block(catalog, 10), 5)
+
+
+@pytest.mark.parametrize("kwargs", [{'kinds': ['meteor']}, {'rate': -1.0}])
+def test_rejects_bad_settings(catalog, kwargs):
+    with pytest.raises(ValueError):
+        AnomalyInjector(catalog, **{'rate': 1.0, **kwargs})
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".ndjson"])
+def test_labels_round_trip_and_score(catalog, tmp_path, suffix):
+    injector = AnomalyInjector(catalog, 200.0, seed=2)
+    writer = GroundTruthWriter(tmp_path / f"labels{suffix}", catalog)
+    for start in range(0, TICKS, 1000):
+        injector.apply(clean_block(catalog, 1000), start)
+        writer.write(injector, 0, 1_000_000, 1000)
+    writer.close()
+
+    labels = load_labels(writer.path)
+    assert len(labels['event_id']) == writer.rows > 0
+    assert set(labels['kind']) <= set(ANOMALY_KINDS)
+    np.testing.assert_array_equal(labels['start_ms'], 1_000_000 + labels['start_tick'] * 1000)
+
+    # A detector firing at every labelled start is perfect
+    detections = zip(labels['sensor_id'].tolist(), labels['start_ms'].tolist())
+    score = score_detections(labels, detections)
+    assert score['precision'] == 1.0 and score['recall'] == 1.0
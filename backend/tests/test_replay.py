@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+
+from replay import LagStats, iter_batches
+
+
+def test_lag_stats_stay_bounded():
+    lags = LagStats(recent=100, reservoir=1000)
+    values = np.random.default_rng(0).exponential(0.002, 200_000)
+    for lag in values.tolist():
+        lags.add(lag)
+    assert len(lags.recent) == 100 and len(lags.sample) == 1000
+    assert lags.count == values.size
+
+    summary = lags.summary()
+    assert summary['lag_max_ms'] == round(values.max() * 1000, 3)
+    p50, p99 = np.percentile(values, [50, 99]) * 1000
+    assert abs(summary['lag_p50_ms'] - p50) < 0.1 * p50
+    assert abs(summary['lag_p99_ms'] - p99) < 0.15 * p99
+    recent_max = values[-100:].max() * 1000
+    assert lags.recent_summary()['lag_max_ms'] == round(recent_max, 3)
+
+
+def test_lag_stats_empty():
+    assert LagStats().summary() == {}
+
+
+def test_empty_ndjson_files_are_skipped(tmp_path):
+    (tmp_path / 'a.ndjson').write_bytes(b'')
+    (tmp_path / 'b.ndjson').write_text(json.dumps({'timestamp': 1, 'sensorId': 's', 'value': 1.0}) + '\n')
+    assert [len(batch['value']) for batch in iter_batches(tmp_path)] == [1]
@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+import pytest
+
+from mock_data_gen import SCADADataGenerator
+from sensor_engine import SensorEngine
+
+SENSORS = 2000
+TICKS = 200
+CONFIG = dict(base_value=50.0, variance=10.0, min_value=0.0, max_value=100.0, drift_rate=0.5)
+
+
+def engine(anomaly_probability=0.05, seed=0, size=SENSORS):
+    return SensorEngine(**{name: np.full(size, value) for name, value in CONFIG.items()},
+                        anomaly_probability=anomaly_probability, seed=seed)
+
+
+def reference_readings(anomaly_probability, seed=1):
+    """The per-sensor model SCADADataGenerator.generate_sensor_value used before the engine"""
+    rng = np.random.default_rng(seed)
+    base, variance, low, high, drift_rate = CONFIG.values()
+    drift = [0.0] * SENSORS
+    direction = [rng.choice([-1, 1]) for _ in range(SENSORS)]
+    readings = np.empty((TICKS, SENSORS))
+    for t in range(TICKS):
+        for i in range(SENSORS):
+            drift[i] += rng.normal(0, drift_rate) * direction[i]
+            drift[i] = max(-variance * 0.5, min(variance * 0.5, drift[i]))
+            if rng.random() < 0.01:
+                direction[i] *= -1
+            value = base + rng.normal(0, variance * 0.3) + drift[i] + variance * 0.2 * math.sin(t * 0.01)
+            if rng.random() < anomaly_probability:
+                kind = rng.integers(3)
+                if kind == 0:
+                    value += variance * rng.uniform(1.5, 3.0)
+                elif kind == 1:
+                    value -= variance * rng.uniform(1.0, 2.0)
+                else:
+                    value += rng.normal(0, variance * 0.8)
+            readings[t, i] = round(max(low, min(high, value)), 2)
+    return readings
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return reference_readings(0.05)
+
+
+def assert_same_distribution(actual, expected):
+    # Seed-to-seed spread at this size is about 0.06 in the mean (drift walks are
+    # correlated over time) and 0.3% in the standard deviation
+    assert abs(actual.mean() - expected.mean()) < 0.25
+    assert abs(actual.std() / expected.std() - 1) < 0.015
+    np.testing.assert_allclose(np.percentile(actual, [1, 50, 99]), np.percentile(expected, [1, 50, 99]), atol=0.6)
+
+
+def test_step_matches_reference_model(reference):
+    sensors = engine()
+    actual = np.array([sensors.step(t).copy() for t in range(TICKS)])
+    assert_same_distribution(actual, reference)
+
+
+def test_step_block_matches_reference_model(reference):
+    actual = engine().step_block(0, TICKS)
+    assert actual.shape == (TICKS, SENSORS) and actual.dtype == np.float32
+    assert_same_distribution(actual.astype(np.float64), reference)
+
+
+def test_anomaly_rate():
+    sensors = engine(anomaly_probability=0.05)
+    hits = 0
+    for t in range(100):
+        sensors.step(t)
+        hits += sensors.anomaly_index.size
+    assert abs(hits / (100 * SENSORS) - 0.05) < 0.003
+    assert set(np.unique(sensors.anomaly_kind)) <= {0, 1, 2}
+
+
+@pytest.mark.parametrize("block", [False, True])
+def test_readings_are_bounded_and_rounded(block):
+    sensors = engine(anomaly_probability=0.5, size=500)
+    values = sensors.step_block(0, 100) if block else np.array([sensors.step(t).copy() for t in range(100)])
+    assert values.min() >= CONFIG["min_value"] and values.max() <= CONFIG["max_value"]
+    np.testing.assert_allclose(values, np.round(values, 2), atol=1e-5)
+
+
+def test_seeded_runs_repeat():
+    first, second = engine(seed=7, size=100), engine(seed=7, size=100)
+    for t in range(10):
+        np.testing.assert_array_equal(first.step(t), second.step(t))
+    np.testing.assert_array_equal(first.step_block(10, 20), second.step_block(10, 20))
+
+
+def test_per_sensor_api_reads_one_tick():
+    generator = SCADADataGenerator(seed=3, log_anomalies=False)
+    sensor_ids = generator.catalog.sensor_ids
+    first = [generator.generate_sensor_value(sensor_id) for sensor_id in sensor_ids]
+    assert first == [generator.generate_sensor_value(sensor_id) for sensor_id in sensor_ids]
+    assert first == generator.readings.tolist()
+    generator.simulation_time += 1
+    assert [generator.generate_sensor_value(sensor_id) for sensor_id in sensor_ids] == generator.readings.tolist()
+    assert generator.readings_time == 1
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tick Scheduler
+Drift-free periodic scheduling for the simulation loop. Tick k is due at
+start + k * interval on the monotonic clock, so work time never stretches the period
+and errors never accumulate: a configured 100 Hz loop produces 100 ticks per second
+as long as a tick's work fits in its interval.
+
+The event loop's timers are only millisecond-accurate (epoll timeouts are whole
+milliseconds), so for short intervals the last stretch before a deadline is spent
+yielding to the loop instead of sleeping, which makes sub-millisecond intervals work.
+"""
+
+import asyncio
+import time
+from array import array
+from typing import Dict, Optional
+
+import numpy as np
+
+OVERRUN_POLICIES = ('skip', 'catch-up')
+
+# Below this interval the scheduler spins (yielding to the loop) through the final
+# timer-granularity stretch before each deadline
+SPIN_INTERVAL = 0.01
+TIMER_GRANULARITY = 0.0011
+
+# Jitter samples kept for the statistics (most recent ticks)
+MAX_JITTER_SAMPLES = 100_000
+
+
+async def sleep_until(deadline: float, spin: float = 0.0):
+    """
+    Sleep until the monotonic `deadline`. The final `spin` seconds are spent yielding
+    to the event loop rather than in a timer, for sub-millisecond accuracy.
+    """
+    delay = deadline - time.monotonic() - spin
+    if delay > 0:
+        await asyncio.sleep(delay)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0)
+
+
+class TickScheduler:
+    """
+    Absolute-deadline tick scheduler with overrun handling and jitter statistics.
+
+    A tick overruns when the previous tick's work is still running at its deadline.
+    With the 'skip' policy the ticks that were missed entirely are dropped and the
+    schedule continues on its original grid; with 'catch-up' they run back to back
+    until the schedule is met again. Either way, once the loop is more than `max_lag`
+    seconds behind, the schedule is restarted from now instead of bursting.
+    """
+
+    def __init__(self, interval: float, policy: str = 'skip', max_lag: float = 1.0,
+                 spin: Optional[float] = None):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy '{policy}', choose from {OVERRUN_POLICIES}")
+        self.interval = interval
+        self.policy = policy
+        self.max_lag = max_lag
+        self.spin = (TIMER_GRANULARITY if interval < SPIN_INTERVAL else 0.0) if spin is None else spin
+
+        self.start: Optional[float] = None  # grid origin, moved forward on schedule resets
+        self.started: Optional[float] = None
+        self.tick = 0  # index of the next deadline on the grid
+
+        # Statistics
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.resets = 0
+        self._jitter = array('d')
+
+    def deadline(self, tick: int) -> float:
+        return self.start + tick * self.interval
+
+    async def wait(self) -> int:
+        """
+        Wait for the next tick's deadline and return how many ticks were skipped
+        since the previous one (always 0 with the 'catch-up' policy). The first call
+        starts the schedule and returns immediately.
+        """
+        now = time.monotonic()
+        if self.start is None:
+            self.start = self.started = now
+            self.tick = 1
+            self.ticks = 1
+            self._jitter.append(0.0)
+            return 0
+
+        skipped = 0
+        deadline = self.deadline(self.tick)
+        if now > deadline:
+            self.overruns += 1
+            behind = now - deadline
+            if behind > self.max_lag:
+                self.resets += 1
+                skipped = int(behind / self.interval) if self.policy == 'skip' else 0
+                self.skipped += skipped
+                self.start = now - self.tick * self.interval
+                deadline = now
+            elif self.policy == 'skip':
+                # Drop the ticks whose whole interval has already passed
+                skipped = int(behind / self.interval)
+                self.skipped += skipped
+                self.tick += skipped
+                deadline = self.deadline(self.tick)
+        if deadline > now:
+            await sleep_until(deadline, self.spin)
+
+        lateness = time.monotonic() - deadline
+        if len(self._jitter) >= MAX_JITTER_SAMPLES:
+            del self._jitter[:MAX_JITTER_SAMPLES // 2]
+        self._jitter.append(lateness)
+        self.tick += 1
+        self.ticks += 1
+        return skipped
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        summary = {
+            'interval_ms': self.interval * 1000,
+            'policy': self.policy,
+            'ticks': self.ticks,
+            'target_hz': round(1 / self.interval, 3),
+            'achieved_hz': round((self.ticks - 1) / elapsed, 3) if elapsed else 0.0,
+            'overruns': self.overruns,
+            'skipped_ticks': self.skipped,
+            'schedule_resets': self.resets
+        }
+        if self._jitter:
+            jitter = np.frombuffer(self._jitter, dtype=np.float64) * 1e6
+            p50, p99, p999 = np.percentile(jitter, [50, 99, 99.9]).tolist()
+            summary.update({'jitter_p50_us': round(p50, 1), 'jitter_p99_us': round(p99, 1),
+                            'jitter_p999_us': round(p999, 1), 'jitter_max_us': round(float(jitter.max()), 1)})
+        return summary
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Batched WebSocket Sender
+Asyncio sending pipeline for the mock SCADA generator. Each tick's readings are
+serialized into one (or a few size-capped) frames and queued; a background task
+sends them and reconnects on failure without ever blocking generation.
+The websocket sink of sinks.py.
+"""
+
+import asyncio
+import time
+from typing import List, Optional
+
+import websockets
+
+from sinks import QueuedSink, DEFAULT_MAX_QUEUE
+
+# Frames larger than this are split (the ws server default max payload is 100 MiB,
+# browsers and proxies are happier with much smaller frames)
+DEFAULT_MAX_FRAME_BYTES = 1024 * 1024
+
+
+def pack_frames(prefix: str, items: List[str], suffix: str,
+                max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES, max_items: Optional[int] = None) -> List[str]:
+    """
+    Join pre-encoded JSON items into frames of the form prefix + items + suffix,
+    starting a new frame whenever the next item would push it past max_frame_bytes
+    (or the frame already holds max_items items).
+    """
+    frames = []
+    overhead = len(prefix) + len(suffix)
+    start = 0
+    size = overhead
+    for i, item in enumerate(items):
+        item_size = len(item) + 1
+        if i > start and (size + item_size > max_frame_bytes or (max_items and i - start >= max_items)):
+            frames.append(prefix + ','.join(items[start:i]) + suffix)
+            start = i
+            size = overhead
+        size += item_size
+    if start < len(items) or not frames:
+        frames.append(prefix + ','.join(items[start:]) + suffix)
+    return frames
+
+
+class BatchedWebSocketSender(QueuedSink):
+    """
+    Sends queued frames over a single websocket connection from a background task.
+
+    submit() never blocks: when the queue is full (server down or too slow) the frames
+    are dropped and counted, so generation keeps its pace.
+    """
+
+    name = 'websocket'
+    payload = 'frames'
+    retry_errors = (OSError, websockets.WebSocketException)
+
+    def __init__(self, url: str, max_queue: int = DEFAULT_MAX_QUEUE,
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0, stamp_send: bool = False):
+        super().__init__(max_queue=max_queue, reconnect_delay=reconnect_delay,
+                         max_reconnect_delay=max_reconnect_delay)
+        self.url = url
+        self.stamp_send = stamp_send
+        self._reader: Optional[asyncio.Task] = None
+        self._ws = None
+
+    async def _open(self):
+        self._ws = await websockets.connect(self.url, max_size=None)
+        self._reader = asyncio.get_running_loop().create_task(self._discard_incoming(self._ws))
+
+    @staticmethod
+    async def _discard_incoming(ws):
+        """
+        Keep reading (and ignoring) server messages: an unread receive queue would
+        eventually stop the connection from being read at all and stall our sends.
+        """
+        try:
+            async for _ in ws:
+                pass
+        except websockets.WebSocketException:
+            pass
+
+    async def _deliver(self, frame: str) -> int:
+        if self.stamp_send:
+            # Monotonic send stamp (ns) injected as the first field of the JSON object
+            await self._ws.send(f'{{"sentNs":{time.monotonic_ns()},' + frame[1:])
+        else:
+            await self._ws.send(frame)
+        return len(frame)
+
+    async def _close(self):
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None